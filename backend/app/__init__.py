@@ -1,6 +1,7 @@
 from flask import Flask
 from flask_cors import CORS
-from .database import get_db_info
+from .database import get_db_info, register_unit_of_work
+from .cache import get_cache_stats
 from .error_handlers import register_error_handlers
 
 
@@ -14,11 +15,36 @@ def create_app():
     
     register_error_handlers(app)
     
-    from .duenios._routes import duenios_bp
+    # Una conexión por request, confirmada o revertida una sola vez al final
+    register_unit_of_work(app)
+    
+    from .duenios._routes import duenios_bp, duenios_controller
     from .turnos._routes import turnos_bp
+    from .recursos._routes import recursos_bp
+    from .lista_espera._routes import lista_espera_bp, lista_espera_controller
     
     app.register_blueprint(duenios_bp, url_prefix='/api')
     app.register_blueprint(turnos_bp, url_prefix='/api')
+    app.register_blueprint(recursos_bp, url_prefix='/api')
+    app.register_blueprint(lista_espera_bp, url_prefix='/api')
+    
+    # Índice de búsqueda aproximada de dueños; si la base no responde se
+    # construye en la primera búsqueda
+    from .duenios._search import duenio_search_index
+    duenio_search_index.warm_up(duenios_controller.duenio_model.get_all)
+    
+    # Bitmap de ids de dueños para validar turnos sin consultar la base
+    from .duenios._ids import duenio_ids
+    duenio_ids.warm_up(duenios_controller.duenio_model.get_ids)
+    
+    from .turnos._model import turno_agenda
+    
+    # Lista de espera: índice en memoria y el hilo que reasigna los horarios
+    # de turnos cancelados
+    from .lista_espera._indice import lista_espera_indice
+    from .lista_espera._emparejador import emparejador_lista_espera
+    lista_espera_indice.warm_up(lista_espera_controller.lista_espera_model.get_esperando)
+    emparejador_lista_espera.start(app)
     
     @app.route('/')
     def home():
@@ -30,12 +56,23 @@ def create_app():
                 'health': '/api/health',
                 'duenios': '/api/duenios/',
                 'search_duenios': '/api/duenios/search?q=',
+                'autocomplete_duenios': '/api/duenios/autocomplete?prefix=',
+                'duenios_por_telefono': '/api/duenios/by-phone/:telefono',
                 'duenios_stats': '/api/duenios/statistics',
+                'duenios_export': '/api/duenios/export?format=ndjson|csv',
                 'turnos': '/api/turnos/',
+                'turnos_bulk': '/api/turnos/bulk',
                 'turnos_por_duenio': '/api/turnos/duenio/:id_duenio',
                 'turnos_por_fecha': '/api/turnos/fecha/:fecha',
+                'turnos_por_rango': '/api/turnos/rango?desde=&hasta=',
+                'turnos_ocupacion': '/api/turnos/ocupacion?mes=YYYY-MM',
+                'turnos_disponibilidad': '/api/turnos/disponibilidad?fecha=&duracion=&recurso=',
                 'cambiar_estado_turno': '/api/turnos/:id/estado',
-                'turnos_stats': '/api/turnos/statistics'
+                'cambiar_estado_turnos': '/api/turnos/estado',
+                'turnos_stats': '/api/turnos/statistics',
+                'turnos_export': '/api/turnos/export?format=ndjson|csv&estado=&fecha_desde=&fecha_hasta=',
+                'recursos': '/api/recursos/',
+                'lista_espera': '/api/lista-espera/'
             }
         }
     
@@ -46,7 +83,11 @@ def create_app():
             'status': 'healthy',
             'service': 'backend',
             'database': db_info,
-            'modules': ['duenios', 'turnos']
+            'caches': get_cache_stats(),
+            'duenio_ids': duenio_ids.stats(),
+            'agenda': turno_agenda.stats(),
+            'lista_espera': emparejador_lista_espera.stats(),
+            'modules': ['duenios', 'turnos', 'recursos', 'lista_espera']
         }
     
     return app
\ No newline at end of file
@@ -0,0 +1,170 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Caches creados en el proceso, por nombre (para exponer sus métricas)
+_caches: Dict[str, 'LRUCache'] = {}
+
+
+class LRUCache:
+    """
+    Cache en memoria del proceso con tamaño máximo (LRU) y vencimiento (TTL).
+    Es thread-safe y lleva contadores de aciertos, fallos y desalojos.
+    """
+    
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _caches[name] = self
+    
+    
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Devuelve (encontrado, valor). Un valor vencido cuenta como fallo."""
+        with self._lock:
+            entrada = self._data.get(key)
+            if entrada is None or entrada[0] < time.monotonic():
+                if entrada is not None:
+                    del self._data[key]
+                self.misses += 1
+                return False, None
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, entrada[1]
+    
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """ttl reemplaza al del cache para esta entrada (ej. más corto para un resultado negativo)"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+    
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+    
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / consultas, 3) if consultas else None
+            }
+
+
+class CargaEnMemoria:
+    """
+    Base de las estructuras del proceso que se cargan enteras desde la base
+    y después se mantienen con cada commit (ids y búsqueda de dueños, agenda
+    de turnos, lista de espera).
+    
+    La carga corre fuera del lock para no frenar las lecturas; las
+    escrituras que se confirman mientras tanto se guardan en _pendientes y
+    se aplican al terminar, así ninguna se pierde. La subclase implementa
+    _cargar(datos), que corre con el lock tomado, y pasa cada alta, baja o
+    cambio por _apply.
+    """
+    
+    # Para los mensajes: "No se pudo cargar <descripcion>"
+    descripcion = 'la estructura en memoria'
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._building = False
+        self._pendientes: List[tuple] = []
+    
+    
+    @property
+    def built(self) -> bool:
+        return self._built
+    
+    
+    def ensure_built(self, loader: Callable[[], Any]) -> None:
+        """Carga con loader() si todavía no se hizo"""
+        with self._lock:
+            if self._built or self._building:
+                return
+            self._empezar_carga()
+        self._construir(loader)
+    
+    
+    def warm_up(self, loader: Callable[[], Any]) -> None:
+        """Carga al iniciar la app; si falla se reintenta con el próximo ensure_built"""
+        try:
+            self.ensure_built(loader)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo cargar {self.descripcion}: {e}")
+    
+    
+    def _empezar_carga(self) -> None:
+        # Con el lock tomado: desde acá las escrituras se encolan
+        self._building = True
+        self._pendientes = []
+    
+    
+    def _construir(self, loader: Callable[[], Any]) -> None:
+        """Después de _empezar_carga: corre loader() sin el lock y aplica el resultado y lo pendiente"""
+        try:
+            datos = loader()
+        except Exception:
+            with self._lock:
+                self._building = False
+                self._carga_fallida()
+            raise
+        
+        with self._lock:
+            self._cargar(datos)
+            for operacion, args in self._pendientes:
+                operacion(*args)
+            self._pendientes = []
+            self._building = False
+            self._built = True
+    
+    
+    def _apply(self, operacion: Callable, *args) -> None:
+        with self._lock:
+            if self._building:
+                self._pendientes.append((operacion, args))
+            elif self._built:
+                operacion(*args)
+            # Sin cargar no hay nada que mantener: la carga leerá el dato
+    
+    
+    def _cargar(self, datos: Any) -> None:
+        raise NotImplementedError
+    
+    
+    def _carga_fallida(self) -> None:
+        # Con el lock tomado, después de un loader() fallido
+        pass
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,222 @@
+import logging
+from typing import Dict, List, Optional, Tuple, Any
+
+from .database import execute_query, execute_transaction, get_request_connection, before_commit
+
+logger = logging.getLogger(__name__)
+
+STATS_TABLE = "turnos_stats"
+
+# Deltas de la request en curso, por conexión: se suman a STATS_TABLE en un
+# solo upsert justo antes del COMMIT (ver _delta_query)
+PENDIENTES_TABLE = "turnos_stats_pendientes"
+
+METRICA_TURNOS_TOTAL = "turnos:total"
+METRICA_DUENIOS_TOTAL = "duenios:total"
+# +1 por cada escritura de turnos: la agenda en memoria de cada worker la
+# compara con la suya antes de servir (ver TurnoAgenda.ensure_fresh)
+METRICA_AGENDA_VERSION = "turnos:version"
+PREFIJO_ESTADO = "turnos:estado:"
+PREFIJO_DIA = "turnos:dia:"
+
+
+def metrica_estado(estado: str) -> str:
+    return f"{PREFIJO_ESTADO}{estado}"
+
+
+def metrica_dia(fecha: str) -> str:
+    # fecha en formato YYYY-MM-DD
+    return f"{PREFIJO_DIA}{fecha}"
+
+
+def _upsert_query(select_cambios: str) -> str:
+    # Suma los deltas a los contadores existentes o crea la fila si no existe.
+    # Las filas se bloquean en orden de metrica en todas las escrituras: dos
+    # transacciones que tocan los mismos contadores no se bloquean en cruz
+    return f"""
+        INSERT INTO {STATS_TABLE} (metrica, valor)
+        SELECT metrica, delta FROM ({select_cambios}) AS cambios
+        ORDER BY metrica
+        ON DUPLICATE KEY UPDATE valor = {STATS_TABLE}.valor + cambios.delta
+    """
+
+
+def _delta_query(select_cambios: str) -> str:
+    """
+    Sentencia que aplica los deltas de select_cambios (filas metrica, delta).
+    
+    Dentro de una request los contadores no se tocan en el momento: todas las
+    escrituras pasan por la fila de turnos:total, y con el unit of work su
+    lock duraría hasta el final de la request. Los deltas se anotan en una
+    tabla temporal de la conexión y se aplican juntos antes del COMMIT, así
+    el lock dura solo el upsert y el commit. Fuera de una request (la
+    transacción se confirma enseguida) se aplican directo.
+    """
+    if get_request_connection() is None:
+        return _upsert_query(select_cambios)
+    
+    if before_commit('contadores', _aplicar_pendientes):
+        # Una tabla temporal por request; CREATE TEMPORARY no confirma la
+        # transacción y el pool la descarta al devolver la conexión
+        execute_query(f"""
+            CREATE TEMPORARY TABLE {PENDIENTES_TABLE} (
+                metrica VARCHAR(50) COLLATE utf8mb4_unicode_ci NOT NULL,
+                delta BIGINT NOT NULL
+            ) ENGINE=InnoDB
+        """)
+    
+    return f"""
+        INSERT INTO {PENDIENTES_TABLE} (metrica, delta)
+        SELECT metrica, delta FROM ({select_cambios}) AS cambios
+    """
+
+
+def _aplicar_pendientes() -> None:
+    # Los deltas netos de toda la request en un upsert, en orden de metrica
+    execute_query(_upsert_query(f"""
+        SELECT metrica, SUM(delta) AS delta FROM {PENDIENTES_TABLE}
+        GROUP BY metrica
+        HAVING SUM(delta) <> 0
+    """))
+    execute_query(f"DROP TEMPORARY TABLE {PENDIENTES_TABLE}")
+
+
+def counter_delta_query(deltas: Dict[str, int], si_hubo_cambios: bool = False) -> Tuple[str, tuple]:
+    """
+    Query para aplicar deltas conocidos de antemano, ej: {'turnos:total': 1}.
+    Con si_hubo_cambios=True solo se aplican si la sentencia anterior de la
+    transacción modificó alguna fila (ROW_COUNT() > 0), ej: un UPDATE condicional.
+    """
+    filas = " UNION ALL ".join("SELECT %s AS metrica, %s AS delta" for _ in deltas)
+    if si_hubo_cambios:
+        filas = f"SELECT metrica, delta FROM ({filas}) AS filas WHERE ROW_COUNT() > 0"
+
+    params = []
+    for metrica, delta in sorted(deltas.items()):
+        params.extend([metrica, delta])
+
+    return _delta_query(filas), tuple(params)
+
+
+def turno_deltas(estado: str, fecha: str, signo: int = 1) -> Dict[str, int]:
+    """Deltas que produce un único turno con el estado y fecha (YYYY-MM-DD) dados"""
+    return {
+        METRICA_TURNOS_TOTAL: signo,
+        metrica_estado(estado): signo,
+        metrica_dia(fecha): signo
+    }
+
+
+def turnos_delta_query(where: str, params: tuple, signo: int) -> Tuple[str, tuple]:
+    """
+    Query que suma (signo=1) o resta (signo=-1) a los contadores las filas
+    de turnos que cumplen `where`, leyendo sus valores dentro de la misma
+    transacción. Debe ejecutarse antes de un DELETE y antes/después de un UPDATE.
+    """
+    select_cambios = f"""
+        SELECT metrica, SUM(delta) AS delta FROM (
+            SELECT '{METRICA_TURNOS_TOTAL}' AS metrica, %s AS delta
+            FROM turnos WHERE {where}
+            UNION ALL
+            SELECT CONCAT('{PREFIJO_ESTADO}', estado), %s
+            FROM turnos WHERE {where}
+            UNION ALL
+            SELECT CONCAT('{PREFIJO_DIA}', DATE(fecha_turno)), %s
+            FROM turnos WHERE {where}
+        ) AS filas
+        GROUP BY metrica
+    """
+
+    query_params = []
+    for _ in range(3):
+        query_params.append(signo)
+        query_params.extend(params)
+
+    return _delta_query(select_cambios), tuple(query_params)
+
+
+def turnos_cambio_query(where: str, params: tuple, estado: Optional[str] = None, fecha: Optional[str] = None) -> Tuple[str, tuple]:
+    """
+    Query con los deltas netos de pasar las filas de turnos que cumplen
+    `where` al estado y/o fecha (YYYY-MM-DD) dados: una sola sentencia, que
+    solo toca las métricas que cambian. Debe ejecutarse antes del UPDATE y
+    con sus mismas condiciones.
+    """
+    select_cambios = f"""
+        SELECT metrica, SUM(delta) AS delta FROM (
+            SELECT CONCAT('{PREFIJO_ESTADO}', estado) AS metrica, -1 AS delta
+            FROM turnos WHERE {where}
+            UNION ALL
+            SELECT CONCAT('{PREFIJO_ESTADO}', COALESCE(%s, estado)), 1
+            FROM turnos WHERE {where}
+            UNION ALL
+            SELECT CONCAT('{PREFIJO_DIA}', DATE(fecha_turno)), -1
+            FROM turnos WHERE {where}
+            UNION ALL
+            SELECT CONCAT('{PREFIJO_DIA}', COALESCE(%s, DATE(fecha_turno))), 1
+            FROM turnos WHERE {where}
+        ) AS filas
+        GROUP BY metrica
+        HAVING SUM(delta) <> 0
+    """
+
+    query_params = tuple(params) + (estado,) + tuple(params) + tuple(params) + (fecha,) + tuple(params)
+    return _delta_query(select_cambios), query_params
+
+
+def duenios_delta_query(where: str, params: tuple, signo: int) -> Tuple[str, tuple]:
+    """Query que ajusta el total de dueños según las filas que cumplen `where`"""
+    select_cambios = f"""
+        SELECT '{METRICA_DUENIOS_TOTAL}' AS metrica, COUNT(*) * %s AS delta
+        FROM duenios WHERE {where}
+        HAVING COUNT(*) > 0
+    """
+
+    return _delta_query(select_cambios), (signo,) + tuple(params)
+
+
+def read_counters(metricas: List[str]) -> Dict[str, int]:
+    """Lee contadores por clave primaria. Los que no existen valen 0."""
+    if not metricas:
+        return {}
+
+    placeholders = ", ".join(["%s"] * len(metricas))
+    query = f"SELECT metrica, valor FROM {STATS_TABLE} WHERE metrica IN ({placeholders})"
+
+    rows = execute_query(query, tuple(metricas), fetch=True) or []
+
+    valores = {metrica: 0 for metrica in metricas}
+    for row in rows:
+        valores[row['metrica']] = int(row['valor'])
+
+    return valores
+
+
+def rebuild_queries() -> List[Tuple[str, Any]]:
+    """Queries que recalculan todos los contadores desde turnos y duenios"""
+    rebuild_query = f"""
+        INSERT INTO {STATS_TABLE} (metrica, valor)
+        SELECT '{METRICA_TURNOS_TOTAL}', COUNT(*) FROM turnos
+        UNION ALL
+        SELECT CONCAT('{PREFIJO_ESTADO}', estado), COUNT(*) FROM turnos GROUP BY estado
+        UNION ALL
+        SELECT CONCAT('{PREFIJO_DIA}', DATE(fecha_turno)), COUNT(*) FROM turnos GROUP BY DATE(fecha_turno)
+        UNION ALL
+        SELECT '{METRICA_DUENIOS_TOTAL}', COUNT(*) FROM duenios
+    """
+
+    return [
+        (f"DELETE FROM {STATS_TABLE}", None),
+        (rebuild_query, None)
+    ]
+
+
+def rebuild_counters() -> Dict[str, Any]:
+    """Recalcula todos los contadores desde cero a partir de turnos y duenios"""
+    results = execute_transaction(rebuild_queries())
+
+    logger.info(f"Contadores de {STATS_TABLE} reconstruidos: {results[1]} métricas")
+    return {
+        'eliminadas': results[0],
+        'creadas': results[1]
+    }
@@ -1,7 +1,10 @@
 import os
+import threading
 import mysql.connector
 from mysql.connector import pooling, Error
+from mysql.connector.constants import ClientFlag
 from dotenv import load_dotenv
+from flask import g, has_app_context
 import logging
 
 load_dotenv()
@@ -18,11 +21,27 @@ DB_CONFIG = {
     'charset': 'utf8mb4',
     'collation': 'utf8mb4_unicode_ci',
     'autocommit': True,
-    'raise_on_warnings': True
+    'raise_on_warnings': True,
+    # rowcount de UPDATE = filas encontradas, aunque no cambie ningún valor.
+    # Permite usar el UPDATE mismo como verificación de existencia.
+    'client_flags': [ClientFlag.FOUND_ROWS]
 }
 
 connection_pool = None
 
+# Lecturas en streaming (execute_query_iter): filas por fetchmany y tiempo
+# máximo que el servidor espera a un cliente lento antes de cortar el envío
+STREAM_BATCH_SIZE = int(os.getenv('DB_STREAM_BATCH_SIZE', 500))
+STREAM_NET_WRITE_TIMEOUT = int(os.getenv('DB_STREAM_NET_WRITE_TIMEOUT', 600))
+
+# Lecturas en streaming simultáneas: cada una abre su propia conexión fuera
+# del pool, así que esto acota cuántas conexiones extra puede pedir la app
+STREAM_MAX_CONCURRENT = int(os.getenv('DB_STREAM_MAX_CONCURRENT', 4))
+_stream_slots = threading.BoundedSemaphore(STREAM_MAX_CONCURRENT)
+
+class StreamingNoDisponible(Exception):
+    """Ya hay DB_STREAM_MAX_CONCURRENT lecturas en streaming en curso"""
+
 def init_connection_pool():
     global connection_pool
     
@@ -84,12 +103,163 @@ def get_db_connection():
         else:
             raise
 
+def get_request_connection():
+    """
+    Conexión del unit of work de la request actual.
+    
+    La primera consulta dentro de un app context toma una conexión del pool y
+    la guarda en `g`; el resto de las llamadas a los modelos en esa request la
+    reutilizan. La transacción se confirma o revierte una sola vez al terminar
+    (ver register_unit_of_work). Fuera de un app context devuelve None, y
+    también una vez confirmada: los callbacks de on_commit consultan con su
+    propia conexión del pool, en autocommit, sin reabrir una transacción en
+    la del unit of work.
+    """
+    if not has_app_context() or g.get('db_request_finished'):
+        return None
+    
+    connection = g.get('db_connection')
+    if connection is None:
+        connection = get_db_connection()
+        connection.autocommit = False
+        g.db_connection = connection
+        g.db_savepoints = 0
+    
+    return connection
+
+def _release_connection(connection):
+    try:
+        connection.autocommit = True  # Restaurar autocommit
+    except Error as e:
+        logger.warning(f"⚠️ No se pudo restaurar autocommit: {e}")
+    finally:
+        connection.close()
+
+def commit_request_connection():
+    """Confirma la transacción de la request si hay una abierta"""
+    connection = g.get('db_connection') if has_app_context() else None
+    if connection is not None:
+        connection.commit()
+
+def rollback_request_connection():
+    """Revierte la transacción de la request si hay una abierta"""
+    connection = g.get('db_connection') if has_app_context() else None
+    if connection is not None:
+        connection.rollback()
+
+def _unit_of_work_abierto():
+    """True si la request tiene un unit of work abierto (todavía sin confirmar)"""
+    return has_app_context() and g.get('db_connection') is not None and not g.get('db_request_finished')
+
+def before_commit(clave, callback):
+    """
+    Registra callback() para ejecutarse en la transacción del unit of work
+    justo antes del COMMIT, una sola vez por clave. Lo que escriba queda en
+    el mismo commit y un error revierte la request entera. Devuelve True si
+    es el primer registro de esa clave. Requiere un unit of work abierto
+    (get_request_connection() distinto de None).
+    """
+    callbacks = g.setdefault('db_before_commit', {})
+    if clave in callbacks:
+        return False
+    callbacks[clave] = callback
+    return True
+
+def on_commit(callback):
+    """
+    Ejecuta callback cuando se confirmen los cambios en curso. Dentro de una
+    request espera al commit del unit of work y se descarta si se revierte;
+    fuera de una request o ya confirmada se ejecuta enseguida.
+    """
+    if _unit_of_work_abierto():
+        g.setdefault('db_on_commit', []).append(callback)
+    else:
+        callback()
+
+def _run_before_commit_callbacks():
+    for callback in g.pop('db_before_commit', {}).values():
+        callback()
+
+def _run_commit_callbacks(callbacks):
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"❌ Error en callback posterior al commit: {e}")
+
+def register_unit_of_work(app):
+    from .error_handlers import create_error_response
+    
+    @app.after_request
+    def finish_unit_of_work(response):
+        if g.get('db_connection') is None:
+            return response
+        
+        callbacks = g.pop('db_on_commit', [])
+        
+        # Las respuestas de error no dejan cambios a medias
+        if response.status_code >= 400:
+            g.db_request_finished = True
+            rollback_request_connection()
+            return response
+        
+        # Se confirma antes de enviar la respuesta para poder informar un fallo
+        try:
+            # Con la transacción todavía abierta: lo que escriban entra en este commit
+            _run_before_commit_callbacks()
+            g.db_request_finished = True
+            commit_request_connection()
+        except Exception as e:
+            g.db_request_finished = True
+            logger.error(f"❌ Error confirmando la transacción de la request: {e}")
+            rollback_request_connection()
+            return app.make_response(create_error_response(
+                "No se pudieron confirmar los cambios",
+                500,
+                "Error de base de datos"
+            ))
+        
+        _run_commit_callbacks(callbacks)
+        return response
+    
+    @app.teardown_appcontext
+    def release_unit_of_work(exception=None):
+        connection = g.get('db_connection')
+        if connection is None:
+            return
+        
+        try:
+            # Si after_request no llegó a correr (excepción no manejada o app
+            # context usado fuera de una request, ej. un script) se decide acá
+            if not g.get('db_request_finished'):
+                if exception is None:
+                    _run_before_commit_callbacks()
+                    g.db_request_finished = True
+                    connection.commit()
+                    _run_commit_callbacks(g.pop('db_on_commit', []))
+                else:
+                    g.db_request_finished = True
+                    connection.rollback()
+        except Exception as e:
+            logger.error(f"❌ Error cerrando la transacción de la request: {e}")
+            g.db_request_finished = True
+            try:
+                # Sin esto restaurar el autocommit confirmaría lo que quedó a medias
+                connection.rollback()
+            except Error as rollback_error:
+                logger.error(f"❌ Error revirtiendo la transacción de la request: {rollback_error}")
+        finally:
+            for clave in ['db_connection', 'db_savepoints', 'db_request_finished', 'db_on_commit', 'db_before_commit']:
+                g.pop(clave, None)
+            _release_connection(connection)
+
 def execute_query(query, params=None, fetch=False, fetch_one=False):
+    uow_connection = get_request_connection()
     connection = None
     cursor = None
     
     try:
-        connection = get_db_connection()
+        connection = uow_connection or get_db_connection()
         cursor = connection.cursor(dictionary=True)
         
         cursor.execute(query, params or ())
@@ -99,15 +269,17 @@ def execute_query(query, params=None, fetch=False, fetch_one=False):
         elif fetch:
             result = cursor.fetchall()
         else:
-            # Para INSERT/UPDATE/DELETE, devolver lastrowid o rowcount
-            connection.commit()
+            # Para INSERT/UPDATE/DELETE, devolver lastrowid o rowcount.
+            # Dentro de una request el commit lo hace el unit of work.
+            if uow_connection is None:
+                connection.commit()
             result = cursor.lastrowid if cursor.lastrowid else cursor.rowcount
             
         logger.debug(f"✅ Query ejecutada: {query[:50]}...")
         return result
         
     except Error as e:
-        if connection:
+        if connection and uow_connection is None:
             connection.rollback()
         logger.error(f"❌ Error ejecutando query: {e}")
         logger.error(f"Query: {query}")
@@ -116,45 +288,209 @@ def execute_query(query, params=None, fetch=False, fetch_one=False):
     finally:
         if cursor:
             cursor.close()
-        if connection:
+        if connection and uow_connection is None:
             connection.close()
 
+def execute_query_iter(query, params=None, batch_size=STREAM_BATCH_SIZE):
+    """
+    Generador de filas para lecturas sin límite (exportaciones y listados
+    completos). Usa un cursor sin buffer: el servidor envía las filas a
+    medida que se leen de a batch_size con fetchmany, así que la memoria no
+    crece con el total.
+    
+    La conexión es propia y no sale del pool: una descarga lenta la ocupa
+    mientras dura y no debe dejar sin conexiones a las demás requests. Como
+    mucho corren STREAM_MAX_CONCURRENT a la vez; con todas ocupadas se lanza
+    StreamingNoDisponible al pedir la primera fila.
+    """
+    if not _stream_slots.acquire(blocking=False):
+        raise StreamingNoDisponible(
+            f"Hay {STREAM_MAX_CONCURRENT} lecturas en streaming en curso"
+        )
+    
+    connection = None
+    cursor = None
+    completa = False
+    
+    try:
+        # Implementación pura: shutdown() cierra el socket sin leer lo
+        # pendiente, y la extensión C no lo implementa
+        connection = mysql.connector.connect(use_pure=True, **DB_CONFIG)
+        
+        # Un cliente lento frena la lectura; sin esto el servidor corta el
+        # envío a los net_write_timeout segundos (60 por defecto)
+        session_cursor = connection.cursor()
+        session_cursor.execute(f"SET SESSION net_write_timeout = {STREAM_NET_WRITE_TIMEOUT}")
+        session_cursor.close()
+        
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        cursor.execute(query, params or ())
+        
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+        
+        completa = True
+        logger.debug(f"✅ Query iterada: {query[:50]}...")
+    
+    except Error as e:
+        logger.error(f"❌ Error iterando query: {e}")
+        logger.error(f"Query: {query}")
+        raise
+    
+    finally:
+        try:
+            if connection is None:
+                pass
+            elif completa:
+                cursor.close()
+                connection.close()
+            else:
+                # El cliente cortó la descarga (o falló la lectura) con filas
+                # sin leer: se cierra el socket sin consumirlas, la conexión
+                # no se reutiliza y el servidor aborta el envío
+                connection.shutdown()
+        except Error as e:
+            logger.warning(f"⚠️ Error cerrando conexión de streaming: {e}")
+        finally:
+            _stream_slots.release()
+
+def _run_in_transaction(work):
+    """
+    Ejecuta work(cursor) en una transacción y devuelve su resultado.
+    Dentro de una request usa un savepoint del unit of work; fuera de ella
+    una conexión propia que se confirma al terminar.
+    """
+    uow_connection = get_request_connection()
+    connection = None
+    cursor = None
+    savepoint = None
+    
+    try:
+        if uow_connection is not None:
+            # Dentro del unit of work: un savepoint permite deshacer solo este bloque
+            connection = uow_connection
+            cursor = connection.cursor(dictionary=True)
+            g.db_savepoints += 1
+            savepoint = f"sp_{g.db_savepoints}"
+            cursor.execute(f"SAVEPOINT {savepoint}")
+        else:
+            connection = get_db_connection()
+            connection.autocommit = False 
+            cursor = connection.cursor(dictionary=True)
+        
+        result = work(cursor)
+        
+        if savepoint:
+            cursor.execute(f"RELEASE SAVEPOINT {savepoint}")
+        else:
+            connection.commit()
+        return result
+        
+    except Error as e:
+        if savepoint:
+            try:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+            except Error as rollback_error:
+                logger.error(f"❌ Error revirtiendo savepoint: {rollback_error}")
+        elif connection:
+            connection.rollback()
+        logger.error(f"❌ Error en transacción: {e}")
+        raise
+        
+    finally:
+        if cursor:
+            cursor.close()
+        if connection and uow_connection is None:
+            _release_connection(connection)
+
+def _execute_all(cursor, queries_with_params):
+    results = []
+    for query, params in queries_with_params:
+        cursor.execute(query, params or ())
+        # Guardar lastrowid para INSERTs
+        if cursor.lastrowid:
+            results.append(cursor.lastrowid)
+        else:
+            results.append(cursor.rowcount)
+    return results
+
 def execute_transaction(queries_with_params):
+    results = _run_in_transaction(lambda cursor: _execute_all(cursor, queries_with_params))
+    logger.info(f"✅ Transacción completada: {len(queries_with_params)} queries")
+    return results
+
+def execute_locked_transaction(lock_query, lock_params, build_queries):
+    """
+    Transacción de lectura-escritura: ejecuta lock_query (un SELECT ... FOR UPDATE),
+    arma las escrituras con build_queries(filas) y las ejecuta en la misma
+    transacción, con las filas leídas todavía bloqueadas.
+    Devuelve (filas, resultados de las escrituras).
+    """
+    def work(cursor):
+        cursor.execute(lock_query, lock_params or ())
+        rows = cursor.fetchall()
+        queries_with_params = build_queries(rows)
+        return rows, _execute_all(cursor, queries_with_params)
+    
+    rows, results = _run_in_transaction(work)
+    logger.info(f"✅ Transacción completada: {len(rows)} filas bloqueadas, {len(results)} queries")
+    return rows, results
+
+def execute_read_batch(queries_with_params):
+    """
+    Ejecuta varias consultas de lectura con una sola conexión, dentro de una
+    transacción de solo lectura con snapshot consistente: todas ven los mismos datos.
+    Dentro de una request usa la transacción del unit of work, que ya es consistente.
+    Devuelve una lista con las filas de cada consulta.
+    """
+    uow_connection = get_request_connection()
     connection = None
     cursor = None
     
     try:
-        connection = get_db_connection()
-        connection.autocommit = False 
+        if uow_connection is not None:
+            connection = uow_connection
+        else:
+            connection = get_db_connection()
+            connection.start_transaction(consistent_snapshot=True, readonly=True)
         cursor = connection.cursor(dictionary=True)
         
         results = []
         for query, params in queries_with_params:
             cursor.execute(query, params or ())
-            # Guardar lastrowid para INSERTs
-            if cursor.lastrowid:
-                results.append(cursor.lastrowid)
-            else:
-                results.append(cursor.rowcount)
+            results.append(cursor.fetchall())
         
-        connection.commit()
-        logger.info(f"✅ Transacción completada: {len(queries_with_params)} queries")
+        if uow_connection is None:
+            connection.commit()
+        logger.debug(f"✅ Lectura consistente completada: {len(queries_with_params)} queries")
         return results
         
     except Error as e:
-        if connection:
+        if connection and uow_connection is None:
             connection.rollback()
-        logger.error(f"❌ Error en transacción: {e}")
+        logger.error(f"❌ Error en lectura consistente: {e}")
         raise
         
     finally:
-        if connection:
-            connection.autocommit = True  # Restaurar autocommit
         if cursor:
             cursor.close()
-        if connection:
+        if connection and uow_connection is None:
             connection.close()
 
+def estimate_rows_from_explain(explain_rows):
+    """Filas estimadas por el optimizador a partir del resultado de un EXPLAIN de una tabla"""
+    if not explain_rows:
+        return 0
+    
+    plan = explain_rows[0]
+    rows = plan.get('rows') or 0
+    filtered = plan.get('filtered') or 100
+    
+    return int(rows * float(filtered) / 100)
+
 def get_db_info():
     try:
         connection = get_db_connection()
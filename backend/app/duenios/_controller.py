@@ -2,16 +2,30 @@ import logging
 from typing import Dict, Any, Optional, List
 from flask import request
 
-from ._model import DuenioModel
+from ._model import DuenioModel, MIN_PHONE_DIGITS, COLUMNAS_EXPORT
+from ..validators import normalize_phone
 from ..error_handlers import (
     create_success_response, 
+    create_cached_success_response, 
     create_error_response, 
     create_validation_error_response,
     safe_int_conversion
 )
+from ..database import StreamingNoDisponible
+from ..streaming import (
+    EXPORT_FORMATS, 
+    iniciar, 
+    create_export_response, 
+    create_streamed_list_response, 
+    create_streaming_unavailable_response
+)
 
 logger = logging.getLogger(__name__)
 
+COUNT_MODES = ['exact', 'estimate', 'none']
+
+SEARCH_MODES = ['auto', 'exacto', 'aproximado']
+
 
 class DuenioController:
     
@@ -20,7 +34,7 @@ class DuenioController:
         logger.debug("DuenioController inicializado")
     
     
-    def get_all(self, limit: Optional[int] = None, offset: int = 0) -> tuple:
+    def get_all(self, limit: Optional[int] = None, offset: int = 0, cursor: Optional[str] = None, count: str = 'exact') -> tuple:
         try:
             if limit is not None:
                 if limit <= 0 or limit > 100:
@@ -37,19 +51,68 @@ class DuenioController:
                     "Parámetro inválido"
                 )
             
-            duenios = self.duenio_model.get_all(limit=limit, offset=offset)
+            if cursor and offset > 0:
+                return create_error_response(
+                    "No se puede combinar 'cursor' con 'offset'", 
+                    400, 
+                    "Parámetro inválido"
+                )
             
-            total_count = self.duenio_model.get_count()
+            if count not in COUNT_MODES:
+                return create_error_response(
+                    f"count inválido. Debe ser uno de: {', '.join(COUNT_MODES)}", 
+                    400, 
+                    "Parámetro inválido"
+                )
+            
+            # Sin límite la lista se envía en streaming, sin armarla en memoria
+            if limit is None:
+                try:
+                    duenios = iniciar(self.duenio_model.iter_all(cursor=cursor))
+                except ValueError as e:
+                    return create_error_response(str(e), 400, "Parámetro inválido")
+                except StreamingNoDisponible:
+                    # Sin lugar para otra lectura en streaming la lista se arma
+                    # en memoria con una conexión del pool, como una página
+                    duenios = None
+                
+                if duenios is not None:
+                    def metadata(cantidad):
+                        # Se enviaron todas las filas: el total es exacto sin contarlas aparte
+                        return {
+                            'total': cantidad if count != 'none' else None,
+                            'total_estimado': False,
+                            'count': cantidad,
+                            'offset': offset
+                        }
+                    
+                    logger.info("Enviando todos los dueños en streaming")
+                    return create_streamed_list_response(
+                        'duenios', 
+                        duenios, 
+                        metadata, 
+                        "Dueños obtenidos correctamente"
+                    ), 200
+            
+            # Página y total en una sola conexión y snapshot
+            try:
+                page = self.duenio_model.get_page(limit=limit, offset=offset, cursor=cursor, count=count)
+            except ValueError as e:
+                return create_error_response(str(e), 400, "Parámetro inválido")
+            
+            duenios = page['duenios']
             
             metadata = {
-                'total': total_count,
+                'total': page['total'],
+                'total_estimado': count == 'estimate',
                 'count': len(duenios),
                 'offset': offset
             }
             
             if limit:
                 metadata['limit'] = limit
-                metadata['has_more'] = (offset + limit) < total_count
+                metadata['has_more'] = page['has_more']
+                metadata['next_cursor'] = page['next_cursor']
             
             logger.info(f"Retrieved {len(duenios)} dueños (offset: {offset}, limit: {limit})")
             
@@ -70,6 +133,33 @@ class DuenioController:
             )
     
     
+    def export(self, formato: str = 'ndjson') -> tuple:
+        try:
+            if formato not in EXPORT_FORMATS:
+                return create_error_response(
+                    f"Formato inválido. Debe ser uno de: {', '.join(EXPORT_FORMATS)}", 
+                    400, 
+                    "Parámetro inválido"
+                )
+            
+            # La consulta corre al leer la primera fila: si falla todavía es un 500
+            try:
+                duenios = iniciar(self.duenio_model.iter_all())
+            except StreamingNoDisponible:
+                return create_streaming_unavailable_response('dueños')
+            
+            logger.info(f"Exportando dueños en {formato}")
+            return create_export_response(duenios, formato, 'duenios', COLUMNAS_EXPORT), 200
+            
+        except Exception as e:
+            logger.error(f"Error en export: {e}")
+            return create_error_response(
+                "Error al exportar los dueños", 
+                500, 
+                "Error interno"
+            )
+    
+    
     def get_one(self, duenio_id: int) -> tuple:
         try:
             if not isinstance(duenio_id, int) or duenio_id <= 0:
@@ -104,15 +194,19 @@ class DuenioController:
             )
     
     
-    def create(self, data: Dict[str, Any]) -> tuple:
+    def create(self, data: Dict[str, Any], completo: bool = False) -> tuple:
         try:
             result = self.duenio_model.create(data)
             
             if result['success']:
                 logger.info(f"Created dueño ID: {result['duenio_id']}")
                 
+                duenio = result['data']
+                if completo:
+                    duenio = self.duenio_model.get_one(result['duenio_id'])
+                
                 return create_success_response(
-                    data={'duenio': result['data']},
+                    data={'duenio': duenio},
                     message="Dueño creado correctamente",
                     status_code=201
                 )
@@ -132,13 +226,14 @@ class DuenioController:
             )
     
     
-    def update(self, duenio_id: int, data: Dict[str, Any]) -> tuple:
+    def update(self, duenio_id: int, data: Dict[str, Any], completo: bool = False) -> tuple:
         """
         Actualiza un dueño existente
         
         Args:
             duenio_id: ID del dueño a actualizar
             data: Datos a actualizar
+            completo: Si es True devuelve la fila completa releída de la base
             
         Returns:
             tuple: (response_data, status_code)
@@ -166,8 +261,13 @@ class DuenioController:
             if result['success']:
                 logger.info(f"Updated dueño ID: {duenio_id}")
                 
+                # Por defecto solo los campos enviados
+                duenio = result['data']
+                if completo:
+                    duenio = self.duenio_model.get_one(duenio_id)
+                
                 return create_success_response(
-                    data={'duenio': result['data']},
+                    data={'duenio': duenio},
                     message="Dueño actualizado correctamente"
                 )
             else:
@@ -221,7 +321,7 @@ class DuenioController:
             )
     
     
-    def search(self, query: str, limit: int = 50) -> tuple:
+    def search(self, query: str, limit: int = 50, modo: str = 'auto') -> tuple:
         try:
             if not query or not query.strip():
                 return create_error_response(
@@ -242,7 +342,20 @@ class DuenioController:
             if limit <= 0 or limit > 100:
                 limit = 50  # Valor por defecto
             
-            duenios = self.duenio_model.search(query, limit)
+            if modo not in SEARCH_MODES:
+                return create_error_response(
+                    f"modo inválido. Debe ser uno de: {', '.join(SEARCH_MODES)}", 
+                    400, 
+                    "Parámetro inválido"
+                )
+            
+            # auto: búsqueda exacta en MySQL y, si no encuentra nada,
+            # aproximada (errores de tipeo, acentos) en el índice en memoria
+            duenios = []
+            if modo in ['auto', 'exacto']:
+                duenios = self.duenio_model.search(query, limit)
+            if modo == 'aproximado' or (modo == 'auto' and not duenios):
+                duenios = self.duenio_model.search_fuzzy(query, limit)
             
             logger.info(f"Search '{query}' returned {len(duenios)} results")
             
@@ -265,13 +378,79 @@ class DuenioController:
             )
     
     
-    def get_statistics(self) -> tuple:
+    def get_by_phone(self, telefono: str, limit: int = 10) -> tuple:
         try:
-            total_duenios = self.duenio_model.get_count()
+            digitos = normalize_phone(telefono)
             
-            stats = {
-                'total_duenios': total_duenios
-            }
+            if len(digitos) < MIN_PHONE_DIGITS:
+                return create_error_response(
+                    f"El teléfono debe tener al menos {MIN_PHONE_DIGITS} dígitos", 
+                    400, 
+                    "Parámetro inválido"
+                )
+            
+            if limit <= 0 or limit > 50:
+                limit = 10  # Valor por defecto
+            
+            result = self.duenio_model.get_by_phone(digitos, limit)
+            duenios = result['duenios']
+            
+            return create_success_response(
+                data={
+                    'duenios': duenios,
+                    'telefono': digitos,
+                    'coincidencia': result['coincidencia'],
+                    'count': len(duenios)
+                },
+                message=f"Búsqueda por teléfono: {len(duenios)} resultados"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error en get_by_phone: {e}")
+            return create_error_response(
+                "Error al buscar por teléfono", 
+                500, 
+                "Error interno"
+            )
+    
+    
+    def autocomplete(self, prefix: str, limit: int = 10) -> tuple:
+        try:
+            if not prefix or not prefix.strip():
+                return create_error_response(
+                    "El parámetro 'prefix' es requerido", 
+                    400, 
+                    "Parámetro faltante"
+                )
+            
+            if limit <= 0 or limit > 50:
+                limit = 10  # Valor por defecto
+            
+            prefix = prefix.strip()
+            duenios = self.duenio_model.autocomplete(prefix, limit)
+            
+            # Con ETag: un prefijo repetido sin cambios responde 304 sin cuerpo
+            return create_cached_success_response(
+                data={
+                    'duenios': duenios,
+                    'prefix': prefix,
+                    'count': len(duenios)
+                },
+                message=f"Autocompletado: {len(duenios)} resultados"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error en autocomplete: {e}")
+            return create_error_response(
+                "Error al autocompletar", 
+                500, 
+                "Error interno"
+            )
+    
+    
+    def get_statistics(self) -> tuple:
+        try:
+            stats = self.duenio_model.get_statistics()
             
             return create_success_response(
                 data={'statistics': stats},
@@ -0,0 +1,136 @@
+import logging
+import time
+from typing import Callable, Dict, Iterable, Any, Optional, Tuple
+
+from ..cache import CargaEnMemoria
+from ..database import on_commit
+
+logger = logging.getLogger(__name__)
+
+# Espera entre reintentos de carga fallidos: se duplica hasta el máximo
+REINTENTO_INICIAL = 5.0
+REINTENTO_MAXIMO = 300.0
+
+
+class DuenioIdSet(CargaEnMemoria):
+    """
+    Bitmap en memoria con los ids de dueños existentes: un bit por id, así
+    100.000 dueños ocupan unos 12 KB.
+    
+    Solo responde "seguro existe". Un id ausente puede ser un dueño creado
+    desde otro worker, así que el que consulta tiene que ir a la base; y como
+    la FK de turnos.id_duenio sigue siendo la garantía final, un bit viejo
+    (dueño borrado desde otro worker) termina en el error 1452 de siempre.
+    """
+    
+    descripcion = 'el conjunto de ids de dueños'
+    
+    def __init__(self):
+        super().__init__()
+        self._bits = bytearray()
+        self._count = 0
+        self._espera = REINTENTO_INICIAL
+        self._proximo_intento = 0.0
+        self._loader: Optional[Callable[[], Iterable[int]]] = None
+    
+    
+    def warm_up(self, loader: Callable[[], Iterable[int]]) -> None:
+        """
+        Carga al iniciar la app. Si falla, las consultas van a la base y
+        contains_or_load reintenta con el mismo loader.
+        """
+        self._loader = loader
+        super().warm_up(loader)
+    
+    
+    def contains_or_load(self, duenio_id: int, buscar: Callable[[int], Any]) -> Tuple[bool, Any]:
+        """
+        Existencia de un dueño para las validaciones de turnos y de la lista
+        de espera. Responde el bitmap si lo conoce; si no, buscar(duenio_id)
+        en la base, y un dueño encontrado se agrega al bitmap al confirmar.
+        Devuelve (existe, lo que devolvió buscar, o None si respondió el bitmap).
+        """
+        self.retry_build()
+        if self.contains(duenio_id):
+            return True, None
+        
+        encontrado = buscar(duenio_id)
+        if encontrado:
+            # Recién al confirmar: la fila puede ser de esta misma transacción
+            on_commit(lambda: self.add(duenio_id))
+        return bool(encontrado), encontrado
+    
+    
+    def retry_build(self) -> None:
+        """
+        Vuelve a intentar la carga si falló antes (ej. la base no estaba al
+        iniciar), con espera creciente entre intentos. Sin costo una vez cargado.
+        """
+        if self._built or self._building or self._loader is None or time.monotonic() < self._proximo_intento:
+            return
+        try:
+            self.ensure_built(self._loader)
+        except Exception as e:
+            espera = self._proximo_intento - time.monotonic()
+            logger.warning(f"⚠️ Reintento de carga de ids de dueños fallido (próximo en {espera:.0f}s): {e}")
+    
+    
+    def contains(self, duenio_id: int) -> bool:
+        """True si el dueño seguro existe; False significa "no se sabe" """
+        byte = duenio_id >> 3
+        # Leer un byte no necesita lock: en el peor caso se ve el valor anterior
+        bits = self._bits
+        return 0 <= byte < len(bits) and bool(bits[byte] & (1 << (duenio_id & 7)))
+    
+    
+    def add(self, duenio_id: int) -> None:
+        self._apply(self._set, duenio_id)
+    
+    
+    def discard(self, duenio_id: int) -> None:
+        self._apply(self._unset, duenio_id)
+    
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'built': self._built,
+            'ids': self._count,
+            'bytes': len(self._bits)
+        }
+    
+    
+    def _cargar(self, ids: Iterable[int]) -> None:
+        ids = list(ids)
+        self._bits = bytearray((max(ids) >> 3) + 1 if ids else 0)
+        self._count = 0
+        for duenio_id in ids:
+            self._set(duenio_id)
+        logger.info(f"Conjunto de ids de dueños cargado: {self._count} ids")
+    
+    
+    def _carga_fallida(self) -> None:
+        self._proximo_intento = time.monotonic() + self._espera
+        self._espera = min(self._espera * 2, REINTENTO_MAXIMO)
+    
+    
+    def _set(self, duenio_id: int) -> None:
+        if duenio_id <= 0:
+            return
+        byte, mask = duenio_id >> 3, 1 << (duenio_id & 7)
+        if byte >= len(self._bits):
+            # Crece de a bloques para no copiar el bitmap en cada alta
+            self._bits.extend(bytes(max(byte + 1 - len(self._bits), 1024)))
+        if not self._bits[byte] & mask:
+            self._bits[byte] |= mask
+            self._count += 1
+    
+    
+    def _unset(self, duenio_id: int) -> None:
+        byte, mask = duenio_id >> 3, 1 << (duenio_id & 7)
+        if 0 <= byte < len(self._bits) and self._bits[byte] & mask:
+            self._bits[byte] &= ~mask
+            self._count -= 1
+
+
+# Instancia única del proceso, compartida por los modelos de dueños y turnos
+duenio_ids = DuenioIdSet()
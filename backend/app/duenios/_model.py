@@ -1,13 +1,62 @@
 import logging
-from typing import List, Dict, Optional, Any
+import os
+import re
+from typing import Callable, Iterator, List, Dict, Optional, Any, Tuple
 from datetime import datetime
 from mysql.connector import Error as MySQLError
 
-from ..database import get_db_connection, execute_query, execute_transaction
-from ..validators import validate_duenio_data
+from ..database import StreamingNoDisponible, get_db_connection, execute_query, execute_query_iter, execute_transaction, execute_read_batch, estimate_rows_from_explain, on_commit
+from ..validators import validate_duenio_data, normalize_phone
+from ..pagination import encode_cursor, decode_cursor
+from ..counters import (
+    counter_delta_query,
+    turnos_delta_query,
+    duenios_delta_query,
+    read_counters,
+    METRICA_DUENIOS_TOTAL
+)
+from ..cache import LRUCache
+from ._ids import duenio_ids
+from ._search import duenio_search_index
 
 logger = logging.getLogger(__name__)
 
+# Largo mínimo del término para usar el índice FULLTEXT (ngram_token_size = 2)
+MIN_FULLTEXT_LENGTH = 3
+
+# Dígitos mínimos para buscar por teléfono (por sufijo, un número muy corto
+# coincide con demasiados dueños)
+MIN_PHONE_DIGITS = 6
+PHONE_LIKE = re.compile(r'^[0-9+\-\s\(\)]+$')
+
+# Columnas del CSV de exportación (las de _serialize_duenio): el encabezado
+# se escribe aunque no haya filas
+COLUMNAS_EXPORT = ['id', 'nombre_apellido', 'telefono', 'email', 'direccion', 'created_at', 'updated_at']
+
+# Cache de get_one/exists: los dueños cambian poco y se consultan en cada turno
+duenio_cache = LRUCache(
+    'duenios',
+    maxsize=int(os.getenv('DUENIO_CACHE_SIZE', 2048)),
+    ttl=float(os.getenv('DUENIO_CACHE_TTL', 300))
+)
+
+# Un "no existe" vence enseguida: el dueño puede crearse desde otro worker
+# (o justo después de la consulta) y no debe rechazarse por minutos
+DUENIO_CACHE_NEGATIVE_TTL = float(os.getenv('DUENIO_CACHE_NEGATIVE_TTL', 5))
+
+# Módulos que guardan copias de datos de dueños (la agenda de turnos) se
+# suscriben acá; se les avisa después del commit con (accion, id, campos)
+_duenio_listeners: List[Callable[[str, int, Optional[Dict[str, Any]]], None]] = []
+
+
+def on_duenio_change(listener: Callable[[str, int, Optional[Dict[str, Any]]], None]) -> None:
+    _duenio_listeners.append(listener)
+
+
+def _notify_duenio_change(accion: str, duenio_id: int, campos: Optional[Dict[str, Any]] = None) -> None:
+    for listener in _duenio_listeners:
+        listener(accion, duenio_id, campos)
+
 
 class DuenioModel:
     
@@ -16,20 +65,12 @@ class DuenioModel:
         logger.debug("DuenioModel inicializado")
     
     
-    def get_all(self, limit: int = None, offset: int = 0) -> List[Dict[str, Any]]:
+    def get_all(self, limit: int = None, offset: int = 0, cursor: str = None) -> List[Dict[str, Any]]:
+        # El cursor se valida antes de tocar la base (ValueError si es inválido)
+        posicion = self._decode_cursor(cursor) if cursor else None
+        
         try:
-            query = f"""
-                SELECT id, nombre_apellido, telefono, email, direccion, 
-                       created_at, updated_at
-                FROM {self.table_name}
-                ORDER BY nombre_apellido ASC
-            """
-            
-            params = ()
-            
-            if limit is not None:
-                query += " LIMIT %s OFFSET %s"
-                params = (limit, offset)
+            query, params = self._build_list_query(limit, offset, posicion)
             
             result = execute_query(query, params, fetch=True)
             
@@ -46,8 +87,110 @@ class DuenioModel:
             raise
     
     
+    def iter_all(self, cursor: str = None) -> Iterator[Dict[str, Any]]:
+        """Todos los dueños en el orden de get_all, leídos del cursor sin buffer de a uno"""
+        # Se valida al pedir la primera fila (ValueError si es inválido)
+        posicion = self._decode_cursor(cursor) if cursor else None
+        
+        try:
+            query, params = self._build_list_query(None, 0, posicion)
+            
+            for row in execute_query_iter(query, params):
+                yield self._serialize_duenio(row)
+            
+        except StreamingNoDisponible:
+            # No es un error: el llamador responde de otra forma (503 o en memoria)
+            raise
+        except MySQLError as e:
+            logger.error(f"MySQL error en iter_all: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en iter_all: {e}")
+            raise
+    
+    
+    def get_page(self, limit: int = None, offset: int = 0, cursor: str = None, count: str = 'exact') -> Dict[str, Any]:
+        """
+        Página de dueños y su total leídos en una misma transacción de solo lectura.
+        count: 'exact' (COUNT(*)), 'estimate' (estimación del optimizador) o 'none'.
+        """
+        # El cursor se valida antes de tocar la base (ValueError si es inválido)
+        posicion = self._decode_cursor(cursor) if cursor else None
+        
+        try:
+            # Se pide una fila extra para saber si hay más sin depender del total
+            limite_consulta = limit + 1 if limit is not None else None
+            queries = [self._build_list_query(limite_consulta, offset, posicion)]
+            
+            if count == 'exact':
+                queries.append((f"SELECT COUNT(*) AS total FROM {self.table_name}", None))
+            elif count == 'estimate':
+                queries.append((f"EXPLAIN SELECT 1 FROM {self.table_name}", None))
+            
+            results = execute_read_batch(queries)
+            
+            rows = results[0]
+            has_more = limit is not None and len(rows) > limit
+            if has_more:
+                rows = rows[:limit]
+            
+            duenios = [self._serialize_duenio(row) for row in rows]
+            
+            total = None
+            if count == 'exact':
+                total = results[1][0]['total'] if results[1] else 0
+            elif count == 'estimate':
+                total = estimate_rows_from_explain(results[1])
+            
+            logger.info(f"Retrieved page of {len(duenios)} dueños (count: {count})")
+            return {
+                'duenios': duenios,
+                'total': total,
+                'has_more': has_more,
+                'next_cursor': self.next_cursor(duenios, limit) if has_more else None
+            }
+            
+        except MySQLError as e:
+            logger.error(f"MySQL error en get_page: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en get_page: {e}")
+            raise
+    
+    
+    def _build_list_query(self, limit: Optional[int], offset: int, posicion: Optional[List[Any]]) -> Tuple[str, tuple]:
+        query = f"""
+            SELECT id, nombre_apellido, telefono, email, direccion, 
+                   created_at, updated_at
+            FROM {self.table_name}
+        """
+        
+        params = []
+        
+        # Paginación por clave: continuar después de (nombre_apellido, id) del cursor
+        if posicion:
+            query += " WHERE nombre_apellido > %s OR (nombre_apellido = %s AND id > %s)"
+            params.extend([posicion[0], posicion[0], posicion[1]])
+        
+        query += " ORDER BY nombre_apellido ASC, id ASC"
+        
+        if limit is not None:
+            if posicion:
+                query += " LIMIT %s"
+                params.append(limit)
+            else:
+                query += " LIMIT %s OFFSET %s"
+                params.extend([limit, offset])
+        
+        return query, tuple(params)
+    
+    
     def get_one(self, duenio_id: int) -> Optional[Dict[str, Any]]:
         try:
+            encontrado, duenio = duenio_cache.get(('duenio', duenio_id))
+            if encontrado:
+                return dict(duenio) if duenio else None
+            
             query = f"""
                 SELECT id, nombre_apellido, telefono, email, direccion,
                        created_at, updated_at
@@ -59,11 +202,13 @@ class DuenioModel:
             
             if not result:
                 logger.debug(f"No dueño found with ID {duenio_id}")
+                duenio_cache.set(('duenio', duenio_id), None, ttl=DUENIO_CACHE_NEGATIVE_TTL)
                 return None
 
             duenio = self._serialize_duenio(result)
+            duenio_cache.set(('duenio', duenio_id), duenio)
             logger.debug(f"Found dueño with ID {duenio_id}")
-            return duenio
+            return dict(duenio)
                 
         except MySQLError as e:
             logger.error(f"MySQL error en get_one: {e}")
@@ -73,6 +218,48 @@ class DuenioModel:
             raise
     
     
+    def get_ids(self) -> List[int]:
+        """Todos los ids de dueños, para cargar el bitmap de existencia"""
+        try:
+            query = f"SELECT id FROM {self.table_name}"
+            result = execute_query(query, fetch=True) or []
+            return [row['id'] for row in result]
+                
+        except MySQLError as e:
+            logger.error(f"MySQL error en get_ids: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en get_ids: {e}")
+            raise
+    
+    
+    def get_many(self, duenio_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Varios dueños en una sola consulta, indexados por id. Los inexistentes no aparecen."""
+        try:
+            ids = list(dict.fromkeys(duenio_ids))
+            if not ids:
+                return {}
+            
+            placeholders = ", ".join(["%s"] * len(ids))
+            query = f"""
+                SELECT id, nombre_apellido, telefono, email, direccion,
+                       created_at, updated_at
+                FROM {self.table_name}
+                WHERE id IN ({placeholders})
+            """
+            
+            result = execute_query(query, tuple(ids), fetch=True) or []
+            
+            return {row['id']: self._serialize_duenio(row) for row in result}
+                
+        except MySQLError as e:
+            logger.error(f"MySQL error en get_many: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en get_many: {e}")
+            raise
+    
+    
     def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
         try:
             validation_result = validate_duenio_data(data)
@@ -86,23 +273,41 @@ class DuenioModel:
             
             query = f"""
                 INSERT INTO {self.table_name} 
-                (nombre_apellido, telefono, email, direccion)
-                VALUES (%s, %s, %s, %s)
+                (nombre_apellido, telefono, email, direccion, telefono_digitos)
+                VALUES (%s, %s, %s, %s, %s)
             """
             
             params = (
                 data['nombre_apellido'].strip(),
                 data['telefono'].strip(),
                 data['email'].strip().lower(),
-                data['direccion'].strip()
+                data['direccion'].strip(),
+                normalize_phone(data['telefono'])
             )
             
-            duenio_id = execute_query(query, params)
+            results = execute_transaction([
+                (query, params),
+                counter_delta_query({METRICA_DUENIOS_TOTAL: 1})
+            ])
+            duenio_id = results[0]
             
             if duenio_id:
                 logger.info(f"Created new dueño with ID: {duenio_id}")
                 
-                new_duenio = self.get_one(duenio_id)
+                # Respuesta armada con los datos enviados, sin volver a leer la fila
+                ahora = datetime.now().replace(microsecond=0)
+                new_duenio = self._serialize_duenio({
+                    'id': duenio_id,
+                    'nombre_apellido': params[0],
+                    'telefono': params[1],
+                    'email': params[2],
+                    'direccion': params[3],
+                    'created_at': ahora,
+                    'updated_at': ahora
+                })
+                self._invalidate_cache(duenio_id)
+                on_commit(lambda: duenio_search_index.add(new_duenio))
+                on_commit(lambda: duenio_ids.add(duenio_id))
                 
                 return {
                     'success': True,
@@ -134,13 +339,6 @@ class DuenioModel:
     
     def update(self, duenio_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            existing_duenio = self.get_one(duenio_id)
-            if not existing_duenio:
-                return {
-                    'success': False,
-                    'errors': [f'No existe un dueño con ID: {duenio_id}']
-                }
-            
             if data:
                 validation_result = validate_duenio_data(data)
                 if not validation_result['is_valid']:
@@ -169,6 +367,11 @@ class DuenioModel:
                     'errors': ['No hay campos para actualizar']
                 }
             
+            # La columna normalizada acompaña siempre al teléfono
+            if 'telefono' in data:
+                update_fields.append("telefono_digitos = %s")
+                params.append(normalize_phone(data['telefono']))
+            
             params.append(duenio_id)
             
             query = f"""
@@ -177,12 +380,20 @@ class DuenioModel:
                 WHERE id = %s
             """
             
+            # rowcount cuenta filas encontradas: 0 significa que el dueño no existe
             rows_affected = execute_query(query, tuple(params))
             
             if rows_affected > 0:
                 logger.info(f"Updated dueño ID: {duenio_id}")
                 
-                updated_duenio = self.get_one(duenio_id)
+                # Solo los campos enviados; la fila completa se pide con ?completo=true
+                updated_duenio = {'id': duenio_id}
+                for field, value in zip([f for f in allowed_fields if f in data], params):
+                    updated_duenio[field] = value
+                updated_duenio['updated_at'] = datetime.now().replace(microsecond=0).isoformat()
+                self._invalidate_cache(duenio_id)
+                on_commit(lambda: duenio_search_index.update(duenio_id, updated_duenio))
+                on_commit(lambda: _notify_duenio_change('actualizado', duenio_id, updated_duenio))
                 
                 return {
                     'success': True,
@@ -191,7 +402,7 @@ class DuenioModel:
             else:
                 return {
                     'success': False,
-                    'errors': ['No se pudo actualizar el dueño']
+                    'errors': [f'No existe un dueño con ID: {duenio_id}']
                 }
                 
         except MySQLError as e:
@@ -212,18 +423,25 @@ class DuenioModel:
     
     def delete(self, duenio_id: int) -> Dict[str, Any]:
         try:
-            existing_duenio = self.get_one(duenio_id)
-            if not existing_duenio:
-                return {
-                    'success': False,
-                    'errors': [f'No existe un dueño con ID: {duenio_id}']
-                }
-            
+            # El CASCADE borra sus turnos: descontarlos de los contadores antes del DELETE.
+            # Mismo orden de metrica que el resto de las escrituras (duenios:* < turnos:*)
             query = f"DELETE FROM {self.table_name} WHERE id = %s"
-            rows_affected = execute_query(query, (duenio_id,))
+            results = execute_transaction([
+                duenios_delta_query("id = %s", (duenio_id,), -1),
+                turnos_delta_query("id_duenio = %s", (duenio_id,), -1),
+                (query, (duenio_id,))
+            ])
+            rows_affected = results[2]
             
             if rows_affected > 0:
                 logger.info(f"Deleted dueño ID: {duenio_id} and associated turnos")
+                # Se saca ya (un rollback solo lo vuelve "desconocido") y otra vez
+                # al confirmar, por si otra request lo re-agregó mientras tanto
+                duenio_ids.discard(duenio_id)
+                self._invalidate_cache(duenio_id)
+                on_commit(lambda: duenio_search_index.remove(duenio_id))
+                on_commit(lambda: _notify_duenio_change('eliminado', duenio_id))
+                on_commit(lambda: duenio_ids.discard(duenio_id))
                 return {
                     'success': True,
                     'message': f'Dueño eliminado correctamente (y sus turnos asociados)'
@@ -231,7 +449,7 @@ class DuenioModel:
             else:
                 return {
                     'success': False,
-                    'errors': ['No se pudo eliminar el dueño']
+                    'errors': [f'No existe un dueño con ID: {duenio_id}']
                 }
                 
         except MySQLError as e:
@@ -248,39 +466,181 @@ class DuenioModel:
                 logger.warning("Empty search query provided")
                 return []
             
-            search_term = f"%{query.strip()}%"
+            termino = query.strip()
+            
+            # Algo que parece un teléfono se busca por la columna normalizada
+            if PHONE_LIKE.match(termino) and len(normalize_phone(termino)) >= MIN_PHONE_DIGITS:
+                return self.get_by_phone(normalize_phone(termino), limit)['duenios']
+            
+            # Términos muy cortos generan demasiados ngrams: se resuelven con LIKE
+            expresion = self._fulltext_expression(termino)
+            if len(termino) >= MIN_FULLTEXT_LENGTH and expresion:
+                try:
+                    duenios = self._search_fulltext(expresion, limit)
+                    logger.info(f"Search '{query}' returned {len(duenios)} results (fulltext)")
+                    return duenios
+                except MySQLError as e:
+                    if e.errno != 1191:  # Can't find FULLTEXT index: migración 0004 pendiente
+                        raise
+                    logger.warning("Índice FULLTEXT de duenios no encontrado, usando LIKE")
+            
+            duenios = self._search_like(termino, limit)
+            logger.info(f"Search '{query}' returned {len(duenios)} results")
+            return duenios
+            
+        except MySQLError as e:
+            logger.error(f"MySQL error en search: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en search: {e}")
+            raise
+    
+    
+    def search_fuzzy(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Búsqueda aproximada en el índice de trigramas en memoria, sin consultar MySQL"""
+        try:
+            # Solo la primera vez (o si falló al iniciar) se carga desde la base
+            duenio_search_index.ensure_built(self.get_all)
             
-            sql_query = f"""
+            duenios = duenio_search_index.search(query, limit)
+            
+            logger.info(f"Fuzzy search '{query}' returned {len(duenios)} results")
+            return duenios
+            
+        except MySQLError as e:
+            logger.error(f"MySQL error en search_fuzzy: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en search_fuzzy: {e}")
+            raise
+    
+    
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """(id, nombre_apellido) de los dueños cuyo nombre tiene palabras con ese prefijo"""
+        try:
+            duenio_search_index.ensure_built(self.get_all)
+            return duenio_search_index.autocomplete(prefix, limit)
+            
+        except MySQLError as e:
+            logger.error(f"MySQL error en autocomplete: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en autocomplete: {e}")
+            raise
+    
+    
+    def _fulltext_expression(self, termino: str) -> str:
+        # Cada palabra como frase obligatoria: con el parser ngram equivale a
+        # buscar el fragmento dentro del nombre o el email. Las palabras de una
+        # letra no forman ningún ngram y se descartan.
+        palabras = [p.replace('"', '') for p in termino.split()]
+        return " ".join(f'+"{p}"' for p in palabras if len(p) >= 2)
+    
+    
+    def _search_fulltext(self, expresion: str, limit: int) -> List[Dict[str, Any]]:
+        sql_query = f"""
+            SELECT id, nombre_apellido, telefono, email, direccion,
+                   created_at, updated_at,
+                   MATCH(nombre_apellido, email) AGAINST (%s IN BOOLEAN MODE) AS relevancia
+            FROM {self.table_name}
+            WHERE MATCH(nombre_apellido, email) AGAINST (%s IN BOOLEAN MODE)
+            ORDER BY relevancia DESC, nombre_apellido ASC
+            LIMIT %s
+        """
+        
+        result = execute_query(sql_query, (expresion, expresion, limit), fetch=True)
+        return [self._serialize_duenio(row) for row in result] if result else []
+    
+    
+    def _search_like(self, termino: str, limit: int) -> List[Dict[str, Any]]:
+        search_term = f"%{termino}%"
+        
+        sql_query = f"""
+            SELECT id, nombre_apellido, telefono, email, direccion,
+                   created_at, updated_at
+            FROM {self.table_name}
+            WHERE nombre_apellido LIKE %s 
+               OR email LIKE %s
+            ORDER BY nombre_apellido ASC
+            LIMIT %s
+        """
+        
+        result = execute_query(sql_query, (search_term, search_term, limit), fetch=True)
+        return [self._serialize_duenio(row) for row in result] if result else []
+    
+    
+    def get_by_phone(self, digitos: str, limit: int = 10) -> Dict[str, Any]:
+        """
+        Dueños por teléfono normalizado: primero coincidencia exacta (lectura
+        puntual del índice) y, si no hay, por sufijo usando el índice del reverso.
+        """
+        try:
+            select = f"""
                 SELECT id, nombre_apellido, telefono, email, direccion,
                        created_at, updated_at
                 FROM {self.table_name}
-                WHERE nombre_apellido LIKE %s 
-                   OR email LIKE %s
-                ORDER BY nombre_apellido ASC
-                LIMIT %s
             """
             
-            result = execute_query(sql_query, (search_term, search_term, limit), fetch=True)
+            result = execute_query(
+                f"{select} WHERE telefono_digitos = %s ORDER BY id LIMIT %s",
+                (digitos, limit),
+                fetch=True
+            )
+            coincidencia = 'exacta'
+            
+            if not result:
+                # "LIKE 'x%'" sobre el reverso = sufijo del número, como rango de índice
+                result = execute_query(
+                    f"{select} WHERE telefono_digitos_rev LIKE %s ORDER BY telefono_digitos_rev LIMIT %s",
+                    (digitos[::-1] + '%', limit),
+                    fetch=True
+                )
+                coincidencia = 'sufijo'
             
-            # Serializar resultados
             duenios = [self._serialize_duenio(row) for row in result] if result else []
             
-            logger.info(f"Search '{query}' returned {len(duenios)} results")
-            return duenios
+            logger.info(f"Phone lookup '{digitos}' returned {len(duenios)} results ({coincidencia})")
+            return {
+                'duenios': duenios,
+                'coincidencia': coincidencia if duenios else None
+            }
             
         except MySQLError as e:
-            logger.error(f"MySQL error en search: {e}")
+            logger.error(f"MySQL error en get_by_phone: {e}")
             raise
         except Exception as e:
-            logger.error(f"Unexpected error en search: {e}")
+            logger.error(f"Unexpected error en get_by_phone: {e}")
             raise
     
     
     def exists(self, duenio_id: int) -> bool:
+        # El bitmap de ids responde sin consultar cuando el dueño seguro existe
+        existe, _ = duenio_ids.contains_or_load(duenio_id, self._existe_en_base)
+        return existe
+    
+    
+    def get_cached(self, duenio_id: int) -> Optional[Dict[str, Any]]:
+        """El dueño si está en el cache de get_one, sin consultar la base"""
+        encontrado, duenio = duenio_cache.get(('duenio', duenio_id))
+        return dict(duenio) if encontrado and duenio else None
+    
+    
+    def _existe_en_base(self, duenio_id: int) -> bool:
         try:
+            # Si el dueño completo está en cache alcanza con eso
+            encontrado, duenio = duenio_cache.get(('duenio', duenio_id))
+            if encontrado:
+                return duenio is not None
+            
+            encontrado, existe = duenio_cache.get(('exists', duenio_id))
+            if encontrado:
+                return existe
+            
             query = f"SELECT 1 FROM {self.table_name} WHERE id = %s LIMIT 1"
             result = execute_query(query, (duenio_id,), fetch_one=True)
-            return result is not None
+            existe = result is not None
+            duenio_cache.set(('exists', duenio_id), existe, ttl=None if existe else DUENIO_CACHE_NEGATIVE_TTL)
+            return existe
             
         except MySQLError as e:
             logger.error(f"MySQL error en exists: {e}")
@@ -304,6 +664,47 @@ class DuenioModel:
             raise
     
     
+    def get_statistics(self) -> Dict[str, Any]:
+        try:
+            valores = read_counters([METRICA_DUENIOS_TOTAL])
+            return {
+                'total_duenios': valores[METRICA_DUENIOS_TOTAL]
+            }
+            
+        except MySQLError as e:
+            logger.error(f"MySQL error en get_statistics: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en get_statistics: {e}")
+            raise
+    
+    
+    def next_cursor(self, duenios: List[Dict[str, Any]], limit: Optional[int]) -> Optional[str]:
+        # Solo hay página siguiente posible si la actual vino completa
+        if limit is None or len(duenios) < limit:
+            return None
+        
+        ultimo = duenios[-1]
+        return encode_cursor([ultimo['nombre_apellido'], ultimo['id']])
+    
+    
+    def _decode_cursor(self, cursor: str) -> List[Any]:
+        nombre_apellido, duenio_id = decode_cursor(cursor, 2)
+        
+        if not isinstance(nombre_apellido, str) or not isinstance(duenio_id, int):
+            raise ValueError("Cursor inválido")
+        
+        return [nombre_apellido, duenio_id]
+    
+    
+    def _invalidate_cache(self, duenio_id: int) -> None:
+        # Ya mismo, para esta request, y de nuevo al confirmar: otra request
+        # pudo volver a cachear el valor viejo antes del commit
+        claves = [('duenio', duenio_id), ('exists', duenio_id)]
+        duenio_cache.invalidate(*claves)
+        on_commit(lambda: duenio_cache.invalidate(*claves))
+    
+    
     def _serialize_duenio(self, row: Dict[str, Any]) -> Dict[str, Any]:
         if not row:
             return {}
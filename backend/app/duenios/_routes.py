@@ -27,6 +27,8 @@ def get_all_duenios():
     try:
         limit_param = request.args.get('limit')
         offset_param = request.args.get('offset', '0')
+        cursor = request.args.get('cursor')
+        count = request.args.get('count', 'exact')
         
         limit = None
         if limit_param:
@@ -38,7 +40,7 @@ def get_all_duenios():
         if error:
             return create_error_response(error, 400, "Parámetro inválido")
         
-        response_data, status_code = duenios_controller.get_all(limit=limit, offset=offset)
+        response_data, status_code = duenios_controller.get_all(limit=limit, offset=offset, cursor=cursor, count=count)
         return response_data, status_code
         
     except Exception as e:
@@ -50,6 +52,24 @@ def get_all_duenios():
         )
 
 
+@duenios_bp.route('/duenios/export', methods=['GET'])
+def export_duenios():
+    try:
+        # ?format=ndjson|csv
+        response_data, status_code = duenios_controller.export(
+            formato=request.args.get('format', 'ndjson')
+        )
+        return response_data, status_code
+        
+    except Exception as e:
+        logger.error(f"Error en export_duenios route: {e}")
+        return create_error_response(
+            "Error interno del servidor", 
+            500, 
+            "Error interno"
+        )
+
+
 @duenios_bp.route('/duenios/<int:duenio_id>', methods=['GET'])
 def get_duenio(duenio_id):
     try:
@@ -73,7 +93,8 @@ def create_duenio():
         if error_response:
             return error_response
         
-        response_data, status_code = duenios_controller.create(json_data)
+        completo = request.args.get('completo', 'false').lower() == 'true'
+        response_data, status_code = duenios_controller.create(json_data, completo=completo)
         return response_data, status_code
         
     except Exception as e:
@@ -92,7 +113,8 @@ def update_duenio(duenio_id):
         if error_response:
             return error_response
         
-        response_data, status_code = duenios_controller.update(duenio_id, json_data)
+        completo = request.args.get('completo', 'false').lower() == 'true'
+        response_data, status_code = duenios_controller.update(duenio_id, json_data, completo=completo)
         return response_data, status_code
         
     except Exception as e:
@@ -128,6 +150,7 @@ def search_duenios():
     try:
         query = request.args.get('q', '').strip()
         limit_param = request.args.get('limit', '50')
+        modo = request.args.get('modo', 'auto')
         
         if not query:
             return create_error_response(
@@ -140,7 +163,7 @@ def search_duenios():
         if error:
             limit = 50  # Valor por defecto si hay error
         
-        response_data, status_code = duenios_controller.search(query, limit)
+        response_data, status_code = duenios_controller.search(query, limit, modo)
         return response_data, status_code
         
     except Exception as e:
@@ -152,6 +175,49 @@ def search_duenios():
         )
 
 
+@duenios_bp.route('/duenios/by-phone/<telefono>', methods=['GET'])
+def get_duenios_by_phone(telefono):
+    try:
+        limit_param = request.args.get('limit', '10')
+        
+        limit, error = safe_int_conversion(limit_param, 'limit')
+        if error:
+            limit = 10  # Valor por defecto si hay error
+        
+        response_data, status_code = duenios_controller.get_by_phone(telefono, limit)
+        return response_data, status_code
+        
+    except Exception as e:
+        logger.error(f"Error en get_duenios_by_phone route: {e}")
+        return create_error_response(
+            "Error interno del servidor", 
+            500, 
+            "Error interno"
+        )
+
+
+@duenios_bp.route('/duenios/autocomplete', methods=['GET'])
+def autocomplete_duenios():
+    try:
+        prefix = request.args.get('prefix', '')
+        limit_param = request.args.get('limit', '10')
+        
+        limit, error = safe_int_conversion(limit_param, 'limit')
+        if error:
+            limit = 10  # Valor por defecto si hay error
+        
+        response_data, status_code = duenios_controller.autocomplete(prefix, limit)
+        return response_data, status_code
+        
+    except Exception as e:
+        logger.error(f"Error en autocomplete_duenios route: {e}")
+        return create_error_response(
+            "Error interno del servidor", 
+            500, 
+            "Error interno"
+        )
+
+
 @duenios_bp.route('/duenios/statistics', methods=['GET'])
 def get_duenios_statistics():
     try:
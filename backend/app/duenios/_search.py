@@ -0,0 +1,232 @@
+import bisect
+import logging
+import math
+import re
+import unicodedata
+from typing import Any, Dict, List, Set, Tuple
+
+from ..cache import CargaEnMemoria
+from ..validators import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(texto: str) -> str:
+    # Minúsculas, sin acentos y solo letras/dígitos: "González, Ana" -> "gonzalez ana"
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', sin_acentos.lower()).split())
+
+
+def text_trigrams(texto: str) -> Set[str]:
+    # Trigramas por palabra, con bordes: "ana" -> {"  a", " an", "ana", "na "}
+    grams = set()
+    for palabra in normalize_text(texto).split():
+        padded = f"  {palabra} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def phone_trigrams(telefono: str) -> Set[str]:
+    # Sin bordes: un fragmento del número coincide en cualquier posición
+    digitos = normalize_phone(telefono)
+    return {digitos[i:i + 3] for i in range(len(digitos) - 2)}
+
+
+class DuenioSearchIndex(CargaEnMemoria):
+    """
+    Índice de trigramas en memoria sobre nombre_apellido, email y telefono
+    (normalizado) para búsquedas aproximadas e insensibles a acentos, más un
+    array ordenado de las palabras de cada nombre para autocompletar por prefijo.
+    
+    Es local al proceso: se construye una vez desde la base y el modelo lo
+    mantiene al día después de cada commit. Con varios workers cada uno
+    tiene su propia copia y solo ve las escrituras hechas en él.
+    """
+    
+    descripcion = 'el índice de búsqueda de dueños'
+    
+    def __init__(self, min_similitud: float = 0.5):
+        super().__init__()
+        self.min_similitud = min_similitud
+        self._duenios: Dict[int, Dict[str, Any]] = {}
+        self._grams_texto: Dict[int, Set[str]] = {}
+        self._grams_telefono: Dict[int, Set[str]] = {}
+        self._texto: Dict[str, Set[int]] = {}
+        self._telefono: Dict[str, Set[int]] = {}
+        # (palabra normalizada, nombre normalizado, id), ordenado para bisect
+        self._palabras: List[Tuple[str, str, int]] = []
+    
+    
+    def add(self, duenio: Dict[str, Any]) -> None:
+        self._apply(self._add, duenio)
+    
+    
+    def update(self, duenio_id: int, campos: Dict[str, Any]) -> None:
+        self._apply(self._update, duenio_id, campos)
+    
+    
+    def remove(self, duenio_id: int) -> None:
+        self._apply(self._remove, duenio_id)
+    
+    
+    def search(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Dueños ordenados por similitud (fracción de trigramas de la búsqueda encontrados)"""
+        grams_texto = text_trigrams(query)
+        grams_telefono = phone_trigrams(query)
+        
+        with self._lock:
+            puntajes = {}
+            
+            # En el teléfono no hay errores de tipeo que tolerar: el fragmento
+            # de dígitos tiene que aparecer completo
+            for grams, postings, grams_por_duenio, min_similitud in (
+                (grams_texto, self._texto, self._grams_texto, self.min_similitud),
+                (grams_telefono, self._telefono, self._grams_telefono, 1.0)
+            ):
+                if not grams:
+                    continue
+                
+                # Para llegar a la similitud mínima un dueño tiene que compartir
+                # `necesarios` trigramas, así que seguro contiene alguno de los
+                # len(grams) - necesarios + 1 más raros: solo esos generan candidatos
+                necesarios = max(1, math.ceil(min_similitud * len(grams)))
+                mas_raros = sorted(grams, key=lambda gram: len(postings.get(gram, ())))
+                candidatos = set()
+                for gram in mas_raros[:len(grams) - necesarios + 1]:
+                    candidatos.update(postings.get(gram, ()))
+                
+                for duenio_id in candidatos:
+                    grams_duenio = grams_por_duenio[duenio_id]
+                    compartidos = len(grams & grams_duenio)
+                    similitud = compartidos / len(grams)
+                    if similitud >= min_similitud and similitud > puntajes.get(duenio_id, (0,))[0]:
+                        # Desempate: menos trigramas sobrantes = coincidencia más ajustada
+                        puntajes[duenio_id] = (similitud, compartidos / len(grams_duenio))
+            
+            ordenados = sorted(
+                puntajes.items(),
+                key=lambda item: (-item[1][0], -item[1][1], self._duenios[item[0]]['nombre_apellido'])
+            )
+            
+            return [
+                {**self._duenios[duenio_id], 'similitud': round(puntaje[0], 3)}
+                for duenio_id, puntaje in ordenados[:limit]
+            ]
+    
+    
+    def autocomplete(self, prefijo: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Hasta `limit` dueños con alguna palabra del nombre que empieza con el
+        prefijo ("gonz" -> "María González"). Con varias palabras ("mar gon")
+        todas tienen que ser prefijo de alguna palabra del nombre.
+        """
+        tokens = normalize_text(prefijo).split()
+        if not tokens:
+            return []
+        
+        # Se recorre el rango del token más largo: es el más selectivo
+        principal = max(tokens, key=len)
+        
+        with self._lock:
+            resultados = []
+            vistos = set()
+            
+            posicion = bisect.bisect_left(self._palabras, (principal,))
+            while posicion < len(self._palabras) and len(resultados) < limit:
+                palabra, nombre, duenio_id = self._palabras[posicion]
+                posicion += 1
+                if not palabra.startswith(principal):
+                    break
+                if duenio_id in vistos:
+                    continue
+                
+                palabras_nombre = nombre.split()
+                if all(any(p.startswith(token) for p in palabras_nombre) for token in tokens):
+                    vistos.add(duenio_id)
+                    resultados.append({
+                        'id': duenio_id,
+                        'nombre_apellido': self._duenios[duenio_id]['nombre_apellido']
+                    })
+            
+            return resultados
+    
+    
+    def _cargar(self, duenios: List[Dict[str, Any]]) -> None:
+        self._clear()
+        for duenio in duenios:
+            self._add(duenio, ordenar=False)
+        self._palabras.sort()
+        logger.info(f"Índice de búsqueda de dueños construido: {len(self._duenios)} dueños")
+    
+    
+    def _clear(self) -> None:
+        self._duenios.clear()
+        self._grams_texto.clear()
+        self._grams_telefono.clear()
+        self._texto.clear()
+        self._telefono.clear()
+        self._palabras.clear()
+    
+    
+    def _add(self, duenio: Dict[str, Any], ordenar: bool = True) -> None:
+        duenio_id = duenio['id']
+        self._remove(duenio_id)
+        
+        grams_texto = text_trigrams(duenio.get('nombre_apellido')) | text_trigrams(duenio.get('email'))
+        grams_telefono = phone_trigrams(duenio.get('telefono'))
+        
+        self._duenios[duenio_id] = dict(duenio)
+        self._grams_texto[duenio_id] = grams_texto
+        self._grams_telefono[duenio_id] = grams_telefono
+        
+        for gram in grams_texto:
+            self._texto.setdefault(gram, set()).add(duenio_id)
+        for gram in grams_telefono:
+            self._telefono.setdefault(gram, set()).add(duenio_id)
+        
+        # Durante la carga inicial se ordena una sola vez al final
+        for entrada in self._entradas_palabras(duenio_id, duenio.get('nombre_apellido')):
+            if ordenar:
+                bisect.insort(self._palabras, entrada)
+            else:
+                self._palabras.append(entrada)
+    
+    
+    def _entradas_palabras(self, duenio_id: int, nombre_apellido: str) -> List[Tuple[str, str, int]]:
+        nombre = normalize_text(nombre_apellido)
+        return [(palabra, nombre, duenio_id) for palabra in set(nombre.split())]
+    
+    
+    def _update(self, duenio_id: int, campos: Dict[str, Any]) -> None:
+        existente = self._duenios.get(duenio_id)
+        if existente is None:
+            return
+        self._add({**existente, **campos})
+    
+    
+    def _remove(self, duenio_id: int) -> None:
+        duenio = self._duenios.pop(duenio_id, None)
+        if duenio is None:
+            return
+        
+        for entrada in self._entradas_palabras(duenio_id, duenio.get('nombre_apellido')):
+            posicion = bisect.bisect_left(self._palabras, entrada)
+            if posicion < len(self._palabras) and self._palabras[posicion] == entrada:
+                del self._palabras[posicion]
+        
+        for postings, grams in (
+            (self._texto, self._grams_texto.pop(duenio_id)),
+            (self._telefono, self._grams_telefono.pop(duenio_id))
+        ):
+            for gram in grams:
+                ids = postings.get(gram)
+                if ids is not None:
+                    ids.discard(duenio_id)
+                    if not ids:
+                        del postings[gram]
+
+
+# Instancia única del proceso, compartida por el modelo y el controlador
+duenio_search_index = DuenioSearchIndex()
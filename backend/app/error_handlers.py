@@ -1,5 +1,7 @@
+import hashlib
+import json
 import logging
-from flask import jsonify, request
+from flask import jsonify, request, make_response
 from mysql.connector import Error as MySQLError
 from datetime import datetime
 
@@ -136,13 +138,38 @@ def create_success_response(data=None, message="Operación exitosa", status_code
     return jsonify(response), status_code
 
 
-def create_error_response(error_message, status_code=400, error_type="Error"):
-    return jsonify({
+def create_cached_success_response(data, message="Operación exitosa"):
+    """
+    Respuesta exitosa con ETag calculado sobre `data` (sin el timestamp).
+    Si el cliente ya tiene esa versión (If-None-Match) se responde 304 sin cuerpo.
+    """
+    payload = json.dumps(data, sort_keys=True, default=str, separators=(',', ':'))
+    etag = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response, _ = create_success_response(data=data, message=message)
+    
+    response.set_etag(etag)
+    # El cliente puede guardar la respuesta pero debe revalidarla siempre
+    response.headers['Cache-Control'] = 'no-cache'
+    return response, response.status_code
+
+
+def create_error_response(error_message, status_code=400, error_type="Error", extra=None):
+    response = {
         'error': error_type,
         'message': error_message,
         'code': status_code,
         'timestamp': datetime.now().isoformat()
-    }), status_code
+    }
+    
+    # Datos adicionales del error (ej. los turnos en conflicto de un 409)
+    if extra:
+        response.update(extra)
+    
+    return jsonify(response), status_code
 
 
 def log_request_info():
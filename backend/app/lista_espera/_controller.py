@@ -0,0 +1,105 @@
+import logging
+from typing import Dict, Any, Optional
+
+from ._model import ListaEsperaModel, ESTADOS_LISTA_ESPERA
+from ..error_handlers import (
+    create_success_response,
+    create_error_response,
+    create_validation_error_response
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ListaEsperaController:
+    
+    def __init__(self):
+        self.lista_espera_model = ListaEsperaModel()
+        logger.debug("ListaEsperaController inicializado")
+    
+    
+    def get_all(self, estado: Optional[str] = None, limit: int = 100) -> tuple:
+        try:
+            if estado and estado not in ESTADOS_LISTA_ESPERA:
+                return create_error_response(
+                    f"Estado inválido. Debe ser uno de: {', '.join(ESTADOS_LISTA_ESPERA)}",
+                    400,
+                    "Parámetro inválido"
+                )
+            
+            solicitudes = self.lista_espera_model.get_all(estado=estado, limit=limit)
+            
+            return create_success_response(
+                data={
+                    'solicitudes': solicitudes,
+                    'count': len(solicitudes)
+                },
+                message="Lista de espera obtenida correctamente"
+            )
+        
+        except Exception as e:
+            logger.error(f"Error en get_all: {e}")
+            return create_error_response(
+                "Error al obtener la lista de espera",
+                500,
+                "Error interno"
+            )
+    
+    
+    def create(self, data: Dict[str, Any]) -> tuple:
+        try:
+            result = self.lista_espera_model.create(data)
+            
+            if result['success']:
+                logger.info(f"Created solicitud ID: {result['solicitud_id']}")
+                
+                return create_success_response(
+                    data={'solicitud': result['data']},
+                    message="Solicitud agregada a la lista de espera",
+                    status_code=201
+                )
+            else:
+                return create_validation_error_response(
+                    result['errors'],
+                    400
+                )
+        
+        except Exception as e:
+            logger.error(f"Error en create: {e}")
+            return create_error_response(
+                "Error al crear la solicitud",
+                500,
+                "Error interno"
+            )
+    
+    
+    def cancelar(self, solicitud_id: int) -> tuple:
+        try:
+            result = self.lista_espera_model.cancelar(solicitud_id)
+            
+            if result['success']:
+                return create_success_response(
+                    data=None,
+                    message=result['message'],
+                    status_code=204
+                )
+            elif result.get('error_code') == 'invalid_state':
+                return create_error_response(
+                    result['errors'][0],
+                    409,
+                    "Solicitud no cancelable"
+                )
+            else:
+                return create_error_response(
+                    result['errors'][0],
+                    404,
+                    "Solicitud no encontrada"
+                )
+        
+        except Exception as e:
+            logger.error(f"Error en cancelar: {e}")
+            return create_error_response(
+                "Error al cancelar la solicitud",
+                500,
+                "Error interno"
+            )
@@ -0,0 +1,117 @@
+import logging
+import queue
+import threading
+from typing import Any, Dict
+
+from ..turnos._model import on_turno_liberado
+from ._indice import lista_espera_indice
+from ._model import ListaEsperaModel, SolicitudNoDisponible, HorarioOcupado
+
+logger = logging.getLogger(__name__)
+
+# Solicitudes descartadas antes de dar por perdido un horario
+MAX_INTENTOS = 5
+
+
+class EmparejadorListaEspera:
+    """
+    Reasigna en segundo plano los horarios que dejan libres los turnos
+    cancelados, reagendados o eliminados. La request solo encola el horario
+    después del commit; un hilo propio busca la solicitud en el índice y
+    reserva el turno, así la request que lo libera no espera a la lista de espera.
+    """
+    
+    def __init__(self):
+        self._cola: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._app = None
+        self._model = None
+        self._contadores = {'procesados': 0, 'asignado': 0, 'sin_candidatos': 0, 'sin_horario': 0, 'error': 0}
+    
+    
+    def start(self, app) -> None:
+        """Arranca el hilo una sola vez por proceso; usa app para abrir sus app contexts"""
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._app = app
+            self._model = ListaEsperaModel()
+            self._hilo = threading.Thread(target=self._run, name='lista-espera', daemon=True)
+            self._hilo.start()
+    
+    
+    def notificar(self, horario: Dict[str, Any]) -> None:
+        # Se llama desde on_commit: nada que pueda demorar la respuesta
+        if self._hilo is None:
+            logger.warning(f"Lista de espera sin iniciar; se ignora el horario del turno {horario['turno_id']}")
+            return
+        self._cola.put(horario)
+    
+    
+    def esperar(self) -> None:
+        """Bloquea hasta procesar todo lo encolado (scripts y pruebas manuales)"""
+        self._cola.join()
+    
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            contadores = dict(self._contadores)
+        return {
+            'activo': self._hilo is not None and self._hilo.is_alive(),
+            'pendientes': self._cola.qsize(),
+            **contadores,
+            'indice': lista_espera_indice.stats()
+        }
+    
+    
+    def _run(self) -> None:
+        while True:
+            horario = self._cola.get()
+            try:
+                resultado = self._procesar(horario)
+                self._contar(resultado)
+            except Exception as e:
+                logger.error(f"❌ Error procesando el horario del turno {horario['turno_id']}: {e}")
+                self._contar('error')
+            finally:
+                self._cola.task_done()
+    
+    
+    def _procesar(self, horario: Dict[str, Any]) -> str:
+        for _ in range(MAX_INTENTOS):
+            try:
+                # Un app context por intento: el commit o rollback al salir
+                # abarca la toma de la solicitud y el turno creado
+                with self._app.app_context():
+                    return self._model.llenar_horario(horario)['resultado']
+            except SolicitudNoDisponible as e:
+                logger.warning(f"Lista de espera: solicitud {e.solicitud_id} descartada ({e})")
+                lista_espera_indice.remove(e.solicitud_id)
+                self._descartar(e.solicitud_id)
+            except HorarioOcupado as e:
+                logger.info(f"Lista de espera: el horario del turno {horario['turno_id']} ya no está libre ({e})")
+                return 'sin_horario'
+        return 'sin_candidatos'
+    
+    
+    def _descartar(self, solicitud_id: int) -> None:
+        # Fuera de la transacción revertida: si no, la fila sigue 'esperando'
+        # y vuelve al índice con la próxima carga
+        try:
+            with self._app.app_context():
+                self._model.descartar(solicitud_id)
+        except Exception as e:
+            logger.error(f"❌ No se pudo descartar la solicitud {solicitud_id}: {e}")
+    
+    
+    def _contar(self, resultado: str) -> None:
+        with self._lock:
+            self._contadores['procesados'] += 1
+            if resultado in self._contadores:
+                self._contadores[resultado] += 1
+
+
+# Instancia única del proceso; create_app la arranca
+emparejador_lista_espera = EmparejadorListaEspera()
+on_turno_liberado(emparejador_lista_espera.notificar)
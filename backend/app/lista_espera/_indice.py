@@ -0,0 +1,190 @@
+import heapq
+import logging
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..cache import CargaEnMemoria
+from ..turnos._disponibilidad import horario_clinica
+
+logger = logging.getLogger(__name__)
+
+
+class ListaEsperaIndice(CargaEnMemoria):
+    """
+    Solicitudes de la lista de espera agrupadas por (día, recurso, duración),
+    cada grupo un heap por id: el primero en anotarse es el primero en ser
+    atendido.
+    
+    Una solicitud va al heap "día completo" de cada día en el que cualquier
+    inicio cabe en su ventana; en los días del borde (donde empieza o termina
+    la ventana) va, en cambio, a los heaps de los tramos de `tramo_minutos`
+    en los que puede empezar. Al liberarse un horario solo se miran, para
+    cada duración que cabe en él, el heap del día completo y el del tramo de
+    su inicio (del recurso y de "cualquier recurso"): el tope de un día
+    completo siempre encaja y en un tramo solo puede no encajar una solicitud
+    cuyo borde cae en ese mismo tramo, así que encontrarla es O(log n) por
+    heap. Las bajas son perezosas: la solicitud sale del diccionario y su id
+    se descarta de los heaps cuando llega al tope. Las vencidas salen al
+    agregar o buscar, por un heap ordenado por `hasta`, y los heaps de días
+    pasados se borran una vez por día.
+    """
+    
+    descripcion = 'la lista de espera'
+    
+    def __init__(self, tramo_minutos: int = 30):
+        super().__init__()
+        self._tramo_minutos = tramo_minutos
+        self._solicitudes: Dict[int, Dict[str, Any]] = {}
+        # (día, recurso, duración, tramo); tramo None = día completo
+        self._heaps: Dict[Tuple[date, Optional[int], int, Optional[int]], List[int]] = {}
+        self._duraciones: Counter = Counter()
+        self._por_vencimiento: List[Tuple[datetime, int]] = []
+        self._podado_hasta: Optional[date] = None
+    
+    
+    def add(self, solicitud: Dict[str, Any]) -> None:
+        self._apply(self._add, solicitud)
+    
+    
+    def remove(self, solicitud_id: int) -> None:
+        self._apply(self._remove, solicitud_id)
+    
+    
+    def mejor(self, inicio: datetime, fin: datetime, id_recurso: Optional[int]) -> Optional[Dict[str, Any]]:
+        """
+        La solicitud más antigua que entra en el horario libre [inicio, fin)
+        del recurso: su ventana lo contiene y su duración no lo excede. Las
+        solicitudes sin recurso aceptan cualquiera.
+        """
+        dia = inicio.date()
+        tramo = self._tramo(inicio)
+        recursos = [id_recurso] if id_recurso is None else [id_recurso, None]
+        
+        with self._lock:
+            self._podar(datetime.now())
+            mejor = None
+            for duracion in self._duraciones:
+                if inicio + timedelta(minutes=duracion) > fin:
+                    continue
+                for recurso in recursos:
+                    for clave in ((dia, recurso, duracion, None), (dia, recurso, duracion, tramo)):
+                        candidata = self._primera_que_encaja(clave, inicio, fin)
+                        if candidata and (mejor is None or candidata['id'] < mejor['id']):
+                            mejor = candidata
+            return dict(mejor) if mejor else None
+    
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'built': self._built,
+                'solicitudes': len(self._solicitudes),
+                'heaps': len(self._heaps),
+                'duraciones': len(self._duraciones),
+                'vencimientos': len(self._por_vencimiento)
+            }
+    
+    
+    def _cargar(self, solicitudes: Iterable[Dict[str, Any]]) -> None:
+        self._solicitudes = {}
+        self._heaps = {}
+        self._duraciones = Counter()
+        self._por_vencimiento = []
+        self._podado_hasta = None
+        for solicitud in solicitudes:
+            self._add(solicitud)
+        logger.info(f"Lista de espera cargada: {len(self._solicitudes)} solicitudes")
+    
+    
+    def _add(self, solicitud: Dict[str, Any]) -> None:
+        ahora = datetime.now()
+        self._podar(ahora)
+        
+        solicitud_id = solicitud['id']
+        if solicitud_id in self._solicitudes or solicitud['hasta'] <= ahora:
+            return
+        self._solicitudes[solicitud_id] = dict(solicitud)
+        self._duraciones[solicitud['duracion_minutos']] += 1
+        heapq.heappush(self._por_vencimiento, (solicitud['hasta'], solicitud_id))
+        
+        # Inicios que caben en la ventana: [desde, ultimo_inicio]; los días ya pasados no
+        duracion = solicitud['duracion_minutos']
+        ultimo_inicio = solicitud['hasta'] - timedelta(minutes=duracion)
+        dia = max(solicitud['desde'], ahora).date()
+        while dia <= ultimo_inicio.date():
+            comienzo = datetime.combine(dia, time.min)
+            siguiente = comienzo + timedelta(days=1)
+            if solicitud['desde'] <= comienzo and siguiente <= ultimo_inicio:
+                self._push((dia, solicitud['id_recurso'], duracion, None), solicitud_id)
+            else:
+                primero = max(solicitud['desde'], comienzo)
+                ultimo = min(ultimo_inicio, siguiente - timedelta(microseconds=1))
+                for tramo in range(self._tramo(primero), self._tramo(ultimo) + 1):
+                    self._push((dia, solicitud['id_recurso'], duracion, tramo), solicitud_id)
+            dia += timedelta(days=1)
+    
+    
+    def _push(self, clave: Tuple[date, Optional[int], int, Optional[int]], solicitud_id: int) -> None:
+        heapq.heappush(self._heaps.setdefault(clave, []), solicitud_id)
+    
+    
+    def _tramo(self, momento: datetime) -> int:
+        return (momento.hour * 60 + momento.minute) // self._tramo_minutos
+    
+    
+    def _remove(self, solicitud_id: int) -> None:
+        solicitud = self._solicitudes.pop(solicitud_id, None)
+        if solicitud is not None:
+            self._duraciones[solicitud['duracion_minutos']] -= 1
+            if not self._duraciones[solicitud['duracion_minutos']]:
+                del self._duraciones[solicitud['duracion_minutos']]
+    
+    
+    def _podar(self, ahora: datetime) -> None:
+        # Solicitudes vencidas: O(log n) cada una, cuando su `hasta` llega al tope
+        while self._por_vencimiento and self._por_vencimiento[0][0] <= ahora:
+            _, solicitud_id = heapq.heappop(self._por_vencimiento)
+            self._remove(solicitud_id)
+        
+        # Heaps de días anteriores: ya no se va a liberar ningún horario en ellos
+        hoy = ahora.date()
+        if self._podado_hasta != hoy:
+            for clave in [clave for clave in self._heaps if clave[0] < hoy]:
+                del self._heaps[clave]
+            self._podado_hasta = hoy
+    
+    
+    def _primera_que_encaja(self, clave: Tuple[date, Optional[int], int, Optional[int]], inicio: datetime, fin: datetime) -> Optional[Dict[str, Any]]:
+        heap = self._heaps.get(clave)
+        if not heap:
+            return None
+        
+        apartadas = []
+        encontrada = None
+        while heap:
+            solicitud = self._solicitudes.get(heap[0])
+            if solicitud is None:
+                # Baja perezosa
+                heapq.heappop(heap)
+            elif self._encaja(solicitud, inicio, fin):
+                encontrada = solicitud
+                break
+            else:
+                # Solo en un tramo de borde: su ventana empieza o termina dentro del tramo
+                apartadas.append(heapq.heappop(heap))
+        
+        for solicitud_id in apartadas:
+            heapq.heappush(heap, solicitud_id)
+        if not heap:
+            del self._heaps[clave]
+        return encontrada
+    
+    
+    def _encaja(self, solicitud: Dict[str, Any], inicio: datetime, fin: datetime) -> bool:
+        fin_turno = inicio + timedelta(minutes=solicitud['duracion_minutos'])
+        return solicitud['desde'] <= inicio and fin_turno <= fin and fin_turno <= solicitud['hasta']
+
+
+# Instancia única del proceso, compartida por el modelo y el emparejador
+lista_espera_indice = ListaEsperaIndice(horario_clinica.slot_minutos)
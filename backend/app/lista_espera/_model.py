@@ -0,0 +1,372 @@
+import logging
+from typing import List, Dict, Optional, Any
+from datetime import datetime, timedelta
+from mysql.connector import Error as MySQLError
+
+from ..database import execute_query, on_commit
+from ..validators import validate_lista_espera_data, parse_datetime
+from ..duenios._ids import duenio_ids
+from ..turnos._model import TurnoModel
+from ..turnos._disponibilidad import horario_clinica
+from ._indice import lista_espera_indice
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_LISTA_ESPERA = ['esperando', 'asignado', 'cancelado']
+
+
+class SolicitudNoDisponible(Exception):
+    """La solicitud elegida ya no puede ocupar el horario: se descarta y se prueba la siguiente"""
+    
+    def __init__(self, solicitud_id: int, motivo: str):
+        super().__init__(motivo)
+        self.solicitud_id = solicitud_id
+
+
+class HorarioOcupado(Exception):
+    """Otro turno tomó el horario liberado antes que la lista de espera"""
+
+
+class ListaEsperaModel:
+    
+    def __init__(self):
+        self.table_name = "lista_espera"
+        self.turno_model = TurnoModel()
+        logger.debug("ListaEsperaModel inicializado")
+    
+    
+    def get_all(self, estado: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+        try:
+            filtros = ""
+            params = []
+            
+            if estado:
+                filtros = " AND l.estado = %s"
+                params.append(estado)
+            
+            params.append(limit)
+            
+            query = f"""
+                SELECT l.id, l.nombre_mascota, l.tratamiento, l.id_duenio, l.id_recurso,
+                       l.duracion_minutos, l.desde, l.hasta, l.estado, l.id_turno,
+                       l.created_at, l.updated_at, d.nombre_apellido
+                FROM {self.table_name} l
+                INNER JOIN duenios d ON l.id_duenio = d.id
+                WHERE 1=1{filtros}
+                ORDER BY l.id
+                LIMIT %s
+            """
+            
+            result = execute_query(query, tuple(params), fetch=True)
+            
+            solicitudes = [self._serialize_solicitud(row) for row in result] if result else []
+            
+            logger.info(f"Retrieved {len(solicitudes)} solicitudes de lista de espera")
+            return solicitudes
+        
+        except MySQLError as e:
+            logger.error(f"MySQL error en get_all: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en get_all: {e}")
+            raise
+    
+    
+    def get_esperando(self) -> List[Dict[str, Any]]:
+        """Solicitudes en espera con la ventana vigente, para cargar el índice"""
+        try:
+            query = f"""
+                SELECT id, nombre_mascota, tratamiento, id_duenio, id_recurso,
+                       duracion_minutos, desde, hasta
+                FROM {self.table_name}
+                WHERE estado = 'esperando' AND hasta > NOW()
+            """
+            
+            return execute_query(query, fetch=True) or []
+        
+        except MySQLError as e:
+            logger.error(f"MySQL error en get_esperando: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en get_esperando: {e}")
+            raise
+    
+    
+    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            validation_result = validate_lista_espera_data(data)
+            
+            if not validation_result['is_valid']:
+                logger.warning(f"Validation failed for create: {validation_result['errors']}")
+                return {
+                    'success': False,
+                    'errors': validation_result['errors']
+                }
+            
+            desde = parse_datetime(data['desde'])
+            hasta = parse_datetime(data['hasta'])
+            duracion = int(data.get('duracion_minutos', horario_clinica.duracion_turno))
+            if desde + timedelta(minutes=duracion) > hasta:
+                return {
+                    'success': False,
+                    'errors': ['La ventana es más corta que la duración del turno']
+                }
+            
+            id_duenio = int(data['id_duenio'])
+            existe, _ = duenio_ids.contains_or_load(id_duenio, self.turno_model.duenio_model.get_one)
+            if not existe:
+                return {
+                    'success': False,
+                    'errors': [f"No existe un dueño con ID: {id_duenio}"]
+                }
+            
+            id_recurso = int(data['id_recurso']) if data.get('id_recurso') is not None else None
+            if id_recurso is not None:
+                recurso = self.turno_model.recurso_model.get_one(id_recurso)
+                if not recurso:
+                    return {
+                        'success': False,
+                        'errors': [f"No existe un recurso con ID: {id_recurso}"]
+                    }
+            
+            query = f"""
+                INSERT INTO {self.table_name}
+                (nombre_mascota, tratamiento, id_duenio, id_recurso, duracion_minutos, desde, hasta)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """
+            
+            params = (
+                data['nombre_mascota'].strip(),
+                data['tratamiento'].strip(),
+                id_duenio,
+                id_recurso,
+                duracion,
+                desde,
+                hasta
+            )
+            
+            solicitud_id = execute_query(query, params)
+            
+            if not solicitud_id:
+                logger.error("Failed to create solicitud - no ID returned")
+                return {
+                    'success': False,
+                    'errors': ['Error al crear la solicitud']
+                }
+            
+            logger.info(f"Created solicitud de lista de espera ID: {solicitud_id}")
+            
+            ahora = datetime.now().replace(microsecond=0)
+            fila = {
+                'id': solicitud_id,
+                'nombre_mascota': params[0],
+                'tratamiento': params[1],
+                'id_duenio': id_duenio,
+                'id_recurso': id_recurso,
+                'duracion_minutos': duracion,
+                'desde': desde,
+                'hasta': hasta
+            }
+            on_commit(lambda: lista_espera_indice.add(fila))
+            
+            return {
+                'success': True,
+                'data': self._serialize_solicitud({
+                    **fila,
+                    'estado': 'esperando',
+                    'id_turno': None,
+                    'created_at': ahora,
+                    'updated_at': ahora
+                }),
+                'solicitud_id': solicitud_id
+            }
+        
+        except MySQLError as e:
+            logger.error(f"MySQL error en create: {e}")
+            
+            if e.errno == 1452:  # Foreign key constraint fails
+                return {
+                    'success': False,
+                    'errors': ['El dueño o el recurso especificado no existe']
+                }
+            else:
+                raise
+        
+        except Exception as e:
+            logger.error(f"Unexpected error en create: {e}")
+            raise
+    
+    
+    def cancelar(self, solicitud_id: int) -> Dict[str, Any]:
+        try:
+            query = f"""
+                UPDATE {self.table_name}
+                SET estado = 'cancelado', updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND estado = 'esperando'
+            """
+            
+            rows_affected = execute_query(query, (solicitud_id,))
+            
+            if rows_affected > 0:
+                logger.info(f"Cancelled solicitud de lista de espera ID: {solicitud_id}")
+                on_commit(lambda: lista_espera_indice.remove(solicitud_id))
+                return {
+                    'success': True,
+                    'message': 'Solicitud cancelada correctamente'
+                }
+            
+            # Ningún UPDATE aplicó: una lectura para explicar por qué
+            row = execute_query(
+                f"SELECT estado FROM {self.table_name} WHERE id = %s",
+                (solicitud_id,),
+                fetch_one=True
+            )
+            if not row:
+                return {
+                    'success': False,
+                    'error_code': 'not_found',
+                    'errors': [f'No existe una solicitud con ID: {solicitud_id}']
+                }
+            
+            return {
+                'success': False,
+                'error_code': 'invalid_state',
+                'errors': [f'La solicitud ya está en estado "{row["estado"]}"']
+            }
+        
+        except MySQLError as e:
+            logger.error(f"MySQL error en cancelar: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en cancelar: {e}")
+            raise
+    
+    
+    def descartar(self, solicitud_id: int) -> bool:
+        """Cancela una solicitud que la lista de espera ya no puede asignar"""
+        try:
+            query = f"""
+                UPDATE {self.table_name}
+                SET estado = 'cancelado', updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND estado = 'esperando'
+            """
+            
+            descartada = execute_query(query, (solicitud_id,)) > 0
+            if descartada:
+                logger.info(f"Descartada solicitud de lista de espera ID: {solicitud_id}")
+            return descartada
+        
+        except MySQLError as e:
+            logger.error(f"MySQL error en descartar: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en descartar: {e}")
+            raise
+    
+    
+    def llenar_horario(self, horario: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Ofrece el horario que dejó libre un turno (cancelado, reagendado o
+        eliminado) a la solicitud más antigua que entra en él y, si la hay, le
+        reserva el turno. horario es el aviso de on_turno_liberado: turno_id,
+        fecha_turno, fecha_fin e id_recurso, o solo turno_id si lo canceló un
+        cambio de estado (se lee acá). Pensado para correr dentro de un
+        app context propio: la solicitud se toma y el turno se crea en la misma
+        transacción. Si la solicitud elegida ya no sirve lanza
+        SolicitudNoDisponible; si el horario se volvió a ocupar (ej. el turno
+        se reagendó de nuevo), HorarioOcupado. En ambos casos la transacción
+        debe revertirse.
+        """
+        lista_espera_indice.ensure_built(self.get_esperando)
+        
+        if 'fecha_turno' not in horario:
+            horario = self._horario_cancelado(horario['turno_id'])
+            if horario is None:
+                return {'resultado': 'sin_horario'}
+        
+        # Un horario que ya pasó no se puede ofrecer
+        if horario['fecha_turno'] <= datetime.now():
+            return {'resultado': 'sin_horario'}
+        
+        solicitud = lista_espera_indice.mejor(horario['fecha_turno'], horario['fecha_fin'], horario['id_recurso'])
+        if not solicitud:
+            return {'resultado': 'sin_candidatos'}
+        
+        # Tomar la solicitud primero: bloquea la fila frente a una cancelación
+        # concurrente hasta el commit
+        tomada = execute_query(
+            f"""
+                UPDATE {self.table_name}
+                SET estado = 'asignado', updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND estado = 'esperando'
+            """,
+            (solicitud['id'],)
+        )
+        if not tomada:
+            raise SolicitudNoDisponible(solicitud['id'], 'ya no está en espera')
+        
+        result = self.turno_model.create({
+            'nombre_mascota': solicitud['nombre_mascota'],
+            'tratamiento': solicitud['tratamiento'],
+            'id_duenio': solicitud['id_duenio'],
+            'id_recurso': horario['id_recurso'],
+            'duracion_minutos': solicitud['duracion_minutos'],
+            'fecha_turno': horario['fecha_turno'].strftime('%Y-%m-%d %H:%M:%S')
+        })
+        
+        if not result['success']:
+            if result.get('error_code') == 'conflict':
+                raise HorarioOcupado(result['errors'][0])
+            raise SolicitudNoDisponible(solicitud['id'], '; '.join(result['errors']))
+        
+        nuevo_turno_id = result['turno_id']
+        execute_query(
+            f"UPDATE {self.table_name} SET id_turno = %s WHERE id = %s",
+            (nuevo_turno_id, solicitud['id'])
+        )
+        on_commit(lambda: lista_espera_indice.remove(solicitud['id']))
+        
+        logger.info(f"Lista de espera: solicitud {solicitud['id']} asignada al turno {nuevo_turno_id} (libre por el turno {horario['turno_id']})")
+        return {
+            'resultado': 'asignado',
+            'solicitud_id': solicitud['id'],
+            'turno_id': nuevo_turno_id
+        }
+    
+    
+    def _horario_cancelado(self, turno_id: int) -> Optional[Dict[str, Any]]:
+        # Sin bloquear: si otro turno lo ocupa mientras tanto, create() lo detecta
+        return execute_query(
+            f"""
+                SELECT id AS turno_id, fecha_turno, fecha_fin, id_recurso
+                FROM {self.turno_model.table_name}
+                WHERE id = %s AND estado = 'cancelado'
+            """,
+            (turno_id,),
+            fetch_one=True
+        )
+    
+    
+    def _serialize_solicitud(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if not row:
+            return {}
+        
+        solicitud = {
+            'id': row['id'],
+            'nombre_mascota': row['nombre_mascota'],
+            'tratamiento': row['tratamiento'],
+            'id_duenio': row['id_duenio'],
+            'id_recurso': row.get('id_recurso'),
+            'duracion_minutos': row['duracion_minutos'],
+            'desde': row['desde'].isoformat() if row.get('desde') else None,
+            'hasta': row['hasta'].isoformat() if row.get('hasta') else None,
+            'estado': row['estado'],
+            'id_turno': row.get('id_turno'),
+            'created_at': row['created_at'].isoformat() if row.get('created_at') else None,
+            'updated_at': row['updated_at'].isoformat() if row.get('updated_at') else None
+        }
+        
+        if 'nombre_apellido' in row:
+            solicitud['nombre_apellido'] = row['nombre_apellido']
+        
+        return solicitud
@@ -0,0 +1,83 @@
+import logging
+from flask import Blueprint, request
+
+from ._controller import ListaEsperaController
+from ..error_handlers import (
+    validate_json_request,
+    safe_int_conversion,
+    create_error_response,
+    log_request_info
+)
+
+logger = logging.getLogger(__name__)
+
+lista_espera_bp = Blueprint('lista_espera', __name__)
+
+lista_espera_controller = ListaEsperaController()
+
+
+@lista_espera_bp.before_request
+def before_request():
+    log_request_info()
+
+
+@lista_espera_bp.route('/lista-espera/', methods=['GET'])
+@lista_espera_bp.route('/lista-espera', methods=['GET'])
+def get_lista_espera():
+    try:
+        estado = request.args.get('estado')
+        limit_param = request.args.get('limit', '100')
+        
+        limit, error = safe_int_conversion(limit_param, 'limit')
+        if error or limit <= 0:
+            limit = 100  # Valor por defecto si hay error
+        
+        response_data, status_code = lista_espera_controller.get_all(estado=estado, limit=limit)
+        return response_data, status_code
+    
+    except Exception as e:
+        logger.error(f"Error en get_lista_espera route: {e}")
+        return create_error_response(
+            "Error interno del servidor",
+            500,
+            "Error interno"
+        )
+
+
+@lista_espera_bp.route('/lista-espera/', methods=['POST'])
+@lista_espera_bp.route('/lista-espera', methods=['POST'])
+def create_solicitud():
+    try:
+        json_data, error_response = validate_json_request()
+        if error_response:
+            return error_response
+        
+        response_data, status_code = lista_espera_controller.create(json_data)
+        return response_data, status_code
+    
+    except Exception as e:
+        logger.error(f"Error en create_solicitud route: {e}")
+        return create_error_response(
+            "Error interno del servidor",
+            500,
+            "Error interno"
+        )
+
+
+@lista_espera_bp.route('/lista-espera/<int:solicitud_id>', methods=['DELETE'])
+def cancelar_solicitud(solicitud_id):
+    try:
+        response_data, status_code = lista_espera_controller.cancelar(solicitud_id)
+        
+        if status_code == 204:
+            return '', 204
+        else:
+            return response_data, status_code
+    
+    except Exception as e:
+        logger.error(f"Error en cancelar_solicitud route: {e}")
+        return create_error_response(
+            "Error interno del servidor",
+            500,
+            "Error interno"
+        )
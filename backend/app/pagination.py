@@ -0,0 +1,28 @@
+import base64
+import binascii
+import json
+from typing import Any, List
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    Codifica la clave de orden de la última fila de una página en un cursor
+    opaco (base64 url-safe de un array JSON). Las fechas se guardan como texto.
+    """
+    payload = json.dumps(values, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, expected_length: int) -> List[Any]:
+    """Decodifica un cursor generado por encode_cursor. Lanza ValueError si es inválido."""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        payload = base64.urlsafe_b64decode((cursor + padding).encode('ascii'))
+        values = json.loads(payload.decode('utf-8'))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Cursor inválido")
+
+    if not isinstance(values, list) or len(values) != expected_length:
+        raise ValueError("Cursor inválido")
+
+    return values
@@ -0,0 +1,168 @@
+import logging
+from typing import Dict, Any, Optional
+
+from ._model import RecursoModel
+from ..validators import TIPOS_RECURSO
+from ..error_handlers import (
+    create_success_response,
+    create_error_response,
+    create_validation_error_response
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RecursoController:
+    
+    def __init__(self):
+        self.recurso_model = RecursoModel()
+        logger.debug("RecursoController inicializado")
+    
+    
+    def get_all(self, tipo: Optional[str] = None, solo_activos: bool = False) -> tuple:
+        try:
+            if tipo and tipo not in TIPOS_RECURSO:
+                return create_error_response(
+                    f"Tipo inválido. Debe ser uno de: {', '.join(TIPOS_RECURSO)}",
+                    400,
+                    "Parámetro inválido"
+                )
+            
+            recursos = self.recurso_model.get_all(tipo=tipo, solo_activos=solo_activos)
+            
+            return create_success_response(
+                data={
+                    'recursos': recursos,
+                    'count': len(recursos)
+                },
+                message="Recursos obtenidos correctamente"
+            )
+        
+        except Exception as e:
+            logger.error(f"Error en get_all: {e}")
+            return create_error_response(
+                "Error al obtener los recursos",
+                500,
+                "Error interno"
+            )
+    
+    
+    def get_one(self, recurso_id: int) -> tuple:
+        try:
+            recurso = self.recurso_model.get_one(recurso_id)
+            
+            if not recurso:
+                return create_error_response(
+                    f"No se encontró un recurso con ID: {recurso_id}",
+                    404,
+                    "Recurso no encontrado"
+                )
+            
+            return create_success_response(
+                data={'recurso': recurso},
+                message="Recurso obtenido correctamente"
+            )
+        
+        except Exception as e:
+            logger.error(f"Error en get_one: {e}")
+            return create_error_response(
+                "Error al obtener el recurso",
+                500,
+                "Error interno"
+            )
+    
+    
+    def create(self, data: Dict[str, Any]) -> tuple:
+        try:
+            result = self.recurso_model.create(data)
+            
+            if result['success']:
+                logger.info(f"Created recurso ID: {result['recurso_id']}")
+                
+                return create_success_response(
+                    data={'recurso': result['data']},
+                    message="Recurso creado correctamente",
+                    status_code=201
+                )
+            else:
+                return create_validation_error_response(
+                    result['errors'],
+                    400
+                )
+        
+        except Exception as e:
+            logger.error(f"Error en create: {e}")
+            return create_error_response(
+                "Error al crear el recurso",
+                500,
+                "Error interno"
+            )
+    
+    
+    def update(self, recurso_id: int, data: Dict[str, Any]) -> tuple:
+        try:
+            if not data:
+                return create_error_response(
+                    "No se proporcionaron datos para actualizar",
+                    400,
+                    "Datos faltantes"
+                )
+            
+            result = self.recurso_model.update(recurso_id, data)
+            
+            if result['success']:
+                return create_success_response(
+                    data={'recurso': result['data']},
+                    message="Recurso actualizado correctamente"
+                )
+            elif result.get('error_code') == 'not_found':
+                return create_error_response(
+                    result['errors'][0],
+                    404,
+                    "Recurso no encontrado"
+                )
+            else:
+                return create_validation_error_response(
+                    result['errors'],
+                    400
+                )
+        
+        except Exception as e:
+            logger.error(f"Error en update: {e}")
+            return create_error_response(
+                "Error al actualizar el recurso",
+                500,
+                "Error interno"
+            )
+    
+    
+    def delete(self, recurso_id: int) -> tuple:
+        try:
+            result = self.recurso_model.delete(recurso_id)
+            
+            if result['success']:
+                return create_success_response(
+                    data=None,
+                    message=result['message'],
+                    status_code=204
+                )
+            elif result.get('error_code') == 'in_use':
+                return create_error_response(
+                    result['errors'][0],
+                    409,
+                    "Recurso en uso"
+                )
+            else:
+                return create_error_response(
+                    result['errors'][0],
+                    404,
+                    "Recurso no encontrado"
+                )
+        
+        except Exception as e:
+            logger.error(f"Error en delete: {e}")
+            return create_error_response(
+                "Error al eliminar el recurso",
+                500,
+                "Error interno"
+            )
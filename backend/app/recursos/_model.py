@@ -0,0 +1,282 @@
+import logging
+import os
+from typing import List, Dict, Optional, Any
+from datetime import datetime
+from mysql.connector import Error as MySQLError
+
+from ..database import execute_query, on_commit
+from ..validators import validate_recurso_data
+from ..cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Los recursos son pocos y se leen en cada reserva que indica uno
+recurso_cache = LRUCache(
+    'recursos',
+    maxsize=int(os.getenv('RECURSO_CACHE_SIZE', 256)),
+    ttl=float(os.getenv('RECURSO_CACHE_TTL', 300))
+)
+
+
+class RecursoModel:
+    
+    def __init__(self):
+        self.table_name = "recursos"
+        logger.debug("RecursoModel inicializado")
+    
+    
+    def get_all(self, tipo: str = None, solo_activos: bool = False) -> List[Dict[str, Any]]:
+        try:
+            filtros = ""
+            params = []
+            
+            if tipo:
+                filtros += " AND tipo = %s"
+                params.append(tipo)
+            
+            if solo_activos:
+                filtros += " AND activo = TRUE"
+            
+            query = f"""
+                SELECT id, nombre, tipo, activo, created_at, updated_at
+                FROM {self.table_name}
+                WHERE 1=1{filtros}
+                ORDER BY tipo, nombre
+            """
+            
+            result = execute_query(query, tuple(params), fetch=True)
+            
+            recursos = [self._serialize_recurso(row) for row in result] if result else []
+            
+            logger.info(f"Retrieved {len(recursos)} recursos from database")
+            return recursos
+        
+        except MySQLError as e:
+            logger.error(f"MySQL error en get_all: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en get_all: {e}")
+            raise
+    
+    
+    def get_one(self, recurso_id: int) -> Optional[Dict[str, Any]]:
+        try:
+            encontrado, recurso = recurso_cache.get(recurso_id)
+            if encontrado:
+                return dict(recurso) if recurso else None
+            
+            query = f"""
+                SELECT id, nombre, tipo, activo, created_at, updated_at
+                FROM {self.table_name}
+                WHERE id = %s
+            """
+            
+            result = execute_query(query, (recurso_id,), fetch_one=True)
+            
+            if not result:
+                logger.debug(f"No recurso found with ID {recurso_id}")
+                recurso_cache.set(recurso_id, None)
+                return None
+            
+            recurso = self._serialize_recurso(result)
+            recurso_cache.set(recurso_id, recurso)
+            return dict(recurso)
+        
+        except MySQLError as e:
+            logger.error(f"MySQL error en get_one: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en get_one: {e}")
+            raise
+    
+    
+    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            validation_result = validate_recurso_data(data)
+            
+            if not validation_result['is_valid']:
+                logger.warning(f"Validation failed for create: {validation_result['errors']}")
+                return {
+                    'success': False,
+                    'errors': validation_result['errors']
+                }
+            
+            query = f"""
+                INSERT INTO {self.table_name} (nombre, tipo, activo)
+                VALUES (%s, %s, %s)
+            """
+            
+            params = (
+                data['nombre'].strip(),
+                data['tipo'],
+                data.get('activo', True)
+            )
+            
+            recurso_id = execute_query(query, params)
+            
+            if not recurso_id:
+                logger.error("Failed to create recurso - no ID returned")
+                return {
+                    'success': False,
+                    'errors': ['Error al crear el recurso']
+                }
+            
+            logger.info(f"Created new recurso with ID: {recurso_id}")
+            
+            # Un get_one previo pudo cachear el id como inexistente
+            self._invalidate_cache(recurso_id)
+            
+            ahora = datetime.now().replace(microsecond=0)
+            return {
+                'success': True,
+                'data': self._serialize_recurso({
+                    'id': recurso_id,
+                    'nombre': params[0],
+                    'tipo': params[1],
+                    'activo': params[2],
+                    'created_at': ahora,
+                    'updated_at': ahora
+                }),
+                'recurso_id': recurso_id
+            }
+        
+        except MySQLError as e:
+            logger.error(f"MySQL error en create: {e}")
+            
+            if e.errno == 1062:  # Duplicate entry
+                return {
+                    'success': False,
+                    'errors': ['Ya existe un recurso con ese nombre']
+                }
+            else:
+                raise
+        
+        except Exception as e:
+            logger.error(f"Unexpected error en create: {e}")
+            raise
+    
+    
+    def update(self, recurso_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            validation_result = validate_recurso_data(data, parcial=True)
+            if not validation_result['is_valid']:
+                logger.warning(f"Validation failed for update: {validation_result['errors']}")
+                return {
+                    'success': False,
+                    'errors': validation_result['errors']
+                }
+            
+            update_fields = []
+            params = []
+            cambios = {'id': recurso_id}
+            
+            for field in ['nombre', 'tipo', 'activo']:
+                if field in data:
+                    value = data[field].strip() if field == 'nombre' else data[field]
+                    update_fields.append(f"{field} = %s")
+                    params.append(value)
+                    cambios[field] = value
+            
+            if not update_fields:
+                return {
+                    'success': False,
+                    'errors': ['No hay campos para actualizar']
+                }
+            
+            params.append(recurso_id)
+            
+            query = f"""
+                UPDATE {self.table_name}
+                SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """
+            
+            # rowcount cuenta filas encontradas: 0 significa que el recurso no existe
+            rows_affected = execute_query(query, tuple(params))
+            
+            if rows_affected > 0:
+                logger.info(f"Updated recurso ID: {recurso_id}")
+                self._invalidate_cache(recurso_id)
+                cambios['updated_at'] = datetime.now().replace(microsecond=0).isoformat()
+                return {
+                    'success': True,
+                    'data': cambios
+                }
+            
+            return {
+                'success': False,
+                'error_code': 'not_found',
+                'errors': [f'No existe un recurso con ID: {recurso_id}']
+            }
+        
+        except MySQLError as e:
+            logger.error(f"MySQL error en update: {e}")
+            
+            if e.errno == 1062:  # Duplicate entry
+                return {
+                    'success': False,
+                    'errors': ['Ya existe un recurso con ese nombre']
+                }
+            else:
+                raise
+        
+        except Exception as e:
+            logger.error(f"Unexpected error en update: {e}")
+            raise
+    
+    
+    def delete(self, recurso_id: int) -> Dict[str, Any]:
+        try:
+            query = f"DELETE FROM {self.table_name} WHERE id = %s"
+            rows_affected = execute_query(query, (recurso_id,))
+            
+            if rows_affected > 0:
+                logger.info(f"Deleted recurso ID: {recurso_id}")
+                self._invalidate_cache(recurso_id)
+                return {
+                    'success': True,
+                    'message': 'Recurso eliminado correctamente'
+                }
+            
+            return {
+                'success': False,
+                'error_code': 'not_found',
+                'errors': [f'No existe un recurso con ID: {recurso_id}']
+            }
+        
+        except MySQLError as e:
+            logger.error(f"MySQL error en delete: {e}")
+            
+            # La FK de turnos es RESTRICT: los turnos no se borran con el recurso
+            if e.errno == 1451:
+                return {
+                    'success': False,
+                    'error_code': 'in_use',
+                    'errors': ['El recurso tiene turnos asignados; desactívelo con "activo": false']
+                }
+            else:
+                raise
+        
+        except Exception as e:
+            logger.error(f"Unexpected error en delete: {e}")
+            raise
+    
+    
+    def _invalidate_cache(self, recurso_id: int) -> None:
+        # Ya mismo y de nuevo al confirmar, igual que el cache de dueños
+        recurso_cache.invalidate(recurso_id)
+        on_commit(lambda: recurso_cache.invalidate(recurso_id))
+    
+    
+    def _serialize_recurso(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if not row:
+            return {}
+        
+        return {
+            'id': row['id'],
+            'nombre': row['nombre'],
+            'tipo': row['tipo'],
+            'activo': bool(row['activo']),
+            'created_at': row['created_at'].isoformat() if row.get('created_at') else None,
+            'updated_at': row['updated_at'].isoformat() if row.get('updated_at') else None
+        }
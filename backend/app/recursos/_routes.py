@@ -0,0 +1,112 @@
+import logging
+from flask import Blueprint, request
+
+from ._controller import RecursoController
+from ..error_handlers import (
+    validate_json_request,
+    create_error_response,
+    log_request_info
+)
+
+logger = logging.getLogger(__name__)
+
+recursos_bp = Blueprint('recursos', __name__)
+
+recursos_controller = RecursoController()
+
+
+@recursos_bp.before_request
+def before_request():
+    log_request_info()
+
+
+@recursos_bp.route('/recursos/', methods=['GET'])
+@recursos_bp.route('/recursos', methods=['GET'])
+def get_all_recursos():
+    try:
+        tipo = request.args.get('tipo')
+        solo_activos = request.args.get('activos', 'false').lower() == 'true'
+        
+        response_data, status_code = recursos_controller.get_all(tipo=tipo, solo_activos=solo_activos)
+        return response_data, status_code
+    
+    except Exception as e:
+        logger.error(f"Error en get_all_recursos route: {e}")
+        return create_error_response(
+            "Error interno del servidor",
+            500,
+            "Error interno"
+        )
+
+
+@recursos_bp.route('/recursos/<int:recurso_id>', methods=['GET'])
+def get_recurso(recurso_id):
+    try:
+        response_data, status_code = recursos_controller.get_one(recurso_id)
+        return response_data, status_code
+    
+    except Exception as e:
+        logger.error(f"Error en get_recurso route: {e}")
+        return create_error_response(
+            "Error interno del servidor",
+            500,
+            "Error interno"
+        )
+
+
+@recursos_bp.route('/recursos/', methods=['POST'])
+@recursos_bp.route('/recursos', methods=['POST'])
+def create_recurso():
+    try:
+        json_data, error_response = validate_json_request()
+        if error_response:
+            return error_response
+        
+        response_data, status_code = recursos_controller.create(json_data)
+        return response_data, status_code
+    
+    except Exception as e:
+        logger.error(f"Error en create_recurso route: {e}")
+        return create_error_response(
+            "Error interno del servidor",
+            500,
+            "Error interno"
+        )
+
+
+@recursos_bp.route('/recursos/<int:recurso_id>', methods=['PUT'])
+def update_recurso(recurso_id):
+    try:
+        json_data, error_response = validate_json_request()
+        if error_response:
+            return error_response
+        
+        response_data, status_code = recursos_controller.update(recurso_id, json_data)
+        return response_data, status_code
+    
+    except Exception as e:
+        logger.error(f"Error en update_recurso route: {e}")
+        return create_error_response(
+            "Error interno del servidor",
+            500,
+            "Error interno"
+        )
+
+
+@recursos_bp.route('/recursos/<int:recurso_id>', methods=['DELETE'])
+def delete_recurso(recurso_id):
+    try:
+        response_data, status_code = recursos_controller.delete(recurso_id)
+        
+        if status_code == 204:
+            return '', 204
+        else:
+            return response_data, status_code
+    
+    except Exception as e:
+        logger.error(f"Error en delete_recurso route: {e}")
+        return create_error_response(
+            "Error interno del servidor",
+            500,
+            "Error interno"
+        )
@@ -0,0 +1,136 @@
+import csv
+import io
+import itertools
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+from flask import Response, current_app, stream_with_context
+
+from .error_handlers import create_error_response
+
+EXPORT_FORMATS = ['ndjson', 'csv']
+
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Filas por cada escritura al socket: una por fila serían demasiadas
+FILAS_POR_BLOQUE = 100
+
+# Segundos sugeridos al cliente antes de reintentar cuando no hay lugar
+# para otra lectura en streaming
+STREAMING_RETRY_AFTER = 5
+
+
+def iniciar(filas: Iterable[Any]) -> Iterator[Any]:
+    """
+    Lee la primera fila antes de armar la respuesta: la consulta se ejecuta
+    acá y un error de base de datos todavía puede responderse como 500,
+    en lugar de cortar un 200 ya enviado.
+    """
+    filas = iter(filas)
+    try:
+        primera = next(filas)
+    except StopIteration:
+        return iter(())
+    return itertools.chain([primera], filas)
+
+
+def aplanar(fila: Dict[str, Any], prefijo: str = '') -> Dict[str, Any]:
+    """Un objeto anidado ({'duenio': {'id': 1}}) como columnas planas (duenio_id)"""
+    plana = {}
+    for clave, valor in fila.items():
+        if isinstance(valor, dict):
+            plana.update(aplanar(valor, f"{prefijo}{clave}_"))
+        else:
+            plana[f"{prefijo}{clave}"] = valor
+    return plana
+
+
+def _en_bloques(partes: Iterable[str], tamanio: int = FILAS_POR_BLOQUE) -> Iterator[str]:
+    bloque = []
+    for parte in partes:
+        bloque.append(parte)
+        if len(bloque) >= tamanio:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+
+def _ndjson_lineas(filas: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for fila in filas:
+        yield json.dumps(fila, ensure_ascii=False, default=str) + '\n'
+
+
+def _csv_lineas(filas: Iterable[Dict[str, Any]], columnas: List[str]) -> Iterator[str]:
+    # Un buffer de una sola línea que se vacía después de cada fila
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columnas, extrasaction='ignore')
+    
+    # El encabezado va siempre: una exportación vacía sigue siendo un CSV válido
+    writer.writeheader()
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    
+    for fila in filas:
+        writer.writerow(aplanar(fila))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
+def create_export_response(filas: Iterable[Dict[str, Any]], formato: str, nombre: str, columnas: List[str]) -> Response:
+    """
+    Respuesta en streaming con una fila por línea (NDJSON o CSV). filas debe
+    ser un generador: cada fila se serializa y se envía a medida que llega,
+    así que la memoria no depende del total exportado. columnas son las del
+    CSV, ya aplanadas (duenio_id, ...).
+    """
+    lineas = _ndjson_lineas(filas) if formato == 'ndjson' else _csv_lineas(filas, columnas)
+    
+    response = Response(stream_with_context(_en_bloques(lineas)), mimetype=EXPORT_MIMETYPES[formato])
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="{nombre}-{date.today().isoformat()}.{formato}"'
+    )
+    # Que un proxy (nginx) no junte toda la respuesta antes de reenviarla
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def create_streamed_list_response(clave: str, filas: Iterable[Dict[str, Any]], metadata: Callable[[int], Dict[str, Any]], message: str) -> Response:
+    """
+    El mismo JSON que create_success_response(data={clave: [...], 'metadata': ...}),
+    con la lista generada a medida que llegan las filas. metadata(count) se
+    llama al terminar, con la cantidad enviada, para los campos que dependen
+    de ella. Se serializa con el proveedor JSON de Flask, igual que jsonify.
+    """
+    dumps = current_app.json.dumps
+    timestamp = datetime.now().isoformat()
+    
+    def partes():
+        yield '{"data":{' + dumps(clave) + ':['
+        count = 0
+        for fila in filas:
+            yield (',' if count else '') + dumps(fila)
+            count += 1
+        yield '],"metadata":' + dumps(metadata(count)) + '},'
+        yield '"message":' + dumps(message) + ',"success":true,"timestamp":' + dumps(timestamp) + '}\n'
+    
+    response = Response(stream_with_context(_en_bloques(partes())), mimetype='application/json')
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def create_streaming_unavailable_response(recurso: str) -> tuple:
+    """503 cuando ya corren todas las lecturas en streaming permitidas (StreamingNoDisponible)"""
+    response, status_code = create_error_response(
+        f"Hay demasiadas descargas de {recurso} en curso, reintente en unos segundos", 
+        503, 
+        "Servicio no disponible"
+    )
+    response.headers['Retry-After'] = str(STREAMING_RETRY_AFTER)
+    return response, status_code
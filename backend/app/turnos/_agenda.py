@@ -0,0 +1,245 @@
+import bisect
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..cache import CargaEnMemoria
+
+logger = logging.getLogger(__name__)
+
+# Columnas del dueño copiadas en cada fila (las del JOIN de las consultas de turnos)
+CAMPOS_DUENIO = ['nombre_apellido', 'telefono', 'email', 'direccion']
+
+
+class TurnoAgenda(CargaEnMemoria):
+    """
+    Copia en memoria de los turnos de los próximos `dias` días (desde hoy a
+    las 00:00), ordenados por (fecha_turno, id) para resolver un día o un
+    rango con bisect sin ir a la base.
+    
+    Guarda las filas crudas de la consulta (turno + columnas del dueño); la
+    serialización queda a cargo del modelo. TurnoModel la mantiene al día
+    después de cada commit y se recarga entera cuando cambia el día, pasan
+    `max_edad` segundos o la versión de la base no es la suya: cada
+    escritura de turnos suma 1 a un contador en la base y a la versión de la
+    agenda del worker que la hizo, así que una escritura de otro worker (o
+    confirmada mientras se cargaba) se detecta en la próxima lectura.
+    """
+    
+    descripcion = 'la agenda de turnos'
+    
+    def __init__(self, dias: int = 7, max_edad: float = 300.0):
+        super().__init__()
+        self.dias = dias
+        self.max_edad = max_edad
+        self._claves: List[Tuple[datetime, int]] = []
+        self._filas: Dict[int, Dict[str, Any]] = {}
+        self._desde: Optional[datetime] = None
+        self._hasta: Optional[datetime] = None
+        self._cargada_en = 0.0
+        self._version: Optional[int] = None
+        # Valores calculados por (día, recurso) (ej. el bitmap de disponibilidad);
+        # se descartan cuando cambia algún turno de ese día y recurso.
+        # El recurso None agrupa todos los turnos del día
+        self._derivados: Dict[Tuple[date, Optional[int]], Any] = {}
+    
+    
+    def ensure_fresh(self, loader: Callable[[datetime, datetime], List[Dict[str, Any]]], version: Optional[Callable[[], int]] = None) -> bool:
+        """
+        Recarga la ventana con loader(desde, hasta) si cambió el día, venció,
+        version() no coincide con la de la carga o nunca se cargó. Devuelve
+        False si la agenda no está disponible (otra request la está cargando
+        y la ventana anterior no está al día).
+        """
+        desde = datetime.combine(datetime.now().date(), datetime.min.time())
+        # Antes que las filas: una escritura confirmada entre las dos lecturas
+        # deja la versión atrasada y fuerza otra recarga, nunca al revés
+        actual = version() if version else None
+        
+        with self._lock:
+            al_dia = self._desde == desde and (actual is None or actual == self._version)
+            vigente = al_dia and time.monotonic() - self._cargada_en < self.max_edad
+            if vigente or self._building:
+                # Mientras se recarga se sigue sirviendo la ventana anterior si está al día
+                return al_dia
+            self._empezar_carga()
+        
+        hasta = desde + timedelta(days=self.dias)
+        self._construir(lambda: (desde, hasta, actual, loader(desde, hasta)))
+        return True
+    
+    
+    def ensure_built(self, loader: Callable[[datetime, datetime], List[Dict[str, Any]]]) -> None:
+        # La agenda se carga por ventana de fechas: ver ensure_fresh
+        self.ensure_fresh(loader)
+    
+    
+    def cubre(self, inicio: datetime, fin: datetime) -> bool:
+        """True si el rango semiabierto [inicio, fin) cae entero dentro de la ventana"""
+        with self._lock:
+            return self._desde is not None and self._desde <= inicio and fin <= self._hasta
+    
+    
+    def get_rango(self, inicio: datetime, fin: datetime, limit: Optional[int] = None, id_recurso: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Copias de las filas con inicio <= fecha_turno < fin (y del recurso, si se indica), en orden de fecha"""
+        with self._lock:
+            desde = bisect.bisect_left(self._claves, (inicio,))
+            hasta = bisect.bisect_left(self._claves, (fin,), lo=desde)
+            if id_recurso is None:
+                if limit is not None:
+                    hasta = min(hasta, desde + limit)
+                return [dict(self._filas[turno_id]) for _, turno_id in self._claves[desde:hasta]]
+            
+            filas = []
+            for _, turno_id in self._claves[desde:hasta]:
+                if limit is not None and len(filas) >= limit:
+                    break
+                if self._filas[turno_id].get('id_recurso') == id_recurso:
+                    filas.append(dict(self._filas[turno_id]))
+            return filas
+    
+    
+    def derivado_dia(self, dia: date, calcular: Callable[[List[Dict[str, Any]]], Any], id_recurso: Optional[int] = None) -> Any:
+        """
+        calcular(filas del día del recurso), memorizado hasta que cambie algún
+        turno de ese día y recurso. Cada recurso tiene su propia entrada, así
+        que reservar con un veterinario no invalida lo calculado para otro.
+        id_recurso None es la agenda general (turnos sin recurso), no el día
+        completo: el mismo alcance que la verificación de superposiciones.
+        """
+        clave = (dia, id_recurso)
+        with self._lock:
+            if clave not in self._derivados:
+                inicio = datetime.combine(dia, datetime.min.time())
+                filas = [
+                    fila for fila in self.get_rango(inicio, inicio + timedelta(days=1))
+                    if fila.get('id_recurso') == id_recurso
+                ]
+                self._derivados[clave] = calcular(filas)
+            return self._derivados[clave]
+    
+    
+    def add(self, fila: Dict[str, Any]) -> None:
+        self._apply(self._add, fila)
+    
+    
+    def update(self, turno_id: int, campos: Dict[str, Any]) -> bool:
+        """
+        Aplica los campos modificados de un turno. Devuelve False si el turno
+        no estaba en la agenda pero su nueva fecha cae en la ventana: el
+        llamador tiene que leer la fila completa y agregarla con add().
+        """
+        with self._lock:
+            if self._building:
+                self._pendientes.append((self._update, (turno_id, campos)))
+                return True
+            if not self._built:
+                return True
+            return self._update(turno_id, campos)
+    
+    
+    def remove(self, turno_id: int) -> None:
+        self._apply(self._remove, turno_id)
+    
+    
+    def escritura_confirmada(self) -> None:
+        """Una escritura de este proceso sumó 1 a la versión de la base"""
+        self._apply(self._sumar_version)
+    
+    
+    def duenio_cambiado(self, accion: str, id_duenio: int, campos: Optional[Dict[str, Any]] = None) -> None:
+        """Listener de DuenioModel: copia los datos nuevos o quita sus turnos (CASCADE)"""
+        if accion == 'eliminado':
+            self._apply(self._remove_duenio, id_duenio)
+        elif accion == 'actualizado' and campos:
+            cambios = {campo: campos[campo] for campo in CAMPOS_DUENIO if campo in campos}
+            if cambios:
+                self._apply(self._update_duenio, id_duenio, cambios)
+    
+    
+    def clear(self) -> None:
+        """Descarta la ventana; la próxima lectura la recarga"""
+        with self._lock:
+            self._built = False
+            self._desde = self._hasta = None
+            self._version = None
+            self._filas = {}
+            self._claves = []
+            self._derivados = {}
+    
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'desde': self._desde.date().isoformat() if self._desde else None,
+                'dias': self.dias,
+                'turnos': len(self._filas),
+                'version': self._version,
+                'edad_segundos': round(time.monotonic() - self._cargada_en, 1) if self._desde else None
+            }
+    
+    
+    def _cargar(self, datos: Tuple[datetime, datetime, Optional[int], List[Dict[str, Any]]]) -> None:
+        desde, hasta, version, filas = datos
+        self._desde, self._hasta = desde, hasta
+        self._filas = {fila['id']: dict(fila) for fila in filas}
+        self._claves = sorted((fila['fecha_turno'], fila['id']) for fila in filas)
+        self._derivados = {}
+        self._version = version
+        self._cargada_en = time.monotonic()
+        logger.info(f"Agenda cargada: {len(filas)} turnos entre {desde.date()} y {hasta.date()}")
+    
+    
+    def _en_ventana(self, fecha_turno: datetime) -> bool:
+        return self._desde <= fecha_turno < self._hasta
+    
+    
+    def _add(self, fila: Dict[str, Any]) -> None:
+        self._remove(fila['id'])
+        if not self._en_ventana(fila['fecha_turno']):
+            return
+        self._filas[fila['id']] = dict(fila)
+        bisect.insort(self._claves, (fila['fecha_turno'], fila['id']))
+        self._invalidar_derivados(fila)
+    
+    
+    def _update(self, turno_id: int, campos: Dict[str, Any]) -> bool:
+        fila = self._filas.get(turno_id)
+        if fila is None:
+            # Solo falta si la fecha nueva lo trae a la ventana
+            return not ('fecha_turno' in campos and self._en_ventana(campos['fecha_turno']))
+        self._add({**fila, **campos})
+        return True
+    
+    
+    def _remove(self, turno_id: int) -> None:
+        fila = self._filas.pop(turno_id, None)
+        if fila is None:
+            return
+        self._invalidar_derivados(fila)
+        clave = (fila['fecha_turno'], turno_id)
+        posicion = bisect.bisect_left(self._claves, clave)
+        if posicion < len(self._claves) and self._claves[posicion] == clave:
+            del self._claves[posicion]
+    
+    
+    def _invalidar_derivados(self, fila: Dict[str, Any]) -> None:
+        # Solo lo calculado para su recurso (o la agenda general) ese día
+        self._derivados.pop((fila['fecha_turno'].date(), fila.get('id_recurso')), None)
+    
+    
+    def _sumar_version(self) -> None:
+        if self._version is not None:
+            self._version += 1
+    
+    
+    def _update_duenio(self, id_duenio: int, cambios: Dict[str, Any]) -> None:
+        for fila in self._filas.values():
+            if fila['id_duenio'] == id_duenio:
+                fila.update(cambios)
+    
+    
+    def _remove_duenio(self, id_duenio: int) -> None:
+        for turno_id in [turno_id for turno_id, fila in self._filas.items() if fila['id_duenio'] == id_duenio]:
+            self._remove(turno_id)
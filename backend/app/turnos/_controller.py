@@ -2,16 +2,33 @@ import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
-from ._model import TurnoModel
+from ._model import TurnoModel, TRANSICIONES_VALIDAS, COLUMNAS_EXPORT
+from ._disponibilidad import horario_clinica
 from ..error_handlers import (
     create_success_response, 
+    create_cached_success_response, 
     create_error_response, 
     create_validation_error_response,
     safe_int_conversion
 )
+from ..database import StreamingNoDisponible
+from ..streaming import (
+    EXPORT_FORMATS, 
+    iniciar, 
+    create_export_response, 
+    create_streamed_list_response, 
+    create_streaming_unavailable_response
+)
 
 logger = logging.getLogger(__name__)
 
+COUNT_MODES = ['exact', 'estimate', 'none']
+
+MAX_BULK_IDS = 500
+
+# Una vista mensual con los días de las semanas vecinas entra con margen
+MAX_DIAS_RANGO = 62
+
 
 class TurnoController:
     
@@ -20,7 +37,7 @@ class TurnoController:
         logger.debug("TurnoController inicializado")
     
     
-    def get_all(self, limit: Optional[int] = None, offset: int = 0, estado: str = None, fecha_desde: str = None, fecha_hasta: str = None) -> tuple:
+    def get_all(self, limit: Optional[int] = None, offset: int = 0, estado: str = None, fecha_desde: str = None, fecha_hasta: str = None, cursor: str = None, count: str = 'exact') -> tuple:
         try:
             if limit is not None:
                 if limit <= 0 or limit > 100:
@@ -37,51 +54,82 @@ class TurnoController:
                     "Parámetro inválido"
                 )
             
-            if estado:
-                estados_validos = ['pendiente', 'confirmado', 'completado', 'cancelado']
-                if estado not in estados_validos:
-                    return create_error_response(
-                        f"Estado inválido. Debe ser uno de: {', '.join(estados_validos)}", 
-                        400, 
-                        "Parámetro inválido"
-                    )
+            if cursor and offset > 0:
+                return create_error_response(
+                    "No se puede combinar 'cursor' con 'offset'", 
+                    400, 
+                    "Parámetro inválido"
+                )
             
-            if fecha_desde:
-                try:
-                    datetime.strptime(fecha_desde, '%Y-%m-%d')
-                except ValueError:
-                    return create_error_response(
-                        "fecha_desde debe tener formato YYYY-MM-DD", 
-                        400, 
-                        "Formato de fecha inválido"
-                    )
+            if count not in COUNT_MODES:
+                return create_error_response(
+                    f"count inválido. Debe ser uno de: {', '.join(COUNT_MODES)}", 
+                    400, 
+                    "Parámetro inválido"
+                )
             
-            if fecha_hasta:
-                try:
-                    datetime.strptime(fecha_hasta, '%Y-%m-%d')
-                except ValueError:
-                    return create_error_response(
-                        "fecha_hasta debe tener formato YYYY-MM-DD", 
-                        400, 
-                        "Formato de fecha inválido"
-                    )
+            error_response = self._validar_filtros(estado, fecha_desde, fecha_hasta)
+            if error_response:
+                return error_response
             
-            turnos = self.turno_model.get_all(
-                limit=limit, 
-                offset=offset, 
-                estado=estado, 
-                fecha_desde=fecha_desde, 
-                fecha_hasta=fecha_hasta
-            )
+            # Sin límite la lista se envía en streaming, sin armarla en memoria
+            if limit is None:
+                try:
+                    turnos = iniciar(self.turno_model.iter_all(
+                        estado=estado, 
+                        fecha_desde=fecha_desde, 
+                        fecha_hasta=fecha_hasta,
+                        cursor=cursor
+                    ))
+                except ValueError as e:
+                    return create_error_response(str(e), 400, "Parámetro inválido")
+                except StreamingNoDisponible:
+                    # Sin lugar para otra lectura en streaming la lista se arma
+                    # en memoria con una conexión del pool, como una página
+                    turnos = None
+                
+                if turnos is not None:
+                    def metadata(cantidad):
+                        # Se enviaron todas las filas: el total es exacto sin contarlas aparte
+                        return {
+                            'total': cantidad if count != 'none' else None,
+                            'total_estimado': False,
+                            'count': cantidad,
+                            'offset': offset,
+                            'filters': {
+                                'estado': estado,
+                                'fecha_desde': fecha_desde,
+                                'fecha_hasta': fecha_hasta
+                            }
+                        }
+                    
+                    logger.info(f"Enviando todos los turnos en streaming (filters: {estado})")
+                    return create_streamed_list_response(
+                        'turnos', 
+                        turnos, 
+                        metadata, 
+                        "Turnos obtenidos correctamente"
+                    ), 200
+            
+            # Página y total en una sola conexión y snapshot
+            try:
+                page = self.turno_model.get_page(
+                    limit=limit, 
+                    offset=offset, 
+                    estado=estado, 
+                    fecha_desde=fecha_desde, 
+                    fecha_hasta=fecha_hasta,
+                    cursor=cursor,
+                    count=count
+                )
+            except ValueError as e:
+                return create_error_response(str(e), 400, "Parámetro inválido")
             
-            total_count = self.turno_model.get_count(
-                estado=estado, 
-                fecha_desde=fecha_desde, 
-                fecha_hasta=fecha_hasta
-            )
+            turnos = page['turnos']
             
             metadata = {
-                'total': total_count,
+                'total': page['total'],
+                'total_estimado': count == 'estimate',
                 'count': len(turnos),
                 'offset': offset,
                 'filters': {
@@ -93,7 +141,8 @@ class TurnoController:
             
             if limit:
                 metadata['limit'] = limit
-                metadata['has_more'] = (offset + limit) < total_count
+                metadata['has_more'] = page['has_more']
+                metadata['next_cursor'] = page['next_cursor']
             
             logger.info(f"Recuperado {len(turnos)} turnos (offset: {offset}, limit: {limit}, filters: {estado})")
             
@@ -114,6 +163,41 @@ class TurnoController:
             )
     
     
+    def export(self, formato: str = 'ndjson', estado: str = None, fecha_desde: str = None, fecha_hasta: str = None) -> tuple:
+        try:
+            if formato not in EXPORT_FORMATS:
+                return create_error_response(
+                    f"Formato inválido. Debe ser uno de: {', '.join(EXPORT_FORMATS)}", 
+                    400, 
+                    "Parámetro inválido"
+                )
+            
+            error_response = self._validar_filtros(estado, fecha_desde, fecha_hasta)
+            if error_response:
+                return error_response
+            
+            # La consulta corre al leer la primera fila: si falla todavía es un 500
+            try:
+                turnos = iniciar(self.turno_model.iter_all(
+                    estado=estado, 
+                    fecha_desde=fecha_desde, 
+                    fecha_hasta=fecha_hasta
+                ))
+            except StreamingNoDisponible:
+                return create_streaming_unavailable_response('turnos')
+            
+            logger.info(f"Exportando turnos en {formato} (filters: {estado}, {fecha_desde}, {fecha_hasta})")
+            return create_export_response(turnos, formato, 'turnos', COLUMNAS_EXPORT), 200
+            
+        except Exception as e:
+            logger.error(f"Error en export: {e}")
+            return create_error_response(
+                "Error al exportar los turnos", 
+                500, 
+                "Error interno"
+            )
+    
+    
     def get_one(self, turno_id: int) -> tuple:
         try:
             if not isinstance(turno_id, int) or turno_id <= 0:
@@ -148,18 +232,24 @@ class TurnoController:
             )
     
     
-    def create(self, data: Dict[str, Any]) -> tuple:
+    def create(self, data: Dict[str, Any], completo: bool = False) -> tuple:
         try:
             result = self.turno_model.create(data)
             
             if result['success']:
                 logger.info(f"Created turno ID: {result['turno_id']}")
                 
+                turno = result['data']
+                if completo:
+                    turno = self.turno_model.get_one(result['turno_id'])
+                
                 return create_success_response(
-                    data={'turno': result['data']},
+                    data={'turno': turno},
                     message="Turno creado correctamente",
                     status_code=201
                 )
+            elif result.get('error_code') == 'conflict':
+                return self._conflict_response(result)
             else:
                 return create_validation_error_response(
                     result['errors'], 
@@ -175,7 +265,65 @@ class TurnoController:
             )
     
     
-    def update(self, turno_id: int, data: Dict[str, Any]) -> tuple:
+    def create_bulk(self, data: Dict[str, Any]) -> tuple:
+        try:
+            # Lista de turnos, o un turno base que se repite según la recurrencia
+            if 'turnos' in data:
+                turnos_data = data['turnos']
+                if not isinstance(turnos_data, list) or not turnos_data:
+                    return create_error_response(
+                        "'turnos' debe ser una lista no vacía", 
+                        400, 
+                        "Parámetro inválido"
+                    )
+            elif 'turno' in data:
+                turnos_data = [data['turno']]
+            else:
+                return create_error_response(
+                    "Debe indicar 'turnos' o 'turno'", 
+                    400, 
+                    "Datos faltantes"
+                )
+            
+            if not all(isinstance(turno, dict) for turno in turnos_data):
+                return create_error_response(
+                    "Cada turno debe ser un objeto", 
+                    400, 
+                    "Parámetro inválido"
+                )
+            
+            result = self.turno_model.create_bulk(turnos_data, data.get('recurrencia'))
+            
+            if result['success']:
+                turnos = result['data']
+                logger.info(f"Created {len(turnos)} turnos in bulk")
+                
+                return create_success_response(
+                    data={
+                        'turnos': turnos,
+                        'count': len(turnos)
+                    },
+                    message=f"{len(turnos)} turnos creados correctamente",
+                    status_code=201
+                )
+            elif result.get('error_code') == 'conflict':
+                return self._conflict_response(result)
+            else:
+                return create_validation_error_response(
+                    result['errors'], 
+                    400
+                )
+                
+        except Exception as e:
+            logger.error(f"Error en create_bulk: {e}")
+            return create_error_response(
+                "Error al crear los turnos", 
+                500, 
+                "Error interno"
+            )
+    
+    
+    def update(self, turno_id: int, data: Dict[str, Any], completo: bool = False) -> tuple:
         try:
             if not isinstance(turno_id, int) or turno_id <= 0:
                 return create_error_response(
@@ -196,10 +344,17 @@ class TurnoController:
             if result['success']:
                 logger.info(f"Updated turno ID: {turno_id}")
                 
+                # Por defecto solo los campos modificados
+                turno = result['data']
+                if completo:
+                    turno = self.turno_model.get_one(turno_id)
+                
                 return create_success_response(
-                    data={'turno': result['data']},
+                    data={'turno': turno},
                     message="Turno actualizado correctamente"
                 )
+            elif result.get('error_code') == 'conflict':
+                return self._conflict_response(result)
             else:
                 return create_validation_error_response(
                     result['errors'], 
@@ -285,7 +440,7 @@ class TurnoController:
             )
     
     
-    def get_by_fecha(self, fecha: str, limit: int = 100) -> tuple:
+    def get_by_fecha(self, fecha: str, limit: int = 100, id_recurso: Optional[int] = None) -> tuple:
         try:
             try:
                 fecha_obj = datetime.strptime(fecha, '%Y-%m-%d')
@@ -299,7 +454,7 @@ class TurnoController:
             if limit <= 0 or limit > 200:
                 limit = 100  # Valor por defecto
             
-            turnos = self.turno_model.get_by_fecha(fecha, limit)
+            turnos = self.turno_model.get_by_fecha(fecha, limit, id_recurso)
             
             logger.info(f"Retrieved {len(turnos)} turnos for date: {fecha}")
             
@@ -310,7 +465,8 @@ class TurnoController:
                     'fecha_formateada': fecha_obj.strftime('%d/%m/%Y'),
                     'dia_semana': fecha_obj.strftime('%A'),
                     'count': len(turnos),
-                    'limit': limit
+                    'limit': limit,
+                    'id_recurso': id_recurso
                 },
                 message=f"Turnos de la fecha obtenidos correctamente: {len(turnos)} encontrados"
             )
@@ -324,7 +480,152 @@ class TurnoController:
             )
     
     
-    def update_estado(self, turno_id: int, nuevo_estado: str) -> tuple:
+    def get_by_rango(self, desde: str, hasta: str, limit: int = 1000, id_recurso: Optional[int] = None) -> tuple:
+        try:
+            if not desde or not hasta:
+                return create_error_response(
+                    "Los parámetros 'desde' y 'hasta' son requeridos", 
+                    400, 
+                    "Parámetro faltante"
+                )
+            
+            try:
+                desde_obj = datetime.strptime(desde, '%Y-%m-%d')
+                hasta_obj = datetime.strptime(hasta, '%Y-%m-%d')
+            except ValueError:
+                return create_error_response(
+                    "Las fechas deben tener formato YYYY-MM-DD", 
+                    400, 
+                    "Formato de fecha inválido"
+                )
+            
+            if hasta_obj < desde_obj:
+                return create_error_response(
+                    "'hasta' no puede ser anterior a 'desde'", 
+                    400, 
+                    "Parámetro inválido"
+                )
+            
+            dias = (hasta_obj - desde_obj).days + 1
+            if dias > MAX_DIAS_RANGO:
+                return create_error_response(
+                    f"El rango no puede superar los {MAX_DIAS_RANGO} días", 
+                    400, 
+                    "Parámetro inválido"
+                )
+            
+            if limit <= 0 or limit > 2000:
+                limit = 1000  # Valor por defecto
+            
+            rango = self.turno_model.get_by_rango(desde, hasta, limit, id_recurso)
+            
+            return create_success_response(
+                data={
+                    'dias': rango['dias'],
+                    'duenios': rango['duenios'],
+                    'desde': desde,
+                    'hasta': hasta,
+                    'count': rango['count'],
+                    'limit': limit,
+                    'has_more': rango['has_more'],
+                    'id_recurso': id_recurso
+                },
+                message=f"Turnos del rango obtenidos correctamente: {rango['count']} encontrados"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error en get_by_rango: {e}")
+            return create_error_response(
+                "Error al obtener turnos por rango", 
+                500, 
+                "Error interno"
+            )
+    
+    
+    def get_ocupacion(self, mes: str) -> tuple:
+        try:
+            try:
+                datetime.strptime(mes, '%Y-%m')
+            except (ValueError, TypeError):
+                return create_error_response(
+                    "El parámetro 'mes' debe tener formato YYYY-MM", 
+                    400, 
+                    "Formato de fecha inválido"
+                )
+            
+            dias = self.turno_model.get_ocupacion(mes)
+            
+            totales = {}
+            for estados in dias.values():
+                for estado, cantidad in estados.items():
+                    totales[estado] = totales.get(estado, 0) + cantidad
+            
+            # Con ETag: el calendario revalida el mes y recibe 304 si no cambió
+            return create_cached_success_response(
+                data={
+                    'mes': mes,
+                    'dias': dias,
+                    'totales': totales
+                },
+                message="Ocupación del mes obtenida correctamente"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error en get_ocupacion: {e}")
+            return create_error_response(
+                "Error al obtener la ocupación", 
+                500, 
+                "Error interno"
+            )
+    
+    
+    def get_disponibilidad(self, fecha: str, duracion: Optional[int] = None, id_recurso: Optional[int] = None) -> tuple:
+        try:
+            try:
+                fecha_obj = datetime.strptime(fecha, '%Y-%m-%d')
+            except (ValueError, TypeError):
+                return create_error_response(
+                    "Fecha debe tener formato YYYY-MM-DD", 
+                    400, 
+                    "Formato de fecha inválido"
+                )
+            
+            if duracion is None:
+                duracion = horario_clinica.duracion_turno
+            
+            if duracion <= 0 or duracion > 480:
+                return create_error_response(
+                    "La duración debe estar entre 1 y 480 minutos", 
+                    400, 
+                    "Parámetro inválido"
+                )
+            
+            slots = self.turno_model.get_disponibilidad(fecha, duracion, id_recurso)
+            
+            return create_success_response(
+                data={
+                    'fecha': fecha,
+                    'dia_semana': fecha_obj.strftime('%A'),
+                    'duracion': duracion,
+                    'id_recurso': id_recurso,
+                    'atiende': horario_clinica.atiende(fecha_obj.date()),
+                    'horario': horario_clinica.to_dict(),
+                    'slots': slots,
+                    'count': len(slots)
+                },
+                message=f"Disponibilidad obtenida correctamente: {len(slots)} horarios libres"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error en get_disponibilidad: {e}")
+            return create_error_response(
+                "Error al obtener la disponibilidad", 
+                500, 
+                "Error interno"
+            )
+    
+    
+    def update_estado(self, turno_id: int, nuevo_estado: str, completo: bool = False) -> tuple:
         try:
             if not isinstance(turno_id, int) or turno_id <= 0:
                 return create_error_response(
@@ -347,10 +648,30 @@ class TurnoController:
             if result['success']:
                 logger.info(f"Updated estado for turno ID: {turno_id} to: {nuevo_estado}")
                 
+                turno = result['data']
+                if completo:
+                    turno = self.turno_model.get_one(turno_id)
+                
                 return create_success_response(
-                    data={'turno': result['data']},
+                    data={'turno': turno},
                     message=result.get('message', 'Estado actualizado correctamente')
                 )
+            
+            error_code = result.get('error_code')
+            if error_code == 'not_found':
+                return create_error_response(
+                    result['errors'][0], 
+                    404, 
+                    "Recurso no encontrado"
+                )
+            elif error_code == 'invalid_transition':
+                return create_error_response(
+                    result['errors'][0], 
+                    409, 
+                    "Transición de estado inválida"
+                )
+            elif error_code == 'conflict':
+                return self._conflict_response(result)
             else:
                 return create_validation_error_response(
                     result['errors'], 
@@ -366,25 +687,131 @@ class TurnoController:
             )
     
     
-    def get_statistics(self) -> tuple:
+    def update_estado_bulk(self, data: Dict[str, Any]) -> tuple:
         try:
-            total_turnos = self.turno_model.get_count()
+            nuevo_estado = data.get('estado')
+            if not nuevo_estado or not isinstance(nuevo_estado, str) or not nuevo_estado.strip():
+                return create_error_response(
+                    "El campo 'estado' es requerido", 
+                    400, 
+                    "Datos faltantes"
+                )
             
-            estados = ['pendiente', 'confirmado', 'completado', 'cancelado']
-            stats_por_estado = {}
+            nuevo_estado = nuevo_estado.strip().lower()
             
-            for estado in estados:
-                count = self.turno_model.get_count(estado=estado)
-                stats_por_estado[estado] = count
+            ids = data.get('ids')
+            filtro = data.get('filtro')
             
-            fecha_hoy = datetime.now().strftime('%Y-%m-%d')
-            turnos_hoy = self.turno_model.get_count(fecha_desde=fecha_hoy, fecha_hasta=fecha_hoy)
+            if (ids is None) == (filtro is None):
+                return create_error_response(
+                    "Debe indicar 'ids' o 'filtro' (uno de los dos)", 
+                    400, 
+                    "Parámetro inválido"
+                )
             
-            stats = {
-                'total_turnos': total_turnos,
-                'por_estado': stats_por_estado,
-                'turnos_hoy': turnos_hoy
-            }
+            fecha = None
+            estado_actual = None
+            
+            if ids is not None:
+                if not isinstance(ids, list) or not ids:
+                    return create_error_response(
+                        "'ids' debe ser una lista no vacía", 
+                        400, 
+                        "Parámetro inválido"
+                    )
+                
+                if len(ids) > MAX_BULK_IDS:
+                    return create_error_response(
+                        f"No se pueden actualizar más de {MAX_BULK_IDS} turnos por request", 
+                        400, 
+                        "Parámetro inválido"
+                    )
+                
+                if not all(isinstance(turno_id, int) and not isinstance(turno_id, bool) and turno_id > 0 for turno_id in ids):
+                    return create_error_response(
+                        "Los ids deben ser números enteros positivos", 
+                        400, 
+                        "Parámetro inválido"
+                    )
+                
+                # Sin repetidos, conservando el orden pedido
+                ids = list(dict.fromkeys(ids))
+            else:
+                if not isinstance(filtro, dict) or not filtro.get('fecha'):
+                    return create_error_response(
+                        "El filtro requiere 'fecha' (YYYY-MM-DD)", 
+                        400, 
+                        "Parámetro inválido"
+                    )
+                
+                fecha = filtro['fecha']
+                try:
+                    datetime.strptime(fecha, '%Y-%m-%d')
+                except (TypeError, ValueError):
+                    return create_error_response(
+                        "Fecha debe tener formato YYYY-MM-DD", 
+                        400, 
+                        "Formato de fecha inválido"
+                    )
+                
+                estado_actual = filtro.get('estado')
+                if estado_actual and estado_actual not in TRANSICIONES_VALIDAS:
+                    return create_error_response(
+                        f"Estado inválido. Debe ser uno de: {', '.join(TRANSICIONES_VALIDAS)}", 
+                        400, 
+                        "Parámetro inválido"
+                    )
+            
+            result = self.turno_model.update_estado_bulk(
+                nuevo_estado,
+                ids=ids,
+                fecha=fecha,
+                estado_actual=estado_actual
+            )
+            
+            if not result['success'] and result.get('error_code') == 'conflict':
+                return self._conflict_response(result)
+            elif not result['success']:
+                return create_validation_error_response(
+                    result['errors'], 
+                    400
+                )
+            
+            resumen = result['data']['resumen']
+            actualizados = resumen.get('actualizado', 0)
+            
+            return create_success_response(
+                data=result['data'],
+                message=f"{actualizados} de {len(result['data']['resultados'])} turnos cambiados a '{nuevo_estado}'"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error en update_estado_bulk: {e}")
+            return create_error_response(
+                "Error al actualizar el estado de los turnos", 
+                500, 
+                "Error interno"
+            )
+    
+    
+    def get_statistics(self, desgloses: Optional[List[str]] = None, id_recurso: Optional[int] = None) -> tuple:
+        try:
+            desgloses = desgloses or []
+            
+            desgloses_validos = list(self.turno_model.statistics.DESGLOSES.keys())
+            invalidos = [d for d in desgloses if d not in desgloses_validos]
+            if invalidos:
+                return create_error_response(
+                    f"Desglose inválido: {', '.join(invalidos)}. Debe ser uno de: {', '.join(desgloses_validos)}", 
+                    400, 
+                    "Parámetro inválido"
+                )
+            
+            # Sin desgloses ni recurso las cifras base salen de los contadores de
+            # turnos_stats; los desgloses se agregan a pedido en una consulta
+            stats = self.turno_model.get_statistics(desgloses=desgloses, id_recurso=id_recurso)
+            if id_recurso is not None:
+                stats['id_recurso'] = id_recurso
             
             return create_success_response(
                 data={'statistics': stats},
@@ -397,4 +824,48 @@ class TurnoController:
                 "Error al obtener estadísticas", 
                 500, 
                 "Error interno"
-            )
\ No newline at end of file
+            )
+    
+    
+    def _validar_filtros(self, estado: Optional[str], fecha_desde: Optional[str], fecha_hasta: Optional[str]) -> Optional[tuple]:
+        # Filtros compartidos por el listado y la exportación
+        if estado:
+            estados_validos = ['pendiente', 'confirmado', 'completado', 'cancelado']
+            if estado not in estados_validos:
+                return create_error_response(
+                    f"Estado inválido. Debe ser uno de: {', '.join(estados_validos)}", 
+                    400, 
+                    "Parámetro inválido"
+                )
+        
+        if fecha_desde:
+            try:
+                datetime.strptime(fecha_desde, '%Y-%m-%d')
+            except ValueError:
+                return create_error_response(
+                    "fecha_desde debe tener formato YYYY-MM-DD", 
+                    400, 
+                    "Formato de fecha inválido"
+                )
+        
+        if fecha_hasta:
+            try:
+                datetime.strptime(fecha_hasta, '%Y-%m-%d')
+            except ValueError:
+                return create_error_response(
+                    "fecha_hasta debe tener formato YYYY-MM-DD", 
+                    400, 
+                    "Formato de fecha inválido"
+                )
+        
+        return None
+    
+    
+    def _conflict_response(self, result: Dict[str, Any]) -> tuple:
+        # 409 con los turnos que ocupan el horario pedido
+        return create_error_response(
+            result['errors'][0], 
+            409, 
+            "Conflicto de horario",
+            extra={'conflictos': result.get('conflictos', [])}
+        )
@@ -0,0 +1,117 @@
+import os
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _minutos(hora: str) -> int:
+    # 'HH:MM' -> minutos desde las 00:00
+    horas, minutos = hora.strip().split(':')
+    return int(horas) * 60 + int(minutos)
+
+
+def _hora(minutos: int) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+class HorarioClinica:
+    """
+    Horario de atención dividido en slots de `slot_minutos`. La ocupación de
+    un día es un entero usado como bitmap (bit i = slot que empieza en
+    i * slot_minutos), así que buscar huecos libres es un par de operaciones
+    de bits en lugar de una consulta por slot.
+    """
+    
+    def __init__(self, franjas: List[Tuple[int, int]], dias: List[int], slot_minutos: int = 30, duracion_turno: int = 30):
+        self.franjas = franjas
+        self.dias = dias
+        self.slot_minutos = slot_minutos
+        self.duracion_turno = duracion_turno
+        
+        # Slots dentro de alguna franja (igual todos los días de atención)
+        self._abierto = 0
+        for apertura, cierre in franjas:
+            for slot in range(apertura // slot_minutos, cierre // slot_minutos):
+                self._abierto |= 1 << slot
+    
+    
+    @classmethod
+    def from_env(cls) -> 'HorarioClinica':
+        """
+        CLINICA_HORARIO: franjas 'HH:MM-HH:MM' separadas por coma (fin excluido)
+        CLINICA_DIAS: días de atención, 0 = lunes ... 6 = domingo
+        """
+        horario = os.getenv('CLINICA_HORARIO', '09:00-13:30,17:00-20:30')
+        dias = os.getenv('CLINICA_DIAS', '0,1,2,3,4,5')
+        
+        franjas = []
+        for franja in horario.split(','):
+            apertura, cierre = franja.split('-')
+            franjas.append((_minutos(apertura), _minutos(cierre)))
+        
+        return cls(
+            franjas=franjas,
+            dias=[int(dia) for dia in dias.split(',') if dia.strip()],
+            slot_minutos=int(os.getenv('SLOT_MINUTOS', 30)),
+            duracion_turno=int(os.getenv('TURNO_DURACION_MINUTOS', 30))
+        )
+    
+    
+    def atiende(self, dia: date) -> bool:
+        return dia.weekday() in self.dias
+    
+    
+    def ocupacion(self, filas: List[Dict[str, Any]]) -> int:
+        """Bitmap de los slots ocupados por los turnos de un día (los cancelados no ocupan)"""
+        ocupado = 0
+        for fila in filas:
+            if fila['estado'] == 'cancelado':
+                continue
+            
+            fecha_turno = fila['fecha_turno']
+            inicio = fecha_turno.hour * 60 + fecha_turno.minute
+            fin = inicio + (fila.get('duracion_minutos') or self.duracion_turno)
+            
+            # Un turno que empieza o termina a mitad de un slot lo ocupa entero
+            primer_slot = inicio // self.slot_minutos
+            ultimo_slot = -(-fin // self.slot_minutos)
+            ocupado |= ((1 << (ultimo_slot - primer_slot)) - 1) << primer_slot
+        return ocupado
+    
+    
+    def slots_libres(self, dia: date, ocupado: int, duracion: Optional[int] = None, desde: Optional[datetime] = None) -> List[str]:
+        """Horarios de inicio ('HH:MM') con `duracion` minutos libres seguidos dentro de una franja"""
+        if not self.atiende(dia):
+            return []
+        
+        necesarios = -(-(duracion or self.duracion_turno) // self.slot_minutos)
+        libre = self._abierto & ~ocupado
+        
+        # Bit i queda prendido solo si los slots i .. i+necesarios-1 están libres
+        inicios = libre
+        for desplazamiento in range(1, necesarios):
+            inicios &= libre >> desplazamiento
+        
+        # Hoy no se ofrecen horarios que ya pasaron
+        if desde is not None and desde.date() == dia:
+            primer_slot = -(-(desde.hour * 60 + desde.minute + 1) // self.slot_minutos)
+            inicios &= ~((1 << primer_slot) - 1)
+        
+        slots = []
+        while inicios:
+            bit = inicios & -inicios
+            slots.append(_hora((bit.bit_length() - 1) * self.slot_minutos))
+            inicios ^= bit
+        return slots
+    
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'franjas': [f"{_hora(apertura)}-{_hora(cierre)}" for apertura, cierre in self.franjas],
+            'dias': self.dias,
+            'slot_minutos': self.slot_minutos,
+            'duracion_turno': self.duracion_turno
+        }
+
+
+# Configuración única del proceso, leída del entorno al iniciar
+horario_clinica = HorarioClinica.from_env()
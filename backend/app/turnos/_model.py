@@ -1,59 +1,244 @@
 import logging
-from typing import List, Dict, Optional, Any
-from datetime import datetime, date
+import os
+from typing import List, Dict, Optional, Any, Tuple, Callable, Iterator
+from datetime import datetime, date, timedelta
 from mysql.connector import Error as MySQLError
 
-from ..database import get_db_connection, execute_query, execute_transaction
-from ..validators import validate_turno_data, validate_turno_update_data
-from ..duenios._model import DuenioModel
+from ..database import (
+    get_db_connection,
+    execute_query,
+    execute_query_iter,
+    StreamingNoDisponible,
+    execute_transaction,
+    execute_locked_transaction,
+    execute_read_batch,
+    estimate_rows_from_explain,
+    on_commit
+)
+from ..validators import (
+    validate_turno_data,
+    validate_turno_update_data,
+    validate_recurrencia,
+    parse_datetime,
+    MAX_DURACION_MINUTOS
+)
+from ..pagination import encode_cursor, decode_cursor
+from ..counters import (
+    counter_delta_query,
+    turno_deltas,
+    turnos_delta_query,
+    turnos_cambio_query,
+    read_counters,
+    metrica_estado,
+    metrica_dia,
+    METRICA_TURNOS_TOTAL,
+    METRICA_AGENDA_VERSION
+)
+from ..duenios._model import DuenioModel, on_duenio_change
+from ..duenios._ids import duenio_ids
+from ..recursos._model import RecursoModel
+from ._agenda import TurnoAgenda
+from ._disponibilidad import horario_clinica
 
 logger = logging.getLogger(__name__)
 
+# Estado actual -> estados a los que puede pasar
+TRANSICIONES_VALIDAS = {
+    'pendiente': ['confirmado', 'cancelado'],
+    'confirmado': ['completado', 'cancelado'],
+    'completado': [],  # No se puede cambiar desde completado
+    'cancelado': ['pendiente']  # Se puede reagendar
+}
+
+
+# Máximo de turnos que puede crear un POST /turnos/bulk (recurrencias incluidas)
+MAX_TURNOS_BULK = 100
+
+# Lock wait timeout y deadlock: dos reservas compitiendo por el mismo rango horario
+LOCK_ERRNOS = (1205, 1213)
+
+# Columnas del CSV de exportación (_serialize_turno_with_duenio aplanado):
+# el encabezado se escribe aunque no haya filas
+COLUMNAS_EXPORT = [
+    'id', 'nombre_mascota', 'fecha_turno', 'duracion_minutos', 'fecha_fin', 'id_recurso',
+    'tratamiento', 'estado', 'dias_hasta_turno', 'created_at', 'updated_at',
+    'duenio_id', 'duenio_nombre_apellido', 'duenio_telefono', 'duenio_email', 'duenio_direccion'
+]
+
+# Turnos de los próximos días en memoria: get_by_fecha y get_by_rango los
+# resuelven sin consultar la base. Se mantiene con cada escritura confirmada
+turno_agenda = TurnoAgenda(
+    dias=int(os.getenv('AGENDA_DIAS', 7)),
+    max_edad=float(os.getenv('AGENDA_MAX_EDAD', 300))
+)
+on_duenio_change(turno_agenda.duenio_cambiado)
+
+# (consecutivos, paso) de los ids AUTO_INCREMENT; ver TurnoModel._autoincremento
+_config_autoincremento: Optional[Tuple[bool, int]] = None
+
+# Módulos que aprovechan un horario liberado (la lista de espera) se suscriben
+# acá; se les avisa después del commit con el horario que dejó libre un turno
+# (cancelado, reagendado o eliminado): turno_id, fecha_turno, fecha_fin, id_recurso.
+# Un cambio de estado no lee la fila: ese aviso lleva solo turno_id
+_turno_liberado_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+
+def on_turno_liberado(listener: Callable[[Dict[str, Any]], None]) -> None:
+    _turno_liberado_listeners.append(listener)
+
+
+def _notify_turno_liberado(turno_id: int, fila: Optional[Dict[str, Any]] = None) -> None:
+    horario = {'turno_id': turno_id}
+    if fila is not None:
+        # Solo los horarios futuros sirven para reasignar
+        if fila['fecha_turno'] <= datetime.now():
+            return
+        horario.update({
+            'fecha_turno': fila['fecha_turno'],
+            'fecha_fin': fila['fecha_fin'],
+            'id_recurso': fila['id_recurso']
+        })
+    for listener in _turno_liberado_listeners:
+        listener(horario)
+
+
+def origenes_validos(nuevo_estado: str) -> List[str]:
+    """Estados desde los que se puede pasar a nuevo_estado"""
+    return [origen for origen, destinos in TRANSICIONES_VALIDAS.items() if nuevo_estado in destinos]
+
+
+class TurnoStatistics:
+    """
+    Calcula todas las estadísticas de turnos en una única consulta agregada.
+    
+    Los totales generales, por estado y del día se obtienen agrupando por
+    (estado, es_hoy). Cada desglose registrado agrega su expresión al mismo
+    GROUP BY, de modo que pedir desgloses no suma consultas ni recorridos.
+    """
+    
+    ESTADOS = ['pendiente', 'confirmado', 'completado', 'cancelado']
+    
+    # nombre -> (expresión SQL, función para formatear la clave)
+    DESGLOSES = {
+        'semana': (
+            "YEARWEEK(t.fecha_turno, 3)",
+            lambda valor: f"{int(valor) // 100}-W{int(valor) % 100:02d}"
+        ),
+        'duenio': ("t.id_duenio", int),
+        'recurso': ("t.id_recurso", int),
+        'tratamiento': ("t.tratamiento", str)
+    }
+    
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+    
+    
+    @classmethod
+    def add_breakdown(cls, nombre: str, expresion: str, formatear=str) -> None:
+        cls.DESGLOSES[nombre] = (expresion, formatear)
+        logger.debug(f"Desglose de estadísticas registrado: {nombre}")
+    
+    
+    def from_counters(self) -> Dict[str, Any]:
+        """Cifras base leídas de turnos_stats: lecturas por clave, sin recorrer turnos"""
+        metrica_hoy = metrica_dia(date.today().isoformat())
+        metricas_estado = {estado: metrica_estado(estado) for estado in self.ESTADOS}
+        
+        valores = read_counters(
+            [METRICA_TURNOS_TOTAL, metrica_hoy] + list(metricas_estado.values())
+        )
+        
+        return {
+            'total_turnos': valores[METRICA_TURNOS_TOTAL],
+            'por_estado': {estado: valores[metrica] for estado, metrica in metricas_estado.items()},
+            'turnos_hoy': valores[metrica_hoy]
+        }
+    
+    
+    def compute(self, desgloses: List[str] = None, id_recurso: Optional[int] = None) -> Dict[str, Any]:
+        desgloses = desgloses or []
+        
+        for nombre in desgloses:
+            if nombre not in self.DESGLOSES:
+                raise ValueError(f"Desglose desconocido: {nombre}")
+        
+        columnas = "".join(
+            f"{self.DESGLOSES[nombre][0]} AS {nombre}, " for nombre in desgloses
+        )
+        agrupacion = ", ".join(['estado', 'es_hoy'] + desgloses)
+        
+        hoy = date.today()
+        params = (hoy, hoy + timedelta(days=1))
+        
+        # Por recurso: idx_recurso_fecha_fin acota el recorrido a sus turnos
+        filtro = ""
+        if id_recurso is not None:
+            filtro = "WHERE t.id_recurso = %s"
+            params += (id_recurso,)
+        
+        query = f"""
+            SELECT 
+                t.estado AS estado,
+                (t.fecha_turno >= %s AND t.fecha_turno < %s) AS es_hoy,
+                {columnas}COUNT(*) AS total
+            FROM {self.table_name} t
+            {filtro}
+            GROUP BY {agrupacion}
+        """
+        
+        rows = execute_query(query, params, fetch=True) or []
+        
+        stats = {
+            'total_turnos': 0,
+            'por_estado': {estado: 0 for estado in self.ESTADOS},
+            'turnos_hoy': 0
+        }
+        resultado_desgloses = {nombre: {} for nombre in desgloses}
+        
+        for row in rows:
+            cantidad = int(row['total'])
+            stats['total_turnos'] += cantidad
+            stats['por_estado'][row['estado']] = stats['por_estado'].get(row['estado'], 0) + cantidad
+            
+            if row['es_hoy']:
+                stats['turnos_hoy'] += cantidad
+            
+            for nombre in desgloses:
+                formatear = self.DESGLOSES[nombre][1]
+                clave = formatear(row[nombre]) if row[nombre] is not None else None
+                
+                grupo = resultado_desgloses[nombre].setdefault(clave, {
+                    'total': 0,
+                    'por_estado': {estado: 0 for estado in self.ESTADOS}
+                })
+                grupo['total'] += cantidad
+                grupo['por_estado'][row['estado']] = grupo['por_estado'].get(row['estado'], 0) + cantidad
+        
+        if desgloses:
+            stats['desgloses'] = resultado_desgloses
+        
+        logger.debug(f"Estadísticas calculadas en una consulta ({len(rows)} grupos)")
+        return stats
+
 
 class TurnoModel:
     
     def __init__(self):
         self.table_name = "turnos"
         self.duenio_model = DuenioModel()
+        self.recurso_model = RecursoModel()
+        self.statistics = TurnoStatistics(self.table_name)
         logger.debug("TurnoModel inicializado")
     
     
-    def get_all(self, limit: int = None, offset: int = 0, estado: str = None, fecha_desde: str = None, fecha_hasta: str = None) -> List[Dict[str, Any]]:
+    def get_all(self, limit: int = None, offset: int = 0, estado: str = None, fecha_desde: str = None, fecha_hasta: str = None, cursor: str = None) -> List[Dict[str, Any]]:
+        # El cursor se valida antes de tocar la base (ValueError si es inválido)
+        posicion = self._decode_cursor(cursor) if cursor else None
+        
         try:
-            query = f"""
-                SELECT 
-                    t.id, t.nombre_mascota, t.fecha_turno, t.tratamiento, 
-                    t.id_duenio, t.estado, t.created_at, t.updated_at,
-                    d.nombre_apellido, d.telefono, d.email, d.direccion
-                FROM {self.table_name} t
-                JOIN duenios d ON t.id_duenio = d.id
-                WHERE 1=1
-            """
-            
-            params = []
+            query, params = self._build_list_query(limit, offset, posicion, estado, fecha_desde, fecha_hasta)
             
-            # Agregar filtros dinámicamente
-            if estado:
-                query += " AND t.estado = %s"
-                params.append(estado)
-            
-            if fecha_desde:
-                query += " AND DATE(t.fecha_turno) >= %s"
-                params.append(fecha_desde)
-            
-            if fecha_hasta:
-                query += " AND DATE(t.fecha_turno) <= %s"
-                params.append(fecha_hasta)
-            
-            # Ordenar por fecha más reciente primero
-            query += " ORDER BY t.fecha_turno DESC"
-            
-            # Agregar paginación si se especifica
-            if limit is not None:
-                query += " LIMIT %s OFFSET %s"
-                params.extend([limit, offset])
-            
-            result = execute_query(query, tuple(params), fetch=True)
+            result = execute_query(query, params, fetch=True)
             
             # Serializar resultados
             turnos = [self._serialize_turno_with_duenio(row) for row in result] if result else []
@@ -69,6 +254,147 @@ class TurnoModel:
             raise
     
     
+    def iter_all(self, estado: str = None, fecha_desde: str = None, fecha_hasta: str = None, cursor: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Los mismos turnos que get_all sin límite, serializados de a uno a
+        medida que llegan del cursor sin buffer (exportaciones y listados completos)
+        """
+        # Se valida al pedir la primera fila (ValueError si es inválido)
+        posicion = self._decode_cursor(cursor) if cursor else None
+        
+        try:
+            query, params = self._build_list_query(None, 0, posicion, estado, fecha_desde, fecha_hasta)
+            
+            for row in execute_query_iter(query, params):
+                yield self._serialize_turno_with_duenio(row)
+            
+        except StreamingNoDisponible:
+            # No es un error: el llamador responde de otra forma (503 o en memoria)
+            raise
+        except MySQLError as e:
+            logger.error(f"MySQL error en iter_all: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en iter_all: {e}")
+            raise
+    
+    
+    def get_page(self, limit: int = None, offset: int = 0, estado: str = None, fecha_desde: str = None, fecha_hasta: str = None, cursor: str = None, count: str = 'exact') -> Dict[str, Any]:
+        """
+        Página de turnos y su total en una sola conexión. La página y el conteo
+        se leen dentro de una misma transacción de solo lectura, así que el total
+        es consistente con las filas devueltas.
+        
+        count: 'exact' (COUNT(*)), 'estimate' (estimación del optimizador) o 'none'.
+        """
+        # El cursor se valida antes de tocar la base (ValueError si es inválido)
+        posicion = self._decode_cursor(cursor) if cursor else None
+        
+        try:
+            # Se pide una fila extra para saber si hay más sin depender del total
+            limite_consulta = limit + 1 if limit is not None else None
+            queries = [
+                self._build_list_query(limite_consulta, offset, posicion, estado, fecha_desde, fecha_hasta)
+            ]
+            
+            filtros, filtros_params = self._build_filters(estado, fecha_desde, fecha_hasta)
+            if count == 'exact':
+                queries.append((
+                    f"SELECT COUNT(*) AS total FROM {self.table_name} t WHERE 1=1{filtros}",
+                    filtros_params
+                ))
+            elif count == 'estimate':
+                queries.append((
+                    f"EXPLAIN SELECT 1 FROM {self.table_name} t WHERE 1=1{filtros}",
+                    filtros_params
+                ))
+            
+            results = execute_read_batch(queries)
+            
+            rows = results[0]
+            has_more = limit is not None and len(rows) > limit
+            if has_more:
+                rows = rows[:limit]
+            
+            turnos = [self._serialize_turno_with_duenio(row) for row in rows]
+            
+            total = None
+            if count == 'exact':
+                total = results[1][0]['total'] if results[1] else 0
+            elif count == 'estimate':
+                total = estimate_rows_from_explain(results[1])
+            
+            logger.info(f"Retrieved page of {len(turnos)} turnos (count: {count})")
+            return {
+                'turnos': turnos,
+                'total': total,
+                'has_more': has_more,
+                'next_cursor': self.next_cursor(turnos, limit) if has_more else None
+            }
+            
+        except MySQLError as e:
+            logger.error(f"MySQL error en get_page: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en get_page: {e}")
+            raise
+    
+    
+    def _build_filters(self, estado: str = None, fecha_desde: str = None, fecha_hasta: str = None) -> Tuple[str, tuple]:
+        filtros = ""
+        params = []
+        
+        if estado:
+            filtros += " AND t.estado = %s"
+            params.append(estado)
+        
+        # Rango semiabierto sobre la columna sin funciones para usar el índice
+        if fecha_desde:
+            filtros += " AND t.fecha_turno >= %s"
+            params.append(self._inicio_dia(fecha_desde))
+        
+        if fecha_hasta:
+            filtros += " AND t.fecha_turno < %s"
+            params.append(self._inicio_dia(fecha_hasta) + timedelta(days=1))
+        
+        return filtros, tuple(params)
+    
+    
+    def _build_list_query(self, limit: Optional[int], offset: int, posicion: Optional[List[Any]], estado: str = None, fecha_desde: str = None, fecha_hasta: str = None) -> Tuple[str, tuple]:
+        filtros, filtros_params = self._build_filters(estado, fecha_desde, fecha_hasta)
+        
+        query = f"""
+            SELECT 
+                t.id, t.nombre_mascota, t.fecha_turno, t.tratamiento, 
+                t.duracion_minutos, t.fecha_fin, t.id_recurso,
+                t.id_duenio, t.estado, t.created_at, t.updated_at,
+                d.nombre_apellido, d.telefono, d.email, d.direccion
+            FROM {self.table_name} t
+            JOIN duenios d ON t.id_duenio = d.id
+            WHERE 1=1{filtros}
+        """
+        params = list(filtros_params)
+        
+        # Paginación por clave: continuar después de (fecha_turno, id) del cursor
+        if posicion:
+            query += " AND (t.fecha_turno < %s OR (t.fecha_turno = %s AND t.id < %s))"
+            params.extend([posicion[0], posicion[0], posicion[1]])
+        
+        # Ordenar por fecha más reciente primero (id desempata para un orden estable)
+        query += " ORDER BY t.fecha_turno DESC, t.id DESC"
+        
+        # Agregar paginación si se especifica
+        if limit is not None:
+            if posicion:
+                query += " LIMIT %s"
+                params.append(limit)
+            else:
+                query += " LIMIT %s OFFSET %s"
+                params.extend([limit, offset])
+        
+        return query, tuple(params)
+    
+    
     def get_one(self, turno_id: int) -> Optional[Dict[str, Any]]:
         try:
             if not isinstance(turno_id, int) or turno_id <= 0:
@@ -78,6 +404,7 @@ class TurnoModel:
             query = f"""
                 SELECT 
                     t.id, t.nombre_mascota, t.fecha_turno, t.tratamiento,
+                    t.duracion_minutos, t.fecha_fin, t.id_recurso,
                     t.id_duenio, t.estado, t.created_at, t.updated_at,
                     d.nombre_apellido, d.telefono, d.email, d.direccion
                 FROM {self.table_name} t
@@ -105,7 +432,7 @@ class TurnoModel:
     
     def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            validation_result = validate_turno_data(data, self.duenio_model.exists)
+            validation_result = validate_turno_data(data)
             
             if not validation_result['is_valid']:
                 logger.warning(f"Validation failed for create: {validation_result['errors']}")
@@ -114,24 +441,56 @@ class TurnoModel:
                     'errors': validation_result['errors']
                 }
             
+            # Si el bitmap confirma al dueño no hace falta leerlo antes del INSERT:
+            # la FK es la garantía final. Si no lo conoce se valida en la base
+            id_duenio = int(data['id_duenio'])
+            existe, duenio = duenio_ids.contains_or_load(id_duenio, self.duenio_model.get_one)
+            if not existe:
+                return {
+                    'success': False,
+                    'errors': [f"No existe un dueño con ID: {id_duenio}"]
+                }
+            
+            id_recurso = self._id_recurso(data)
+            if id_recurso is not None:
+                error = self._validar_recurso(id_recurso)
+                if error:
+                    return {
+                        'success': False,
+                        'errors': [error]
+                    }
+            
             estado = data.get('estado', 'pendiente')
+            duracion = int(data.get('duracion_minutos', horario_clinica.duracion_turno))
+            inicio = parse_datetime(data['fecha_turno'])
+            fin = inicio + timedelta(minutes=duracion)
             
             query = f"""
                 INSERT INTO {self.table_name} 
-                (nombre_mascota, fecha_turno, tratamiento, id_duenio, estado)
-                VALUES (%s, %s, %s, %s, %s)
+                (nombre_mascota, fecha_turno, duracion_minutos, tratamiento, id_duenio, estado, id_recurso)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
             """
             
             params = (
                 data['nombre_mascota'].strip(),
                 data['fecha_turno'],
+                duracion,
                 data['tratamiento'].strip(),
-                int(data['id_duenio']),
-                estado
+                id_duenio,
+                estado,
+                id_recurso
             )
             
-            # Ejecutar inserción
-            turno_id = execute_query(query, params)
+            # Bloquear el rango horario del recurso e insertar solo si no hay
+            # superposición; contadores en la misma transacción
+            rangos = [(inicio, fin, id_recurso)] if estado != 'cancelado' else []
+            conflictos, results = self._insert_sin_superposicion(rangos, [
+                (query, params),
+                counter_delta_query(turno_deltas(estado, data['fecha_turno'][:10]))
+            ])
+            if conflictos:
+                return self._conflict_result(conflictos)
+            turno_id = results[0]
             
             if not turno_id:
                 logger.error("Failed to create turno - no ID returned")
@@ -142,7 +501,38 @@ class TurnoModel:
 
             logger.info(f"Created new turno with ID: {turno_id}")
             
-            new_turno = self.get_one(turno_id)
+            # Datos del dueño para la respuesta: los leídos al validar o los del
+            # cache, sin otra consulta. Si no se conocen van en null (la fila
+            # completa sale de GET /turnos/<id>)
+            if duenio is None:
+                duenio = self.duenio_model.get_cached(id_duenio) or {}
+            
+            # Respuesta armada con los datos enviados, sin volver a leer la fila
+            ahora = datetime.now().replace(microsecond=0)
+            fila = {
+                'id': turno_id,
+                'nombre_mascota': params[0],
+                'fecha_turno': inicio,
+                'duracion_minutos': duracion,
+                'fecha_fin': fin,
+                'tratamiento': params[3],
+                'id_duenio': id_duenio,
+                'estado': estado,
+                'id_recurso': id_recurso,
+                'created_at': ahora,
+                'updated_at': ahora,
+                'nombre_apellido': duenio.get('nombre_apellido'),
+                'telefono': duenio.get('telefono'),
+                'email': duenio.get('email'),
+                'direccion': duenio.get('direccion')
+            }
+            new_turno = self._serialize_turno_with_duenio(fila)
+            self._agenda_modificada()
+            if duenio:
+                on_commit(lambda: turno_agenda.add(fila))
+            else:
+                # Sin los datos del dueño la agenda lee la fila, solo si cae en su ventana
+                on_commit(lambda: self._actualizar_agenda(turno_id, {'fecha_turno': inicio}))
             
             return {
                 'success': True,
@@ -159,6 +549,8 @@ class TurnoModel:
                     'success': False, 
                     'errors': ['El dueño especificado no existe']
                 }
+            elif e.errno in LOCK_ERRNOS:
+                return self._conflict_result([])
             else:
                 raise
                 
@@ -167,19 +559,187 @@ class TurnoModel:
             raise
     
     
-    def update(self, turno_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+    def create_bulk(self, turnos_data: List[Dict[str, Any]], recurrencia: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Crea varios turnos en una transacción con un único INSERT multi-fila.
+        Con `recurrencia` cada turno se repite cada N días/semanas, `cantidad`
+        veces o hasta la fecha `hasta`. Los dueños se validan una sola vez.
+        """
         try:
-            # Verificar que el turno existe
-            existing_turno = self.get_one(turno_id)
-            if not existing_turno:
+            if recurrencia is not None:
+                validation_result = validate_recurrencia(recurrencia)
+                if not validation_result['is_valid']:
+                    return {
+                        'success': False,
+                        'errors': validation_result['errors']
+                    }
+            
+            # Validación de formato por turno, sin consultar la base
+            errors = []
+            for i, data in enumerate(turnos_data):
+                validation_result = validate_turno_data(data)
+                errors.extend(f"Turno {i + 1}: {error}" for error in validation_result['errors'])
+            
+            if errors:
+                logger.warning(f"Validation failed for create_bulk: {errors}")
                 return {
                     'success': False,
-                    'errors': [f'No existe un turno con ID: {turno_id}']
+                    'errors': errors
+                }
+            
+            filas = []
+            for data in turnos_data:
+                for fecha_turno in self._expand_recurrencia(parse_datetime(data['fecha_turno']), recurrencia):
+                    filas.append((data, fecha_turno))
+            
+            if not filas:
+                return {
+                    'success': False,
+                    'errors': ['La recurrencia no genera ningún turno antes de la fecha límite']
                 }
             
+            if len(filas) > MAX_TURNOS_BULK:
+                return {
+                    'success': False,
+                    'errors': [f'No se pueden crear más de {MAX_TURNOS_BULK} turnos por request']
+                }
+            
+            # Una sola lectura para todos los dueños involucrados
+            ids_duenios = [int(data['id_duenio']) for data in turnos_data]
+            duenios = self.duenio_model.get_many(ids_duenios)
+            faltantes = [id_duenio for id_duenio in dict.fromkeys(ids_duenios) if id_duenio not in duenios]
+            if faltantes:
+                return {
+                    'success': False,
+                    'errors': [f"No existe un dueño con ID: {id_duenio}" for id_duenio in faltantes]
+                }
+            
+            # Cada recurso distinto se valida una vez
+            for id_recurso in dict.fromkeys(self._id_recurso(data) for data in turnos_data):
+                error = self._validar_recurso(id_recurso) if id_recurso is not None else None
+                if error:
+                    return {
+                        'success': False,
+                        'errors': [error]
+                    }
+            
+            params = []
+            deltas = {}
+            rangos = []
+            for data, fecha_turno in filas:
+                estado = data.get('estado', 'pendiente')
+                duracion = int(data.get('duracion_minutos', horario_clinica.duracion_turno))
+                id_recurso = self._id_recurso(data)
+                params.extend([
+                    data['nombre_mascota'].strip(),
+                    fecha_turno,
+                    duracion,
+                    data['tratamiento'].strip(),
+                    int(data['id_duenio']),
+                    estado,
+                    id_recurso
+                ])
+                for metrica, delta in turno_deltas(estado, fecha_turno.date().isoformat()).items():
+                    deltas[metrica] = deltas.get(metrica, 0) + delta
+                if estado != 'cancelado':
+                    rangos.append((fecha_turno, fecha_turno + timedelta(minutes=duracion), id_recurso))
+            
+            # Superposiciones dentro del mismo pedido, por recurso: ordenados por
+            # inicio, alcanza con comparar cada uno contra el fin más tardío anterior
+            fin_anterior = {}
+            for inicio, fin, id_recurso in sorted(rangos, key=lambda rango: rango[0]):
+                if id_recurso in fin_anterior and inicio < fin_anterior[id_recurso]:
+                    return {
+                        'success': False,
+                        'errors': [f"Los turnos del pedido se superponen el {inicio.strftime('%Y-%m-%d %H:%M')}"]
+                    }
+                fin_anterior[id_recurso] = max(fin_anterior.get(id_recurso, fin), fin)
+            
+            # Con ids consecutivos (innodb_autoinc_lock_mode 0 o 1) un INSERT
+            # multi-fila reserva todos sus ids de una vez: son el primero
+            # (lastrowid = LAST_INSERT_ID()) más i * auto_increment_increment.
+            # Si no, se valida antes de escribir y va un INSERT por fila
+            consecutivos, paso = self._autoincremento()
+            columnas = "(nombre_mascota, fecha_turno, duracion_minutos, tratamiento, id_duenio, estado, id_recurso)"
+            if consecutivos:
+                values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(filas))
+                inserts = [(f"INSERT INTO {self.table_name} {columnas} VALUES {values}", tuple(params))]
+            else:
+                inserts = [
+                    (f"INSERT INTO {self.table_name} {columnas} VALUES (%s, %s, %s, %s, %s, %s, %s)", tuple(params[i:i + 7]))
+                    for i in range(0, len(params), 7)
+                ]
+            
+            conflictos, results = self._insert_sin_superposicion(rangos, inserts + [counter_delta_query(deltas)])
+            if conflictos:
+                return self._conflict_result(conflictos)
+            
+            if consecutivos:
+                ids = [results[0] + i * paso for i in range(len(filas))]
+            else:
+                ids = results[:len(filas)]
+            
+            ahora = datetime.now().replace(microsecond=0)
+            nuevas = []
+            for turno_id, (data, fecha_turno) in zip(ids, filas):
+                duenio = duenios[int(data['id_duenio'])]
+                duracion = int(data.get('duracion_minutos', horario_clinica.duracion_turno))
+                nuevas.append({
+                    'id': turno_id,
+                    'nombre_mascota': data['nombre_mascota'].strip(),
+                    'fecha_turno': fecha_turno,
+                    'duracion_minutos': duracion,
+                    'fecha_fin': fecha_turno + timedelta(minutes=duracion),
+                    'tratamiento': data['tratamiento'].strip(),
+                    'id_duenio': duenio['id'],
+                    'estado': data.get('estado', 'pendiente'),
+                    'id_recurso': self._id_recurso(data),
+                    'created_at': ahora,
+                    'updated_at': ahora,
+                    'nombre_apellido': duenio['nombre_apellido'],
+                    'telefono': duenio['telefono'],
+                    'email': duenio['email'],
+                    'direccion': duenio['direccion']
+                })
+            
+            turnos = [self._serialize_turno_with_duenio(fila) for fila in nuevas]
+            self._agenda_modificada()
+            for fila in nuevas:
+                on_commit(lambda fila=fila: turno_agenda.add(fila))
+            # Dueños confirmados por la lectura: la próxima validación no consulta
+            for id_duenio in duenios:
+                on_commit(lambda id_duenio=id_duenio: duenio_ids.add(id_duenio))
+            
+            logger.info(f"Created {len(turnos)} turnos starting at ID: {ids[0]}")
+            
+            return {
+                'success': True,
+                'data': turnos
+            }
+                
+        except MySQLError as e:
+            logger.error(f"MySQL error en create_bulk: {e}")
+            
+            if e.errno == 1452:  # Foreign key constraint fails
+                return {
+                    'success': False, 
+                    'errors': ['El dueño especificado no existe']
+                }
+            elif e.errno in LOCK_ERRNOS:
+                return self._conflict_result([])
+            else:
+                raise
+                
+        except Exception as e:
+            logger.error(f"Unexpected error en create_bulk: {e}")
+            raise
+    
+    
+    def update(self, turno_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
             # Validar datos (solo los campos presentes)
             if data:
-                validation_result = validate_turno_update_data(data, self.duenio_model.exists)
+                validation_result = validate_turno_update_data(data)
                 if not validation_result['is_valid']:
                     logger.warning(f"Validation failed for update: {validation_result['errors']}")
                     return {
@@ -187,18 +747,32 @@ class TurnoModel:
                         'errors': validation_result['errors']
                     }
             
-            # Validación de lógica de negocio: solo permitir cambios de fecha si estado es 'pendiente'
-            if 'fecha_turno' in data and existing_turno['estado'] not in ['pendiente']:
-                return {
-                    'success': False,
-                    'errors': ['Solo se puede cambiar la fecha de turnos pendientes']
-                }
+            # Si cambia el dueño y el bitmap no lo conoce se valida en la base;
+            # la misma lectura completa la respuesta
+            duenio = None
+            if 'id_duenio' in data:
+                id_duenio = int(data['id_duenio'])
+                existe, duenio = duenio_ids.contains_or_load(id_duenio, self.duenio_model.get_one)
+                if not existe:
+                    return {
+                        'success': False,
+                        'errors': [f"No existe un dueño con ID: {id_duenio}"]
+                    }
+            
+            # id_recurso: null lo pasa a la agenda general
+            if self._id_recurso(data) is not None:
+                error = self._validar_recurso(self._id_recurso(data))
+                if error:
+                    return {
+                        'success': False,
+                        'errors': [error]
+                    }
             
             # Construir query UPDATE dinámicamente
             update_fields = []
             params = []
             
-            allowed_fields = ['nombre_mascota', 'fecha_turno', 'tratamiento', 'id_duenio', 'estado']
+            allowed_fields = ['nombre_mascota', 'fecha_turno', 'duracion_minutos', 'tratamiento', 'id_duenio', 'estado', 'id_recurso']
             
             for field in allowed_fields:
                 if field in data:
@@ -207,8 +781,10 @@ class TurnoModel:
                     # Procesamiento especial por campo
                     if field in ['nombre_mascota', 'tratamiento']:
                         params.append(data[field].strip())
-                    elif field == 'id_duenio':
+                    elif field in ['id_duenio', 'duracion_minutos']:
                         params.append(int(data[field]))
+                    elif field == 'id_recurso':
+                        params.append(self._id_recurso(data))
                     else:
                         params.append(data[field])
             
@@ -218,33 +794,95 @@ class TurnoModel:
                     'errors': ['No hay campos para actualizar']
                 }
             
-            # Agregar ID al final de los parámetros
+            # La existencia del turno y la regla de negocio (solo se cambia la
+            # fecha de turnos pendientes) se verifican en el mismo UPDATE
+            condiciones = "id = %s"
             params.append(turno_id)
+            if 'fecha_turno' in data:
+                condiciones += " AND estado = 'pendiente'"
             
             query = f"""
                 UPDATE {self.table_name}
                 SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP
-                WHERE id = %s
+                WHERE {condiciones}
             """
             
+            # Rango horario resultante, sea cual sea el estado: la respuesta y
+            # la agenda necesitan el fecha_fin nuevo aunque el turno se cancele
+            horario = None
+            ocupa_horario = False
+            cambia_horario = any(field in data for field in ['fecha_turno', 'duracion_minutos', 'id_recurso'])
+            actual = None
+            if cambia_horario or 'estado' in data:
+                actual = self._fila_bloqueada(turno_id)
+            if actual:
+                rango = self._horario_resultante(actual, data)
+                horario = rango if cambia_horario else None
+                # Verificar superposiciones si el turno no queda cancelado y cambia
+                # de horario o vuelve a ocuparlo (sale de 'cancelado')
+                ocupa_horario = (
+                    data.get('estado', actual['estado']) != 'cancelado'
+                    and (cambia_horario or actual['estado'] == 'cancelado')
+                )
+            
             # Ejecutar actualización
-            rows_affected = execute_query(query, tuple(params))
+            if (cambia_horario or 'estado' in data) and actual is None:
+                rows_affected = 0  # El turno no existe
+            elif ocupa_horario:
+                conflictos, results = self._update_sin_superposicion(turno_id, rango, [
+                    self._cambio_metricas_query(condiciones, turno_id, data),
+                    (query, tuple(params))
+                ])
+                if conflictos:
+                    return self._conflict_result(conflictos)
+                rows_affected = results[1]
+            elif 'estado' in data or 'fecha_turno' in data:
+                # Cambian métricas: los deltas netos en una sentencia, antes del UPDATE
+                results = execute_transaction([
+                    self._cambio_metricas_query(condiciones, turno_id, data),
+                    (query, tuple(params))
+                ])
+                rows_affected = results[1]
+            else:
+                rows_affected = execute_query(query, tuple(params))
             
             if rows_affected > 0:
                 logger.info(f"Updated turno ID: {turno_id}")
                 
-                # Obtener el registro actualizado
-                updated_turno = self.get_one(turno_id)
+                if 'id_duenio' in data and duenio is None:
+                    duenio = self.duenio_model.get_one(int(data['id_duenio']))
+                
+                # Solo los campos modificados; la fila completa se pide con ?completo=true
+                updated_turno = self._serialize_cambios(turno_id, data, duenio, horario)
+                cambios = self._agenda_cambios(data, duenio, horario)
+                self._agenda_modificada()
+                on_commit(lambda: self._actualizar_agenda(turno_id, cambios))
+                
+                # Deja libre su horario anterior si se cancela o cambia de horario
+                if actual and actual['estado'] != 'cancelado' and (cambia_horario or data.get('estado') == 'cancelado'):
+                    on_commit(lambda: _notify_turno_liberado(turno_id, actual))
                 
                 return {
                     'success': True,
                     'data': updated_turno
                 }
-            else:
+            
+            # Sin filas: distinguir turno inexistente de fecha no modificable
+            existing = execute_query(
+                f"SELECT estado FROM {self.table_name} WHERE id = %s",
+                (turno_id,),
+                fetch_one=True
+            )
+            if not existing:
                 return {
                     'success': False,
-                    'errors': ['No se pudo actualizar el turno']
+                    'errors': [f'No existe un turno con ID: {turno_id}']
                 }
+            
+            return {
+                'success': False,
+                'errors': ['Solo se puede cambiar la fecha de turnos pendientes']
+            }
                 
         except MySQLError as e:
             logger.error(f"MySQL error in update: {e}")
@@ -254,6 +892,8 @@ class TurnoModel:
                     'success': False,
                     'errors': ['El dueño especificado no existe']
                 }
+            elif e.errno in LOCK_ERRNOS:
+                return self._conflict_result([])
             else:
                 raise
                 
@@ -264,20 +904,24 @@ class TurnoModel:
     
     def delete(self, turno_id: int) -> Dict[str, Any]:
         try:
-            # Verificar que el turno existe
-            existing_turno = self.get_one(turno_id)
-            if not existing_turno:
-                return {
-                    'success': False,
-                    'errors': [f'No existe un turno con ID: {turno_id}']
-                }
+            # El horario que ocupaba, para ofrecerlo a la lista de espera
+            actual = self._fila_bloqueada(turno_id)
             
-            # Eliminar turno
+            # Eliminar turno descontándolo de los contadores.
+            # Si no existe no hay filas que descontar ni borrar.
             query = f"DELETE FROM {self.table_name} WHERE id = %s"
-            rows_affected = execute_query(query, (turno_id,))
+            results = execute_transaction([
+                turnos_delta_query("id = %s", (turno_id,), -1),
+                (query, (turno_id,))
+            ])
+            rows_affected = results[1]
             
             if rows_affected > 0:
                 logger.info(f"Deleted turno ID: {turno_id}")
+                self._agenda_modificada()
+                on_commit(lambda: turno_agenda.remove(turno_id))
+                if actual and actual['estado'] != 'cancelado':
+                    on_commit(lambda: _notify_turno_liberado(turno_id, actual))
                 return {
                     'success': True,
                     'message': f'Turno eliminado correctamente'
@@ -285,7 +929,7 @@ class TurnoModel:
             else:
                 return {
                     'success': False,
-                    'errors': ['No se pudo eliminar el turno']
+                    'errors': [f'No existe un turno con ID: {turno_id}']
                 }
                 
         except MySQLError as e:
@@ -306,6 +950,7 @@ class TurnoModel:
             query = f"""
                 SELECT 
                     t.id, t.nombre_mascota, t.fecha_turno, t.tratamiento,
+                    t.duracion_minutos, t.fecha_fin, t.id_recurso,
                     t.id_duenio, t.estado, t.created_at, t.updated_at,
                     d.nombre_apellido, d.telefono, d.email, d.direccion
                 FROM {self.table_name} t
@@ -331,28 +976,34 @@ class TurnoModel:
             raise
     
     
-    def get_by_fecha(self, fecha: str, limit: int = 100) -> List[Dict[str, Any]]:
+    def get_by_fecha(self, fecha: str, limit: int = 100, id_recurso: Optional[int] = None) -> List[Dict[str, Any]]:
         try:
             # Validar formato de fecha
             try:
-                datetime.strptime(fecha, '%Y-%m-%d')
+                inicio = self._inicio_dia(fecha)
             except ValueError:
                 logger.warning(f"Invalid date format: {fecha}")
                 return []
             
-            query = f"""
-                SELECT 
-                    t.id, t.nombre_mascota, t.fecha_turno, t.tratamiento,
-                    t.id_duenio, t.estado, t.created_at, t.updated_at,
-                    d.nombre_apellido, d.telefono, d.email, d.direccion
-                FROM {self.table_name} t
-                JOIN duenios d ON t.id_duenio = d.id
-                WHERE DATE(t.fecha_turno) = %s
-                ORDER BY t.fecha_turno ASC
-                LIMIT %s
-            """
-            
-            result = execute_query(query, (fecha, limit), fetch=True)
+            # Los días de la agenda en memoria no van a la base
+            result = self._filas_desde_agenda(inicio, inicio + timedelta(days=1), limit, id_recurso)
+            if result is None:
+                filtro_recurso, params_recurso = self._filtro_recurso(id_recurso)
+                query = f"""
+                    SELECT 
+                        t.id, t.nombre_mascota, t.fecha_turno, t.tratamiento,
+                        t.duracion_minutos, t.fecha_fin, t.id_recurso,
+                        t.id_duenio, t.estado, t.created_at, t.updated_at,
+                        d.nombre_apellido, d.telefono, d.email, d.direccion
+                    FROM {self.table_name} t
+                    JOIN duenios d ON t.id_duenio = d.id
+                    WHERE t.fecha_turno >= %s AND t.fecha_turno < %s{filtro_recurso}
+                    ORDER BY t.fecha_turno ASC
+                    LIMIT %s
+                """
+                
+                params = (inicio, inicio + timedelta(days=1)) + params_recurso + (limit,)
+                result = execute_query(query, params, fetch=True)
             
             # Serializar resultados
             turnos = [self._serialize_turno_with_duenio(row) for row in result] if result else []
@@ -368,101 +1019,371 @@ class TurnoModel:
             raise
     
     
-    def update_estado(self, turno_id: int, nuevo_estado: str) -> Dict[str, Any]:
+    def get_by_rango(self, desde: str, hasta: str, limit: int = 1000, id_recurso: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Turnos entre dos fechas (YYYY-MM-DD, ambas incluidas) agrupados por día,
+        con cada dueño una sola vez en 'duenios' en lugar de repetido en cada turno
+        """
         try:
-            # Verificar que el turno existe
-            existing_turno = self.get_one(turno_id)
-            if not existing_turno:
-                return {
-                    'success': False,
-                    'errors': [f'No existe un turno con ID: {turno_id}']
-                }
+            inicio = self._inicio_dia(desde)
+            fin = self._inicio_dia(hasta) + timedelta(days=1)
+            
+            # Desde la agenda si el rango entra en ella; si no, un solo recorrido
+            # de idx_fecha_turno_id. Se pide uno de más para has_more
+            result = self._filas_desde_agenda(inicio, fin, limit + 1, id_recurso)
+            if result is None:
+                filtro_recurso, params_recurso = self._filtro_recurso(id_recurso)
+                query = f"""
+                    SELECT 
+                        t.id, t.nombre_mascota, t.fecha_turno, t.tratamiento,
+                        t.duracion_minutos, t.fecha_fin, t.id_recurso,
+                        t.id_duenio, t.estado, t.created_at, t.updated_at,
+                        d.nombre_apellido, d.telefono, d.email, d.direccion
+                    FROM {self.table_name} t
+                    JOIN duenios d ON t.id_duenio = d.id
+                    WHERE t.fecha_turno >= %s AND t.fecha_turno < %s{filtro_recurso}
+                    ORDER BY t.fecha_turno ASC, t.id ASC
+                    LIMIT %s
+                """
+                
+                params = (inicio, fin) + params_recurso + (limit + 1,)
+                result = execute_query(query, params, fetch=True) or []
+            has_more = len(result) > limit
+            result = result[:limit]
+            
+            # Todos los días del rango, aunque no tengan turnos
+            dias = {}
+            dia = inicio.date()
+            while dia < fin.date():
+                dias[dia.isoformat()] = []
+                dia += timedelta(days=1)
+            
+            duenios = {}
+            for row in result:
+                turno = self._serialize_turno_with_duenio(row)
+                duenio = turno.pop('duenio')
+                duenios.setdefault(duenio['id'], duenio)
+                turno['id_duenio'] = duenio['id']
+                dias[row['fecha_turno'].date().isoformat()].append(turno)
+            
+            logger.info(f"Retrieved {len(result)} turnos between {desde} and {hasta}")
+            
+            return {
+                'dias': dias,
+                'duenios': duenios,
+                'count': len(result),
+                'has_more': has_more
+            }
+            
+        except MySQLError as e:
+            logger.error(f"MySQL error en get_by_rango: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en get_by_rango: {e}")
+            raise
+    
+    
+    def get_ocupacion(self, mes: str) -> Dict[str, Dict[str, int]]:
+        """Cantidad de turnos por día y estado de un mes (YYYY-MM); los días sin turnos no aparecen"""
+        try:
+            inicio = datetime.strptime(mes, '%Y-%m')
+            fin = (inicio + timedelta(days=32)).replace(day=1)
+            
+            # Resuelto solo con idx_fecha_estado (range scan, sin leer las filas)
+            query = f"""
+                SELECT DATE(fecha_turno) AS dia, estado, COUNT(*) AS cantidad
+                FROM {self.table_name}
+                WHERE fecha_turno >= %s AND fecha_turno < %s
+                GROUP BY dia, estado
+                ORDER BY dia
+            """
+            
+            result = execute_query(query, (inicio, fin), fetch=True) or []
+            
+            ocupacion = {}
+            for row in result:
+                ocupacion.setdefault(row['dia'].isoformat(), {})[row['estado']] = row['cantidad']
+            
+            logger.info(f"Retrieved occupancy for {len(ocupacion)} days of {mes}")
+            return ocupacion
+            
+        except MySQLError as e:
+            logger.error(f"MySQL error en get_ocupacion: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en get_ocupacion: {e}")
+            raise
+    
+    
+    def get_disponibilidad(self, fecha: str, duracion: Optional[int] = None, id_recurso: Optional[int] = None) -> List[str]:
+        """
+        Horarios de inicio libres de un día para un turno de `duracion` minutos.
+        Con `id_recurso` solo cuentan los turnos de ese recurso; sin él, los de
+        la agenda general (sin recurso). Es el mismo alcance que la verificación
+        de superposiciones, así que un horario libre se puede reservar.
+        """
+        try:
+            inicio = self._inicio_dia(fecha)
+            dia = inicio.date()
+            if not horario_clinica.atiende(dia):
+                return []
             
+            # Días de la agenda: bitmap por recurso memorizado en memoria. Otros días: una consulta
+            ocupado = None
+            try:
+                if turno_agenda.ensure_fresh(self._agenda_filas, self._agenda_version) and turno_agenda.cubre(inicio, inicio + timedelta(days=1)):
+                    ocupado = turno_agenda.derivado_dia(dia, horario_clinica.ocupacion, id_recurso)
+            except Exception as e:
+                logger.warning(f"⚠️ Agenda no disponible, se consulta la base: {e}")
+            
+            if ocupado is None:
+                filas = self._agenda_filas(inicio, inicio + timedelta(days=1))
+                filas = [fila for fila in filas if fila['id_recurso'] == id_recurso]
+                ocupado = horario_clinica.ocupacion(filas)
+            
+            return horario_clinica.slots_libres(dia, ocupado, duracion, desde=datetime.now())
+            
+        except MySQLError as e:
+            logger.error(f"MySQL error en get_disponibilidad: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en get_disponibilidad: {e}")
+            raise
+    
+    
+    def update_estado(self, turno_id: int, nuevo_estado: str) -> Dict[str, Any]:
+        try:
             # Validar estado válido
-            estados_validos = ['pendiente', 'confirmado', 'completado', 'cancelado']
+            estados_validos = list(TRANSICIONES_VALIDAS.keys())
             if nuevo_estado not in estados_validos:
                 return {
                     'success': False,
                     'errors': [f'Estado inválido. Debe ser uno de: {", ".join(estados_validos)}']
                 }
             
-            # Validar transiciones de estado (lógica de negocio)
-            estado_actual = existing_turno['estado']
+            # Compare-and-set: el UPDATE solo aplica si el turno sigue en el
+            # estado de origen, así que su rowcount dice también de qué estado
+            # venía. Con más de un origen posible se prueba uno por vez hasta
+            # que alguno aplique; la lectura queda para cuando ninguno aplica
+            query = f"""
+                UPDATE {self.table_name}
+                SET estado = %s, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND estado = %s
+            """
             
-            # Transiciones válidas
-            transiciones_validas = {
-                'pendiente': ['confirmado', 'cancelado'],
-                'confirmado': ['completado', 'cancelado'],  
-                'completado': [],  # No se puede cambiar desde completado
-                'cancelado': ['pendiente']  # Se puede reagendar
-            }
+            for origen in origenes_validos(nuevo_estado):
+                if origen == 'cancelado':
+                    # Salir de 'cancelado' vuelve a ocupar el horario: solo si
+                    # sigue libre, con el rango bloqueado hasta el commit
+                    conflictos = self._conflictos_al_reactivar("id = %s", (turno_id,))
+                    if conflictos.get(turno_id):
+                        return self._conflict_result(conflictos[turno_id])
+                
+                if execute_query(query, (nuevo_estado, turno_id, origen)) > 0:
+                    # Deltas conocidos: se anotan y se aplican antes del commit
+                    execute_query(*counter_delta_query({
+                        metrica_estado(origen): -1,
+                        metrica_estado(nuevo_estado): 1,
+                        METRICA_AGENDA_VERSION: 1
+                    }))
+                    logger.info(f"Updated turno ID: {turno_id} from '{origen}' to '{nuevo_estado}'")
+                    ahora = datetime.now().replace(microsecond=0)
+                    on_commit(turno_agenda.escritura_confirmada)
+                    on_commit(lambda: turno_agenda.update(turno_id, {'estado': nuevo_estado, 'updated_at': ahora}))
+                    if nuevo_estado == 'cancelado':
+                        # El horario lo resuelve el emparejador, fuera de la request
+                        on_commit(lambda: _notify_turno_liberado(turno_id))
+                    return {
+                        'success': True,
+                        'data': {
+                            'id': turno_id,
+                            'estado': nuevo_estado,
+                            'updated_at': ahora.isoformat()
+                        },
+                        'message': f'Estado cambiado de "{origen}" a "{nuevo_estado}"'
+                    }
             
-            if nuevo_estado != estado_actual and nuevo_estado not in transiciones_validas.get(estado_actual, []):
+            # Ningún UPDATE aplicó: una lectura para explicar por qué
+            existing_turno = self.get_one(turno_id)
+            if not existing_turno:
                 return {
                     'success': False,
-                    'errors': [f'No se puede cambiar de "{estado_actual}" a "{nuevo_estado}"']
+                    'error_code': 'not_found',
+                    'errors': [f'No existe un turno con ID: {turno_id}']
                 }
             
-            # Si es el mismo estado, no hacer nada
-            if nuevo_estado == estado_actual:
+            estado_actual = existing_turno['estado']
+            
+            # Si es el mismo estado, no hay nada que hacer
+            if estado_actual == nuevo_estado:
                 return {
                     'success': True,
                     'data': existing_turno,
                     'message': f'El turno ya está en estado "{nuevo_estado}"'
                 }
             
-            # Actualizar estado
-            query = f"""
+            return {
+                'success': False,
+                'error_code': 'invalid_transition',
+                'errors': [f'No se puede cambiar de "{estado_actual}" a "{nuevo_estado}"']
+            }
+                
+        except MySQLError as e:
+            logger.error(f"MySQL error en update_estado: {e}")
+            if e.errno in LOCK_ERRNOS:
+                return self._conflict_result([])
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en update_estado: {e}")
+            raise
+    
+    
+    def update_estado_bulk(self, nuevo_estado: str, ids: List[int] = None, fecha: str = None, estado_actual: str = None) -> Dict[str, Any]:
+        """
+        Aplica las reglas de update_estado a un conjunto de turnos en una sola
+        transacción: bloquea las filas, las clasifica y actualiza por estado de origen.
+        El conjunto se define por una lista de ids o por fecha (y opcionalmente estado actual).
+        """
+        try:
+            estados_validos = list(TRANSICIONES_VALIDAS.keys())
+            if nuevo_estado not in estados_validos:
+                return {
+                    'success': False,
+                    'errors': [f'Estado inválido. Debe ser uno de: {", ".join(estados_validos)}']
+                }
+            
+            if ids:
+                placeholders = ", ".join(["%s"] * len(ids))
+                where = f"id IN ({placeholders})"
+                params = tuple(ids)
+            else:
+                inicio = self._inicio_dia(fecha)
+                where = "fecha_turno >= %s AND fecha_turno < %s"
+                params = (inicio, inicio + timedelta(days=1))
+                if estado_actual:
+                    where += " AND estado = %s"
+                    params += (estado_actual,)
+            
+            # Orden por id: transacciones concurrentes bloquean en el mismo orden
+            lock_query = f"""
+                SELECT id, estado, fecha_turno, fecha_fin, id_recurso FROM {self.table_name}
+                WHERE {where}
+                ORDER BY id
+                FOR UPDATE
+            """
+            
+            update_query = f"""
                 UPDATE {self.table_name}
                 SET estado = %s, updated_at = CURRENT_TIMESTAMP
-                WHERE id = %s
+                WHERE id IN ({{}}) AND estado = %s
             """
             
-            rows_affected = execute_query(query, (nuevo_estado, turno_id))
+            resultados = {}
             
-            if rows_affected > 0:
-                logger.info(f"Updated turno ID: {turno_id} from '{estado_actual}' to '{nuevo_estado}'")
-                
-                # Obtener el registro actualizado
-                updated_turno = self.get_one(turno_id)
+            # Los que salen de 'cancelado' vuelven a ocupar su horario: los que
+            # se superponen con otro turno quedan como están
+            conflictos = {}
+            if 'cancelado' in origenes_validos(nuevo_estado):
+                conflictos = self._conflictos_al_reactivar(where, params)
+            
+            def build_queries(rows):
+                por_origen = {}
+                for row in rows:
+                    origen = row['estado']
+                    resultado = {'id': row['id'], 'estado_anterior': origen}
+                    
+                    if origen == nuevo_estado:
+                        resultado.update(resultado='sin_cambios', estado=origen)
+                    elif origen == 'cancelado' and conflictos.get(row['id']):
+                        resultado.update(
+                            resultado='conflicto',
+                            estado=origen,
+                            error='El horario se superpone con otros turnos',
+                            conflictos=[otro['id'] for otro in conflictos[row['id']]]
+                        )
+                    elif nuevo_estado in TRANSICIONES_VALIDAS.get(origen, []):
+                        resultado.update(resultado='actualizado', estado=nuevo_estado)
+                        por_origen.setdefault(origen, []).append(row['id'])
+                    else:
+                        resultado.update(
+                            resultado='transicion_invalida',
+                            estado=origen,
+                            error=f'No se puede cambiar de "{origen}" a "{nuevo_estado}"'
+                        )
+                    resultados[row['id']] = resultado
                 
-                return {
-                    'success': True,
-                    'data': updated_turno,
-                    'message': f'Estado cambiado de "{estado_actual}" a "{nuevo_estado}"'
-                }
-            else:
-                return {
-                    'success': False,
-                    'errors': ['No se pudo actualizar el estado del turno']
+                # Un UPDATE por estado de origen; las filas están bloqueadas,
+                # así que los deltas de los contadores se conocen de antemano
+                # y se aplican juntos en una sola sentencia al final
+                queries = []
+                deltas = {}
+                for origen, ids_origen in por_origen.items():
+                    placeholders = ", ".join(["%s"] * len(ids_origen))
+                    queries.append((
+                        update_query.format(placeholders),
+                        (nuevo_estado, *ids_origen, origen)
+                    ))
+                    deltas[metrica_estado(origen)] = -len(ids_origen)
+                    deltas[metrica_estado(nuevo_estado)] = deltas.get(metrica_estado(nuevo_estado), 0) + len(ids_origen)
+                if deltas:
+                    deltas[METRICA_AGENDA_VERSION] = 1
+                    queries.append(counter_delta_query(deltas))
+                return queries
+            
+            filas, _ = execute_locked_transaction(lock_query, params, build_queries)
+            filas = {row['id']: row for row in filas}
+            
+            ahora = datetime.now().replace(microsecond=0)
+            if any(resultado['resultado'] == 'actualizado' for resultado in resultados.values()):
+                on_commit(turno_agenda.escritura_confirmada)
+            for turno_id, resultado in resultados.items():
+                if resultado['resultado'] == 'actualizado':
+                    on_commit(lambda turno_id=turno_id: turno_agenda.update(
+                        turno_id, {'estado': nuevo_estado, 'updated_at': ahora}
+                    ))
+                    if nuevo_estado == 'cancelado':
+                        on_commit(lambda turno_id=turno_id: _notify_turno_liberado(turno_id, filas[turno_id]))
+            
+            # Resultados en el orden pedido; con filtro, en orden de id
+            orden = ids if ids else sorted(resultados.keys())
+            lista = [
+                resultados.get(turno_id, {
+                    'id': turno_id,
+                    'resultado': 'no_encontrado',
+                    'error': f'No existe un turno con ID: {turno_id}'
+                })
+                for turno_id in orden
+            ]
+            
+            resumen = {}
+            for resultado in lista:
+                resumen[resultado['resultado']] = resumen.get(resultado['resultado'], 0) + 1
+            
+            logger.info(f"Bulk estado -> '{nuevo_estado}': {resumen}")
+            return {
+                'success': True,
+                'data': {
+                    'resultados': lista,
+                    'resumen': resumen
                 }
-                
+            }
+            
         except MySQLError as e:
-            logger.error(f"MySQL error en update_estado: {e}")
+            logger.error(f"MySQL error en update_estado_bulk: {e}")
+            if e.errno in LOCK_ERRNOS:
+                return self._conflict_result([])
             raise
         except Exception as e:
-            logger.error(f"Unexpected error en update_estado: {e}")
+            logger.error(f"Unexpected error en update_estado_bulk: {e}")
             raise
     
     
     def get_count(self, estado: str = None, fecha_desde: str = None, fecha_hasta: str = None) -> int:
         try:
-            query = f"SELECT COUNT(*) as total FROM {self.table_name} WHERE 1=1"
-            params = []
-            
-            if estado:
-                query += " AND estado = %s"
-                params.append(estado)
-            
-            if fecha_desde:
-                query += " AND DATE(fecha_turno) >= %s"
-                params.append(fecha_desde)
+            filtros, params = self._build_filters(estado, fecha_desde, fecha_hasta)
+            query = f"SELECT COUNT(*) as total FROM {self.table_name} t WHERE 1=1{filtros}"
             
-            if fecha_hasta:
-                query += " AND DATE(fecha_turno) <= %s"
-                params.append(fecha_hasta)
-            
-            result = execute_query(query, tuple(params), fetch_one=True)
+            result = execute_query(query, params, fetch_one=True)
             return result['total'] if result else 0
             
         except MySQLError as e:
@@ -473,6 +1394,358 @@ class TurnoModel:
             raise
     
     
+    def get_statistics(self, desgloses: List[str] = None, id_recurso: Optional[int] = None) -> Dict[str, Any]:
+        try:
+            # Sin desgloses ni recurso alcanza con los contadores mantenidos en turnos_stats
+            if not desgloses and id_recurso is None:
+                return self.statistics.from_counters()
+            
+            return self.statistics.compute(desgloses, id_recurso)
+            
+        except MySQLError as e:
+            logger.error(f"MySQL error en get_statistics: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error en get_statistics: {e}")
+            raise
+    
+    
+    def _expand_recurrencia(self, primera: datetime, recurrencia: Optional[Dict[str, Any]]) -> List[datetime]:
+        if not recurrencia:
+            return [primera]
+        
+        cada = int(recurrencia.get('cada', 1))
+        paso = timedelta(weeks=cada) if recurrencia.get('unidad', 'dias') == 'semanas' else timedelta(days=cada)
+        
+        if 'cantidad' in recurrencia:
+            # Se corta apenas se supera el máximo: el error se informa igual
+            cantidad = min(int(recurrencia['cantidad']), MAX_TURNOS_BULK + 1)
+            return [primera + paso * i for i in range(cantidad)]
+        
+        # 'hasta' incluye el día indicado completo
+        limite = self._inicio_dia(recurrencia['hasta']) + timedelta(days=1)
+        fechas = []
+        fecha = primera
+        while fecha < limite and len(fechas) <= MAX_TURNOS_BULK:
+            fechas.append(fecha)
+            fecha += paso
+        return fechas
+    
+    
+    def _autoincremento(self) -> Tuple[bool, int]:
+        """
+        (ids consecutivos en un INSERT multi-fila, auto_increment_increment),
+        leídos una vez por proceso: son configuración del servidor
+        """
+        global _config_autoincremento
+        if _config_autoincremento is None:
+            row = execute_query(
+                "SELECT @@innodb_autoinc_lock_mode AS modo, @@auto_increment_increment AS paso",
+                fetch_one=True
+            )
+            _config_autoincremento = (int(row['modo']) in (0, 1), int(row['paso']))
+            if not _config_autoincremento[0]:
+                logger.warning("⚠️ innodb_autoinc_lock_mode no garantiza ids consecutivos: los lotes se insertan fila por fila")
+        return _config_autoincremento
+    
+    
+    def _superposicion_query(self, rangos: List[Tuple[datetime, datetime, Optional[int]]], excluir_id: Optional[int] = None) -> Tuple[str, tuple]:
+        """
+        SELECT ... FOR UPDATE de los turnos no cancelados del mismo recurso que
+        se superponen con algún rango [inicio, fin). Un turno que termina
+        después de `inicio` empezó como mucho MAX_DURACION_MINUTOS antes, así
+        que cada rango es un range scan acotado de idx_recurso_fecha_fin:
+        O(log n) más los turnos de esa ventana, sin importar los años de
+        historia de la tabla. Solo se bloquea el rango de ese recurso (next-key
+        locks), así que reservas de distintos veterinarios no se esperan entre sí.
+        """
+        condiciones = []
+        params = []
+        for inicio, fin, id_recurso in rangos:
+            # <=>: los turnos sin recurso comparten la agenda general
+            condiciones.append("(id_recurso <=> %s AND fecha_turno > %s AND fecha_turno < %s AND fecha_fin > %s)")
+            params.extend([id_recurso, inicio - timedelta(minutes=MAX_DURACION_MINUTOS), fin, inicio])
+        
+        filtros = [f"({' OR '.join(condiciones)})", "estado <> 'cancelado'"]
+        if excluir_id is not None:
+            filtros.append("id <> %s")
+            params.append(excluir_id)
+        
+        query = f"""
+            SELECT id, nombre_mascota, fecha_turno, duracion_minutos, fecha_fin, estado, id_duenio, id_recurso
+            FROM {self.table_name}
+            WHERE {' AND '.join(filtros)}
+            ORDER BY fecha_turno
+            FOR UPDATE
+        """
+        
+        return query, tuple(params)
+    
+    
+    def _insert_sin_superposicion(self, rangos: List[Tuple[datetime, datetime, Optional[int]]], queries: List[Tuple[str, tuple]]) -> Tuple[List[Dict[str, Any]], List[Any]]:
+        # Devuelve (conflictos, resultados); con conflictos no se ejecuta nada
+        if not rangos:
+            return [], execute_transaction(queries)
+        
+        lock_query, lock_params = self._superposicion_query(rangos)
+        return execute_locked_transaction(lock_query, lock_params, lambda rows: [] if rows else queries)
+    
+    
+    def _conflictos_al_reactivar(self, where: str, params: tuple) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Para los turnos cancelados que cumplen `where`: id -> turnos con los
+        que se superpondrían si se reactivan. Bloquea sus filas y los
+        rangos horarios hasta el fin de la transacción. Entre los del mismo
+        pedido, el de menor id se queda con el horario.
+        """
+        candidatos = execute_query(
+            f"""
+                SELECT id, fecha_turno, fecha_fin, id_recurso FROM {self.table_name}
+                WHERE ({where}) AND estado = 'cancelado'
+                ORDER BY id
+                FOR UPDATE
+            """,
+            params,
+            fetch=True
+        ) or []
+        if not candidatos:
+            return {}
+        
+        lock_query, lock_params = self._superposicion_query(
+            [(row['fecha_turno'], row['fecha_fin'], row['id_recurso']) for row in candidatos]
+        )
+        ocupados = execute_query(lock_query, lock_params, fetch=True) or []
+        
+        def superpuestos(a, b):
+            return a['id_recurso'] == b['id_recurso'] and a['fecha_turno'] < b['fecha_fin'] and b['fecha_turno'] < a['fecha_fin']
+        
+        conflictos = {}
+        reactivados = []
+        for row in candidatos:
+            otros = [otro for otro in ocupados + reactivados if superpuestos(row, otro)]
+            if otros:
+                conflictos[row['id']] = otros
+            else:
+                reactivados.append(row)
+        return conflictos
+    
+    
+    def _fila_bloqueada(self, turno_id: int) -> Optional[Dict[str, Any]]:
+        # Horario y estado actuales, bloqueados hasta el fin de la transacción:
+        # la decisión de verificar superposiciones no cambia antes del UPDATE
+        return execute_query(
+            f"""
+                SELECT id, estado, fecha_turno, duracion_minutos, fecha_fin, id_recurso
+                FROM {self.table_name} WHERE id = %s FOR UPDATE
+            """,
+            (turno_id,),
+            fetch_one=True
+        )
+    
+    
+    def _horario_resultante(self, actual: Dict[str, Any], data: Dict[str, Any]) -> Tuple[datetime, datetime, int, Optional[int]]:
+        """(inicio, fin, duracion, id_recurso) de la fila `actual` después de aplicar `data`"""
+        inicio = parse_datetime(data['fecha_turno']) if 'fecha_turno' in data else actual['fecha_turno']
+        duracion = int(data['duracion_minutos']) if 'duracion_minutos' in data else actual['duracion_minutos']
+        id_recurso = self._id_recurso(data) if 'id_recurso' in data else actual['id_recurso']
+        return inicio, inicio + timedelta(minutes=duracion), duracion, id_recurso
+    
+    
+    def _update_sin_superposicion(self, turno_id: int, horario: Tuple[datetime, datetime, int, Optional[int]], queries: List[Tuple[str, tuple]]) -> Tuple[List[Dict[str, Any]], List[Any]]:
+        """Como _insert_sin_superposicion para un turno existente que pasa a ocupar `horario`"""
+        inicio, fin, _, id_recurso = horario
+        lock_query, lock_params = self._superposicion_query([(inicio, fin, id_recurso)], excluir_id=turno_id)
+        return execute_locked_transaction(lock_query, lock_params, lambda rows: [] if rows else queries)
+    
+    
+    def _cambio_metricas_query(self, condiciones: str, turno_id: int, data: Dict[str, Any]) -> Tuple[str, tuple]:
+        # Mismas condiciones que el UPDATE: los deltas solo se aplican si el UPDATE aplica
+        fecha = parse_datetime(data['fecha_turno']).date().isoformat() if 'fecha_turno' in data else None
+        return turnos_cambio_query(condiciones, (turno_id,), estado=data.get('estado'), fecha=fecha)
+    
+    
+    def _id_recurso(self, data: Dict[str, Any]) -> Optional[int]:
+        # Ausente o null = agenda general
+        return int(data['id_recurso']) if data.get('id_recurso') is not None else None
+    
+    
+    def _validar_recurso(self, id_recurso: int) -> Optional[str]:
+        # Desde el cache de recursos; la FK sigue siendo la garantía final
+        recurso = self.recurso_model.get_one(id_recurso)
+        if not recurso:
+            return f"No existe un recurso con ID: {id_recurso}"
+        if not recurso['activo']:
+            return f"El recurso '{recurso['nombre']}' no está activo"
+        return None
+    
+    
+    def _conflict_result(self, conflictos: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Sin conflictos visibles = otra transacción tenía el rango bloqueado (deadlock/timeout)
+        mensaje = (
+            'El horario se superpone con otros turnos' if conflictos
+            else 'Otro turno se está reservando en el mismo horario; intente nuevamente'
+        )
+        return {
+            'success': False,
+            'error_code': 'conflict',
+            'errors': [mensaje],
+            'conflictos': [
+                {
+                    'id': row['id'],
+                    'nombre_mascota': row['nombre_mascota'],
+                    'fecha_turno': row['fecha_turno'].isoformat(),
+                    'fecha_fin': row['fecha_fin'].isoformat(),
+                    'duracion_minutos': row['duracion_minutos'],
+                    'estado': row['estado'],
+                    'id_duenio': row['id_duenio'],
+                    'id_recurso': row['id_recurso']
+                }
+                for row in conflictos
+            ]
+        }
+    
+    
+    def _agenda_filas(self, desde: datetime, hasta: datetime, turno_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Filas crudas (turno + dueño) para la agenda: una ventana de fechas o un turno"""
+        condicion, params = "t.fecha_turno >= %s AND t.fecha_turno < %s", (desde, hasta)
+        if turno_id is not None:
+            condicion += " AND t.id = %s"
+            params += (turno_id,)
+        
+        query = f"""
+            SELECT 
+                t.id, t.nombre_mascota, t.fecha_turno, t.tratamiento,
+                t.duracion_minutos, t.fecha_fin, t.id_recurso,
+                t.id_duenio, t.estado, t.created_at, t.updated_at,
+                d.nombre_apellido, d.telefono, d.email, d.direccion
+            FROM {self.table_name} t
+            JOIN duenios d ON t.id_duenio = d.id
+            WHERE {condicion}
+        """
+        return execute_query(query, params, fetch=True) or []
+    
+    
+    def _filas_desde_agenda(self, inicio: datetime, fin: datetime, limit: int, id_recurso: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        # None si el rango no entra en la agenda o no se pudo cargar: el llamador consulta la base
+        try:
+            if turno_agenda.ensure_fresh(self._agenda_filas, self._agenda_version) and turno_agenda.cubre(inicio, fin):
+                return turno_agenda.get_rango(inicio, fin, limit, id_recurso)
+        except Exception as e:
+            logger.warning(f"⚠️ Agenda no disponible, se consulta la base: {e}")
+        return None
+    
+    
+    def _filtro_recurso(self, id_recurso: Optional[int]) -> Tuple[str, tuple]:
+        if id_recurso is None:
+            return "", ()
+        return " AND t.id_recurso = %s", (id_recurso,)
+    
+    
+    def _agenda_cambios(self, data: Dict[str, Any], duenio: Optional[Dict[str, Any]], horario: Optional[Tuple[datetime, datetime, int, Optional[int]]] = None) -> Dict[str, Any]:
+        # Campos de la fila cruda que cambian con un update (mismas claves que el SELECT)
+        cambios = {'updated_at': datetime.now().replace(microsecond=0)}
+        if horario:
+            cambios['fecha_turno'], cambios['fecha_fin'], cambios['duracion_minutos'], _ = horario
+        for field in ['nombre_mascota', 'tratamiento']:
+            if field in data:
+                cambios[field] = data[field].strip()
+        if 'estado' in data:
+            cambios['estado'] = data['estado']
+        if 'fecha_turno' in data:
+            cambios['fecha_turno'] = parse_datetime(data['fecha_turno'])
+        if 'id_recurso' in data:
+            cambios['id_recurso'] = self._id_recurso(data)
+        if 'id_duenio' in data:
+            cambios['id_duenio'] = int(data['id_duenio'])
+            for field in ['nombre_apellido', 'telefono', 'email', 'direccion']:
+                cambios[field] = (duenio or {}).get(field)
+        return cambios
+    
+    
+    def _agenda_version(self) -> int:
+        return read_counters([METRICA_AGENDA_VERSION])[METRICA_AGENDA_VERSION]
+    
+    
+    def _agenda_modificada(self) -> None:
+        # Un turno cambió: sube la versión que comparan las agendas de los demás
+        # workers; el delta se aplica con los contadores, antes del commit
+        execute_query(*counter_delta_query({METRICA_AGENDA_VERSION: 1}))
+        on_commit(turno_agenda.escritura_confirmada)
+    
+    
+    def _actualizar_agenda(self, turno_id: int, cambios: Dict[str, Any]) -> None:
+        # Si el turno entra a la ventana por un cambio de fecha se lee la fila completa
+        if not turno_agenda.update(turno_id, cambios):
+            fecha = cambios['fecha_turno']
+            inicio = self._inicio_dia(fecha.date().isoformat())
+            for fila in self._agenda_filas(inicio, inicio + timedelta(days=1), turno_id):
+                turno_agenda.add(fila)
+    
+    
+    def _inicio_dia(self, fecha: str) -> datetime:
+        # 'YYYY-MM-DD' -> datetime a las 00:00, límite inferior de un rango semiabierto
+        return datetime.strptime(fecha, '%Y-%m-%d')
+    
+    
+    def next_cursor(self, turnos: List[Dict[str, Any]], limit: Optional[int]) -> Optional[str]:
+        # Solo hay página siguiente posible si la actual vino completa
+        if limit is None or len(turnos) < limit:
+            return None
+        
+        ultimo = turnos[-1]
+        return encode_cursor([ultimo['fecha_turno'], ultimo['id']])
+    
+    
+    def _decode_cursor(self, cursor: str) -> List[Any]:
+        fecha_turno, turno_id = decode_cursor(cursor, 2)
+        
+        if not isinstance(turno_id, int) or not isinstance(fecha_turno, str):
+            raise ValueError("Cursor inválido")
+        
+        try:
+            fecha = datetime.fromisoformat(fecha_turno)
+        except ValueError:
+            raise ValueError("Cursor inválido")
+        
+        return [fecha, turno_id]
+    
+    
+    def _serialize_cambios(self, turno_id: int, data: Dict[str, Any], duenio: Optional[Dict[str, Any]] = None, horario: Optional[Tuple[datetime, datetime, int, Optional[int]]] = None) -> Dict[str, Any]:
+        # Misma forma que _serialize_turno_with_duenio, pero solo con los campos enviados
+        cambios = {'id': turno_id}
+        
+        for field in ['nombre_mascota', 'tratamiento']:
+            if field in data:
+                cambios[field] = data[field].strip()
+        
+        if 'estado' in data:
+            cambios['estado'] = data['estado']
+        
+        if 'fecha_turno' in data:
+            fecha_turno = parse_datetime(data['fecha_turno'])
+            cambios['fecha_turno'] = fecha_turno.isoformat()
+            cambios['dias_hasta_turno'] = (fecha_turno.date() - date.today()).days
+        
+        if horario:
+            cambios['duracion_minutos'] = horario[2]
+            cambios['fecha_fin'] = horario[1].isoformat()
+        
+        if 'id_recurso' in data:
+            cambios['id_recurso'] = self._id_recurso(data)
+        
+        if duenio:
+            cambios['duenio'] = {
+                'id': duenio['id'],
+                'nombre_apellido': duenio['nombre_apellido'],
+                'telefono': duenio['telefono'],
+                'email': duenio['email'],
+                'direccion': duenio['direccion']
+            }
+        
+        cambios['updated_at'] = datetime.now().replace(microsecond=0).isoformat()
+        return cambios
+    
+    
     def _serialize_turno_with_duenio(self, row: Dict[str, Any]) -> Dict[str, Any]:
         if not row:
             return {}
@@ -490,6 +1763,9 @@ class TurnoModel:
             'id': row['id'],
             'nombre_mascota': row['nombre_mascota'],
             'fecha_turno': row['fecha_turno'].isoformat() if row.get('fecha_turno') else None,
+            'duracion_minutos': row.get('duracion_minutos'),
+            'fecha_fin': row['fecha_fin'].isoformat() if row.get('fecha_fin') else None,
+            'id_recurso': row.get('id_recurso'),
             'tratamiento': row['tratamiento'],
             'estado': row['estado'],
             'dias_hasta_turno': dias_hasta_turno,
@@ -21,6 +21,18 @@ def before_request():
     log_request_info()
 
 
+def parse_recurso_param():
+    # ?recurso=<id> opcional de las vistas de agenda: (id_recurso, error_response)
+    recurso_param = request.args.get('recurso')
+    if not recurso_param:
+        return None, None
+    
+    id_recurso, error = safe_int_conversion(recurso_param, 'recurso')
+    if error:
+        return None, create_error_response(error, 400, "Parámetro inválido")
+    return id_recurso, None
+
+
 @turnos_bp.route('/turnos', methods=['GET'])
 def get_all_turnos():
     try:
@@ -29,6 +41,8 @@ def get_all_turnos():
         estado = request.args.get('estado')
         fecha_desde = request.args.get('fecha_desde')
         fecha_hasta = request.args.get('fecha_hasta')
+        cursor = request.args.get('cursor')
+        count = request.args.get('count', 'exact')
         
         limit = None
         if limit_param:
@@ -45,7 +59,9 @@ def get_all_turnos():
             offset=offset, 
             estado=estado, 
             fecha_desde=fecha_desde, 
-            fecha_hasta=fecha_hasta
+            fecha_hasta=fecha_hasta,
+            cursor=cursor,
+            count=count
         )
         return response_data, status_code
         
@@ -58,6 +74,27 @@ def get_all_turnos():
         )
 
 
+@turnos_bp.route('/turnos/export', methods=['GET'])
+def export_turnos():
+    try:
+        # ?format=ndjson|csv con los mismos filtros que el listado
+        response_data, status_code = turnos_controller.export(
+            formato=request.args.get('format', 'ndjson'),
+            estado=request.args.get('estado'),
+            fecha_desde=request.args.get('fecha_desde'),
+            fecha_hasta=request.args.get('fecha_hasta')
+        )
+        return response_data, status_code
+        
+    except Exception as e:
+        logger.error(f"Error en export_turnos route: {e}")
+        return create_error_response(
+            "Error interno del servidor", 
+            500, 
+            "Error interno"
+        )
+
+
 @turnos_bp.route('/turnos/<int:turno_id>', methods=['GET'])
 def get_turno(turno_id):
     try:
@@ -80,7 +117,8 @@ def create_turno():
         if error_response:
             return error_response
         
-        response_data, status_code = turnos_controller.create(json_data)
+        completo = request.args.get('completo', 'false').lower() == 'true'
+        response_data, status_code = turnos_controller.create(json_data, completo=completo)
         return response_data, status_code
         
     except Exception as e:
@@ -92,6 +130,25 @@ def create_turno():
         )
 
 
+@turnos_bp.route('/turnos/bulk', methods=['POST'])
+def create_turnos_bulk():
+    try:
+        json_data, error_response = validate_json_request()
+        if error_response:
+            return error_response
+        
+        response_data, status_code = turnos_controller.create_bulk(json_data)
+        return response_data, status_code
+        
+    except Exception as e:
+        logger.error(f"Error en create_turnos_bulk route: {e}")
+        return create_error_response(
+            "Error interno del servidor", 
+            500, 
+            "Error interno"
+        )
+
+
 @turnos_bp.route('/turnos/<int:turno_id>', methods=['PUT'])
 def update_turno(turno_id):
     try:
@@ -100,8 +157,11 @@ def update_turno(turno_id):
         if error_response:
             return error_response
         
+        # ?completo=true devuelve la fila releída en lugar de solo los cambios
+        completo = request.args.get('completo', 'false').lower() == 'true'
+        
         # Llamar al controlador
-        response_data, status_code = turnos_controller.update(turno_id, json_data)
+        response_data, status_code = turnos_controller.update(turno_id, json_data, completo=completo)
         return response_data, status_code
         
     except Exception as e:
@@ -162,7 +222,11 @@ def get_turnos_by_fecha(fecha):
         if error:
             limit = 100  # Valor por defecto si hay error
         
-        response_data, status_code = turnos_controller.get_by_fecha(fecha, limit)
+        id_recurso, error_response = parse_recurso_param()
+        if error_response:
+            return error_response
+        
+        response_data, status_code = turnos_controller.get_by_fecha(fecha, limit, id_recurso)
         return response_data, status_code
         
     except Exception as e:
@@ -174,6 +238,92 @@ def get_turnos_by_fecha(fecha):
         )
 
 
+@turnos_bp.route('/turnos/rango', methods=['GET'])
+def get_turnos_by_rango():
+    try:
+        desde = request.args.get('desde', '').strip()
+        hasta = request.args.get('hasta', '').strip()
+        limit_param = request.args.get('limit', '1000')
+        
+        limit, error = safe_int_conversion(limit_param, 'limit')
+        if error:
+            limit = 1000  # Valor por defecto si hay error
+        
+        id_recurso, error_response = parse_recurso_param()
+        if error_response:
+            return error_response
+        
+        response_data, status_code = turnos_controller.get_by_rango(desde, hasta, limit, id_recurso)
+        return response_data, status_code
+        
+    except Exception as e:
+        logger.error(f"Error en get_turnos_by_rango route: {e}")
+        return create_error_response(
+            "Error interno del servidor", 
+            500, 
+            "Error interno"
+        )
+
+
+@turnos_bp.route('/turnos/ocupacion', methods=['GET'])
+def get_turnos_ocupacion():
+    try:
+        mes = request.args.get('mes', '').strip()
+        
+        if not mes:
+            return create_error_response(
+                "El parámetro 'mes' es requerido", 
+                400, 
+                "Parámetro faltante"
+            )
+        
+        response_data, status_code = turnos_controller.get_ocupacion(mes)
+        return response_data, status_code
+        
+    except Exception as e:
+        logger.error(f"Error en get_turnos_ocupacion route: {e}")
+        return create_error_response(
+            "Error interno del servidor", 
+            500, 
+            "Error interno"
+        )
+
+
+@turnos_bp.route('/turnos/disponibilidad', methods=['GET'])
+def get_turnos_disponibilidad():
+    try:
+        fecha = request.args.get('fecha', '').strip()
+        duracion_param = request.args.get('duracion')
+        
+        if not fecha:
+            return create_error_response(
+                "El parámetro 'fecha' es requerido", 
+                400, 
+                "Parámetro faltante"
+            )
+        
+        duracion = None
+        if duracion_param:
+            duracion, error = safe_int_conversion(duracion_param, 'duracion')
+            if error:
+                return create_error_response(error, 400, "Parámetro inválido")
+        
+        id_recurso, error_response = parse_recurso_param()
+        if error_response:
+            return error_response
+        
+        response_data, status_code = turnos_controller.get_disponibilidad(fecha, duracion, id_recurso)
+        return response_data, status_code
+        
+    except Exception as e:
+        logger.error(f"Error en get_turnos_disponibilidad route: {e}")
+        return create_error_response(
+            "Error interno del servidor", 
+            500, 
+            "Error interno"
+        )
+
+
 @turnos_bp.route('/turnos/<int:turno_id>/estado', methods=['PUT'])
 def update_turno_estado(turno_id):
     try:
@@ -190,7 +340,8 @@ def update_turno_estado(turno_id):
                 "Datos faltantes"
             )
         
-        response_data, status_code = turnos_controller.update_estado(turno_id, nuevo_estado)
+        completo = request.args.get('completo', 'false').lower() == 'true'
+        response_data, status_code = turnos_controller.update_estado(turno_id, nuevo_estado, completo=completo)
         return response_data, status_code
         
     except Exception as e:
@@ -202,10 +353,37 @@ def update_turno_estado(turno_id):
         )
 
 
+@turnos_bp.route('/turnos/estado', methods=['PUT'])
+def update_turnos_estado_bulk():
+    try:
+        json_data, error_response = validate_json_request()
+        if error_response:
+            return error_response
+        
+        response_data, status_code = turnos_controller.update_estado_bulk(json_data)
+        return response_data, status_code
+        
+    except Exception as e:
+        logger.error(f"Error en update_turnos_estado_bulk route: {e}")
+        return create_error_response(
+            "Error interno del servidor", 
+            500, 
+            "Error interno"
+        )
+
+
 @turnos_bp.route('/turnos/statistics', methods=['GET'])
 def get_turnos_statistics():
     try:
-        response_data, status_code = turnos_controller.get_statistics()
+        # Desgloses opcionales separados por coma: ?desglose=semana,duenio
+        desglose_param = request.args.get('desglose', '')
+        desgloses = [d.strip() for d in desglose_param.split(',') if d.strip()]
+        
+        id_recurso, error_response = parse_recurso_param()
+        if error_response:
+            return error_response
+        
+        response_data, status_code = turnos_controller.get_statistics(desgloses, id_recurso)
         return response_data, status_code
         
     except Exception as e:
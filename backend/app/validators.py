@@ -1,7 +1,18 @@
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any, List, Optional, Dict
 
+# Límites de la duración de un turno. El máximo acota además la búsqueda de
+# superposiciones: un turno que termina después de X empezó como mucho
+# MAX_DURACION_MINUTOS antes de X
+MIN_DURACION_MINUTOS = 5
+MAX_DURACION_MINUTOS = 480
+
+TIPOS_RECURSO = ['veterinario', 'consultorio']
+
+# Ventana máxima de una solicitud de lista de espera
+MAX_DIAS_LISTA_ESPERA = 31
+
 
 def validate_required(value: Any, field_name: str) -> Optional[str]:
     if value is None or value == "":
@@ -42,6 +53,11 @@ def validate_phone(phone: str) -> Optional[str]:
     return None
 
 
+def normalize_phone(phone: str) -> str:
+    # Solo los dígitos: "+54 (11) 4567-8901" -> "541145678901"
+    return re.sub(r'\D', '', phone or '')
+
+
 def validate_length(value: str, min_len: int, max_len: int, field_name: str) -> Optional[str]:
     if not isinstance(value, str):
         return f"El campo '{field_name}' debe ser texto"
@@ -79,13 +95,8 @@ def validate_datetime(date_str: str, field_name: str = "fecha") -> Optional[str]
     return f"Formato de {field_name} inválido. Use: YYYY-MM-DD HH:MM:SS"
 
 
-def validate_future_datetime(date_str: str, field_name: str = "fecha") -> Optional[str]:
-    # Primero validar formato
-    format_error = validate_datetime(date_str, field_name)
-    if format_error:
-        return format_error
-    
-    # Convertir a datetime
+def parse_datetime(date_str: str) -> Optional[datetime]:
+    # Mismos formatos que acepta validate_datetime
     formats = [
         "%Y-%m-%d %H:%M:%S",
         "%Y-%m-%d %H:%M",
@@ -93,14 +104,23 @@ def validate_future_datetime(date_str: str, field_name: str = "fecha") -> Option
         "%Y-%m-%dT%H:%M"
     ]
     
-    parsed_date = None
     for fmt in formats:
         try:
-            parsed_date = datetime.strptime(date_str, fmt)
-            break
+            return datetime.strptime(date_str, fmt)
         except ValueError:
             continue
     
+    return None
+
+
+def validate_future_datetime(date_str: str, field_name: str = "fecha") -> Optional[str]:
+    # Primero validar formato
+    format_error = validate_datetime(date_str, field_name)
+    if format_error:
+        return format_error
+    
+    parsed_date = parse_datetime(date_str)
+    
     if parsed_date and parsed_date <= datetime.now():
         return f"La {field_name} debe ser futura"
     
@@ -210,6 +230,16 @@ def validate_turno_data(data: Dict, duenio_exists_func=None) -> Dict[str, Any]:
         validate_integer(data['id_duenio'], 'id_duenio', min_val=1)
     ]
     
+    if 'duracion_minutos' in data:
+        validations.append(validate_integer(
+            data['duracion_minutos'], 'duracion_minutos',
+            min_val=MIN_DURACION_MINUTOS, max_val=MAX_DURACION_MINUTOS
+        ))
+    
+    # id_recurso: opcional, null = agenda general
+    if data.get('id_recurso') is not None:
+        validations.append(validate_integer(data['id_recurso'], 'id_recurso', min_val=1))
+    
     # Validar estado si está presente (opcional en create, requerido en update)
     if 'estado' in data:
         estado_error = validate_enum(data['estado'], estados_validos, 'estado')
@@ -249,6 +279,15 @@ def validate_turno_update_data(data: Dict, duenio_exists_func=None) -> Dict[str,
     if 'tratamiento' in data:
         validations.append(validate_length(data['tratamiento'], 3, 1000, 'tratamiento'))
     
+    if 'duracion_minutos' in data:
+        validations.append(validate_integer(
+            data['duracion_minutos'], 'duracion_minutos',
+            min_val=MIN_DURACION_MINUTOS, max_val=MAX_DURACION_MINUTOS
+        ))
+    
+    if data.get('id_recurso') is not None:
+        validations.append(validate_integer(data['id_recurso'], 'id_recurso', min_val=1))
+    
     if 'id_duenio' in data:
         validations.append(validate_integer(data['id_duenio'], 'id_duenio', min_val=1))
         
@@ -271,4 +310,112 @@ def validate_turno_update_data(data: Dict, duenio_exists_func=None) -> Dict[str,
     return {
         'is_valid': len(errors) == 0,
         'errors': errors
-    }
\ No newline at end of file
+    }
+
+
+def validate_recurso_data(data: Dict, parcial: bool = False) -> Dict[str, Any]:
+    errors = []
+    
+    # En un update solo se validan los campos presentes
+    if not parcial:
+        required_errors = validate_fields_required(data, ['nombre', 'tipo'])
+        if required_errors:
+            return {'is_valid': False, 'errors': required_errors}
+    
+    validations = []
+    
+    if 'nombre' in data:
+        validations.append(validate_length(data['nombre'], 2, 80, 'nombre'))
+    
+    if 'tipo' in data:
+        validations.append(validate_enum(data['tipo'], TIPOS_RECURSO, 'tipo'))
+    
+    if 'activo' in data and not isinstance(data['activo'], bool):
+        errors.append("El campo 'activo' debe ser true o false")
+    
+    validation_errors = collect_validation_errors(validations)
+    errors.extend(validation_errors)
+    
+    return {
+        'is_valid': len(errors) == 0,
+        'errors': errors
+    }
+
+
+def validate_lista_espera_data(data: Dict) -> Dict[str, Any]:
+    errors = []
+    
+    required_fields = ['nombre_mascota', 'tratamiento', 'id_duenio', 'desde', 'hasta']
+    
+    required_errors = validate_fields_required(data, required_fields)
+    if required_errors:
+        return {'is_valid': False, 'errors': required_errors}
+    
+    validations = [
+        validate_length(data['nombre_mascota'], 1, 80, 'nombre_mascota'),
+        validate_length(data['tratamiento'], 3, 1000, 'tratamiento'),
+        validate_integer(data['id_duenio'], 'id_duenio', min_val=1),
+        validate_datetime(data['desde'], 'desde'),
+        validate_future_datetime(data['hasta'], 'hasta')
+    ]
+    
+    if 'duracion_minutos' in data:
+        validations.append(validate_integer(
+            data['duracion_minutos'], 'duracion_minutos',
+            min_val=MIN_DURACION_MINUTOS, max_val=MAX_DURACION_MINUTOS
+        ))
+    
+    # id_recurso: opcional, null = cualquier recurso
+    if data.get('id_recurso') is not None:
+        validations.append(validate_integer(data['id_recurso'], 'id_recurso', min_val=1))
+    
+    validation_errors = collect_validation_errors(validations)
+    errors.extend(validation_errors)
+    
+    # La ventana se valida solo si las fechas son válidas
+    if not errors:
+        desde = parse_datetime(data['desde'])
+        hasta = parse_datetime(data['hasta'])
+        if desde >= hasta:
+            errors.append("'desde' debe ser anterior a 'hasta'")
+        elif hasta - desde > timedelta(days=MAX_DIAS_LISTA_ESPERA):
+            errors.append(f"La ventana no puede superar {MAX_DIAS_LISTA_ESPERA} días")
+    
+    return {
+        'is_valid': len(errors) == 0,
+        'errors': errors
+    }
+
+
+def validate_recurrencia(recurrencia: Dict) -> Dict[str, Any]:
+    errors = []
+    
+    if not isinstance(recurrencia, dict):
+        return {'is_valid': False, 'errors': ["'recurrencia' debe ser un objeto"]}
+    
+    validations = [
+        validate_integer(recurrencia.get('cada', 1), 'cada', min_val=1, max_val=365),
+        validate_enum(recurrencia.get('unidad', 'dias'), ['dias', 'semanas'], 'unidad')
+    ]
+    
+    tiene_cantidad = 'cantidad' in recurrencia
+    tiene_hasta = 'hasta' in recurrencia
+    
+    # Se termina por cantidad de turnos o por fecha límite (una de las dos)
+    if tiene_cantidad == tiene_hasta:
+        errors.append("La recurrencia requiere 'cantidad' o 'hasta' (una de las dos)")
+    elif tiene_cantidad:
+        validations.append(validate_integer(recurrencia['cantidad'], 'cantidad', min_val=1))
+    else:
+        try:
+            datetime.strptime(str(recurrencia['hasta']), '%Y-%m-%d')
+        except ValueError:
+            errors.append("El campo 'hasta' debe tener formato YYYY-MM-DD")
+    
+    validation_errors = collect_validation_errors(validations)
+    errors.extend(validation_errors)
+    
+    return {
+        'is_valid': len(errors) == 0,
+        'errors': errors
+    }
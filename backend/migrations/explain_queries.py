@@ -0,0 +1,52 @@
+import sys
+import mysql.connector
+from mysql.connector import Error
+from datetime import date, timedelta
+from dotenv import load_dotenv
+
+from init_db import get_db_config
+
+load_dotenv()
+
+def get_sample_queries():
+    """Consultas de agenda más frecuentes, con los mismos filtros que TurnoModel"""
+    hoy = date.today()
+    manana = hoy + timedelta(days=1)
+    fin_mes = hoy + timedelta(days=31)
+    
+    return [
+        ("Turnos de un día (get_by_fecha)",
+         "SELECT id FROM turnos WHERE fecha_turno >= %s AND fecha_turno < %s ORDER BY fecha_turno",
+         (hoy, manana)),
+        ("Rango de fechas (get_all)",
+         "SELECT id FROM turnos WHERE fecha_turno >= %s AND fecha_turno < %s ORDER BY fecha_turno DESC, id DESC",
+         (hoy, fin_mes)),
+        ("Estado + rango de fechas (get_all / get_count)",
+         "SELECT COUNT(*) FROM turnos WHERE estado = %s AND fecha_turno >= %s AND fecha_turno < %s",
+         ('pendiente', hoy, fin_mes)),
+        ("Dueño + fechas (get_by_duenio)",
+         "SELECT id FROM turnos WHERE id_duenio = %s ORDER BY fecha_turno DESC LIMIT 50",
+         (1,)),
+    ]
+
+def main():
+    """Muestra el plan de ejecución (EXPLAIN) de las consultas de agenda"""
+    try:
+        connection = mysql.connector.connect(**get_db_config())
+        cursor = connection.cursor(dictionary=True)
+        
+        for descripcion, query, params in get_sample_queries():
+            cursor.execute(f"EXPLAIN {query}", params)
+            print(f"\n🔍 {descripcion}")
+            for row in cursor.fetchall():
+                print(f"   - type: {row['type']}, key: {row['key']}, rows: {row['rows']}, extra: {row['Extra']}")
+        
+        cursor.close()
+        connection.close()
+        
+    except Error as e:
+        print(f"❌ Error ejecutando EXPLAIN: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
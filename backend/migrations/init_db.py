@@ -44,11 +44,25 @@ def create_tables():
         id INT AUTO_INCREMENT PRIMARY KEY,
         nombre_apellido VARCHAR(100) NOT NULL,
         telefono VARCHAR(20) NOT NULL,
+        -- Solo dígitos del teléfono (lo mantiene la app) y su reverso para buscar por sufijo
+        telefono_digitos VARCHAR(20) NOT NULL DEFAULT '',
+        telefono_digitos_rev VARCHAR(20) AS (REVERSE(telefono_digitos)) STORED,
         email VARCHAR(100) UNIQUE NOT NULL,
         direccion TEXT NOT NULL,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
         
+        -- Índice para paginación por clave (nombre_apellido, id)
+        INDEX idx_nombre_id (nombre_apellido, id),
+        
+        -- Búsqueda por teléfono: exacta y por sufijo (prefijo del reverso)
+        INDEX idx_telefono_digitos (telefono_digitos),
+        INDEX idx_telefono_digitos_rev (telefono_digitos_rev),
+        
+        -- Búsqueda de texto completo por fragmentos (ngram) en nombre y email.
+        -- Se crea sin stopwords (ver create_tables)
+        FULLTEXT INDEX ft_nombre_email (nombre_apellido, email) WITH PARSER ngram,
+        
         -- Constraints y validaciones
         CONSTRAINT chk_nombre_length CHECK (CHAR_LENGTH(nombre_apellido) >= 2),
         CONSTRAINT chk_telefono_format CHECK (telefono REGEXP '^[0-9+\\-\\s\\(\\)]+$'),
@@ -56,25 +70,49 @@ def create_tables():
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
     """
     
+    # SQL para crear tabla recursos (veterinarios y consultorios)
+    create_recursos_table = """
+    CREATE TABLE IF NOT EXISTS recursos (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        nombre VARCHAR(80) NOT NULL UNIQUE,
+        tipo ENUM('veterinario', 'consultorio') NOT NULL,
+        activo BOOLEAN NOT NULL DEFAULT TRUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """
+    
     # SQL para crear tabla turnos
     create_turnos_table = """
     CREATE TABLE IF NOT EXISTS turnos (
         id INT AUTO_INCREMENT PRIMARY KEY,
         nombre_mascota VARCHAR(80) NOT NULL,
         fecha_turno DATETIME NOT NULL,
+        duracion_minutos SMALLINT UNSIGNED NOT NULL DEFAULT 30,
+        fecha_fin DATETIME AS (fecha_turno + INTERVAL duracion_minutos MINUTE) STORED,
         tratamiento TEXT NOT NULL,
         id_duenio INT NOT NULL,
+        -- NULL = agenda general, sin veterinario ni consultorio asignado
+        id_recurso INT NULL,
         estado ENUM('pendiente', 'confirmado', 'completado', 'cancelado') DEFAULT 'pendiente',
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
         
         -- Foreign Key con CASCADE
         FOREIGN KEY (id_duenio) REFERENCES duenios(id) ON DELETE CASCADE ON UPDATE CASCADE,
+        -- Un recurso con turnos no se borra: se desactiva
+        CONSTRAINT fk_turnos_recurso FOREIGN KEY (id_recurso) REFERENCES recursos(id) ON DELETE RESTRICT ON UPDATE CASCADE,
         
         -- Índices para performance
-        INDEX idx_fecha_turno (fecha_turno),
-        INDEX idx_duenio (id_duenio),
-        INDEX idx_estado (estado),
+        -- Los filtros por fecha usan rangos semiabiertos sobre la columna,
+        -- así que estos índices resuelven día/rango con un range scan
+        INDEX idx_fecha_turno_id (fecha_turno, id),
+        -- Cubre el GROUP BY día/estado de la ocupación mensual sin leer filas
+        INDEX idx_fecha_estado (fecha_turno, estado),
+        -- Búsqueda de superposiciones por recurso: rango acotado de inicios + filtro por fin
+        INDEX idx_recurso_fecha_fin (id_recurso, fecha_turno, fecha_fin, estado),
+        INDEX idx_estado_fecha (estado, fecha_turno),
+        INDEX idx_duenio_fecha (id_duenio, fecha_turno),
         
         -- Constraints y validaciones
         CONSTRAINT chk_nombre_mascota_length CHECK (CHAR_LENGTH(nombre_mascota) >= 1),
@@ -82,19 +120,70 @@ def create_tables():
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
     """
     
+    # SQL para crear tabla de contadores (mantenida por los modelos en cada escritura)
+    create_turnos_stats_table = """
+    CREATE TABLE IF NOT EXISTS turnos_stats (
+        metrica VARCHAR(50) PRIMARY KEY,
+        valor BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """
+    
+    # SQL para crear tabla de lista de espera (horarios liberados por cancelaciones)
+    create_lista_espera_table = """
+    CREATE TABLE IF NOT EXISTS lista_espera (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        nombre_mascota VARCHAR(80) NOT NULL,
+        tratamiento TEXT NOT NULL,
+        id_duenio INT NOT NULL,
+        id_recurso INT NULL,
+        duracion_minutos SMALLINT UNSIGNED NOT NULL DEFAULT 30,
+        desde DATETIME NOT NULL,
+        hasta DATETIME NOT NULL,
+        estado ENUM('esperando', 'asignado', 'cancelado') NOT NULL DEFAULT 'esperando',
+        id_turno INT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        
+        FOREIGN KEY (id_duenio) REFERENCES duenios(id) ON DELETE CASCADE ON UPDATE CASCADE,
+        FOREIGN KEY (id_recurso) REFERENCES recursos(id) ON DELETE CASCADE ON UPDATE CASCADE,
+        -- El turno asignado puede borrarse sin perder la solicitud
+        FOREIGN KEY (id_turno) REFERENCES turnos(id) ON DELETE SET NULL ON UPDATE CASCADE,
+        
+        -- Carga de las solicitudes en espera cuya ventana no venció
+        INDEX idx_estado_hasta (estado, hasta)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """
+    
     try:
         config = get_db_config()
         connection = mysql.connector.connect(**config)
         cursor = connection.cursor()
         
+        # ft_nombre_email sin stopwords: el parser ngram descarta los tokens
+        # que contienen una ('a', 'de', 'la', 'com', ...) y la búsqueda no los encuentra
+        cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+        
         print("🔄 Creando tabla 'duenios'...")
         cursor.execute(create_duenios_table)
         print("✅ Tabla 'duenios' creada exitosamente")
         
+        print("🔄 Creando tabla 'recursos'...")
+        cursor.execute(create_recursos_table)
+        print("✅ Tabla 'recursos' creada exitosamente")
+        
         print("🔄 Creando tabla 'turnos'...")
         cursor.execute(create_turnos_table)
         print("✅ Tabla 'turnos' creada exitosamente")
         
+        print("🔄 Creando tabla 'turnos_stats'...")
+        cursor.execute(create_turnos_stats_table)
+        print("✅ Tabla 'turnos_stats' creada exitosamente")
+        
+        print("🔄 Creando tabla 'lista_espera'...")
+        cursor.execute(create_lista_espera_table)
+        print("✅ Tabla 'lista_espera' creada exitosamente")
+        
         # Commit de los cambios
         connection.commit()
         print("✅ Todas las tablas fueron creadas correctamente")
@@ -162,7 +251,7 @@ def verify_tables():
         cursor.close()
         connection.close()
         
-        return len(table_names) >= 2
+        return len(table_names) >= 5
         
     except Error as e:
         print(f"❌ Error al verificar tablas: {e}")
@@ -192,8 +281,8 @@ def main():
     print("🎉 Inicialización de base de datos completada exitosamente!")
     print("\n📊 Resumen:")
     print("   - Base de datos: veterinaria_turnos")
-    print("   - Tablas creadas: duenios, turnos")
-    print("   - Relaciones: duenios(1) -> turnos(N)")
+    print("   - Tablas creadas: duenios, recursos, turnos, turnos_stats, lista_espera")
+    print("   - Relaciones: duenios(1) -> turnos(N), recursos(1) -> turnos(N), duenios(1) -> lista_espera(N)")
     print("   - Constraints y validaciones aplicadas")
     print("\n✅ Sistema listo para recibir datos")
 
@@ -0,0 +1,306 @@
+import os
+import sys
+import mysql.connector
+from mysql.connector import Error
+from dotenv import load_dotenv
+
+# Agregar el directorio padre al path para importar módulos de la app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from init_db import get_db_config
+from app.counters import rebuild_queries
+from app.validators import normalize_phone
+
+load_dotenv()
+
+# Migraciones versionadas para bases de datos ya creadas con init_db.py.
+# Cada migración se aplica una sola vez y queda registrada en schema_migrations.
+# Los pasos verifican el esquema antes de modificarlo, así que sobre una base
+# recién creada por init_db.py (que ya tiene el esquema final) solo se registran.
+
+create_schema_migrations_table = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(20) PRIMARY KEY,
+    descripcion VARCHAR(200) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+
+def table_exists(cursor, table):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return cursor.fetchone() is not None
+
+
+def index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        LIMIT 1
+    """, (table, index))
+    return cursor.fetchone() is not None
+
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone() is not None
+
+
+def add_column(cursor, table, column, definition):
+    if column_exists(cursor, table, column):
+        print(f"   - Columna {table}.{column} ya existe")
+        return
+    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    print(f"   - Columna {table}.{column} creada")
+
+
+def constraint_exists(cursor, table, constraint):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.TABLE_CONSTRAINTS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_NAME = %s
+    """, (table, constraint))
+    return cursor.fetchone() is not None
+
+
+def add_index(cursor, table, index, definition):
+    if index_exists(cursor, table, index):
+        print(f"   - Índice {table}.{index} ya existe")
+        return
+    cursor.execute(f"ALTER TABLE {table} ADD {definition}")
+    print(f"   - Índice {table}.{index} creado")
+
+
+def drop_index(cursor, table, index):
+    if not index_exists(cursor, table, index):
+        return
+    cursor.execute(f"ALTER TABLE {table} DROP INDEX {index}")
+    print(f"   - Índice redundante {table}.{index} eliminado")
+
+
+def migracion_0001(cursor):
+    """Tabla de contadores turnos_stats"""
+    if not table_exists(cursor, 'turnos_stats'):
+        cursor.execute("""
+            CREATE TABLE turnos_stats (
+                metrica VARCHAR(50) PRIMARY KEY,
+                valor BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+        print("   - Tabla turnos_stats creada")
+
+    for query, params in rebuild_queries():
+        cursor.execute(query, params or ())
+    print("   - Contadores recalculados")
+
+
+def migracion_0002(cursor):
+    """Índices para paginación por cursor"""
+    add_index(cursor, 'turnos', 'idx_fecha_turno_id', "INDEX idx_fecha_turno_id (fecha_turno, id)")
+    add_index(cursor, 'duenios', 'idx_nombre_id', "INDEX idx_nombre_id (nombre_apellido, id)")
+
+
+def migracion_0003(cursor):
+    """Índices compuestos para filtros por estado/dueño y rango de fechas"""
+    add_index(cursor, 'turnos', 'idx_estado_fecha', "INDEX idx_estado_fecha (estado, fecha_turno)")
+    add_index(cursor, 'turnos', 'idx_duenio_fecha', "INDEX idx_duenio_fecha (id_duenio, fecha_turno)")
+
+    # Cubiertos por el prefijo izquierdo de los índices compuestos.
+    # idx_duenio_fecha sigue respaldando la foreign key de id_duenio.
+    drop_index(cursor, 'turnos', 'idx_fecha_turno')
+    drop_index(cursor, 'turnos', 'idx_estado')
+    drop_index(cursor, 'turnos', 'idx_duenio')
+
+
+def add_fulltext_ngram_index(cursor, table, index, columns):
+    # Sin la lista de stopwords de InnoDB ('a', 'de', 'la', 'en', 'com', ...):
+    # el parser ngram descarta todo token que contenga una, y se pierden
+    # casi todos los bigramas de nombres en castellano y de emails
+    cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+    add_index(cursor, table, index, f"FULLTEXT INDEX {index} ({columns}) WITH PARSER ngram")
+
+
+def migracion_0004(cursor):
+    """Índice FULLTEXT ngram para la búsqueda de dueños"""
+    add_fulltext_ngram_index(cursor, 'duenios', 'ft_nombre_email', "nombre_apellido, email")
+
+
+def migracion_0005(cursor):
+    """Teléfono normalizado (solo dígitos) e índices para buscar por teléfono"""
+    add_column(cursor, 'duenios', 'telefono_digitos', "VARCHAR(20) NOT NULL DEFAULT '' AFTER telefono")
+    
+    # Backfill con la misma normalización que usa la app, por lotes de id
+    cursor.execute("SELECT id, telefono FROM duenios WHERE telefono_digitos = '' ORDER BY id")
+    pendientes = [(normalize_phone(telefono), duenio_id) for duenio_id, telefono in cursor.fetchall()]
+    for inicio in range(0, len(pendientes), 1000):
+        cursor.executemany(
+            "UPDATE duenios SET telefono_digitos = %s WHERE id = %s",
+            pendientes[inicio:inicio + 1000]
+        )
+    print(f"   - {len(pendientes)} teléfonos normalizados")
+    
+    add_column(
+        cursor, 'duenios', 'telefono_digitos_rev',
+        "VARCHAR(20) AS (REVERSE(telefono_digitos)) STORED AFTER telefono_digitos"
+    )
+    add_index(cursor, 'duenios', 'idx_telefono_digitos', "INDEX idx_telefono_digitos (telefono_digitos)")
+    add_index(cursor, 'duenios', 'idx_telefono_digitos_rev', "INDEX idx_telefono_digitos_rev (telefono_digitos_rev)")
+
+
+def migracion_0006(cursor):
+    """Índice cubriente (fecha, estado) para la ocupación por día"""
+    add_index(cursor, 'turnos', 'idx_fecha_estado', "INDEX idx_fecha_estado (fecha_turno, estado)")
+
+
+def migracion_0007(cursor):
+    """Duración de los turnos, fin calculado e índice para detectar superposiciones"""
+    add_column(cursor, 'turnos', 'duracion_minutos', "SMALLINT UNSIGNED NOT NULL DEFAULT 30 AFTER fecha_turno")
+    add_column(
+        cursor, 'turnos', 'fecha_fin',
+        "DATETIME AS (fecha_turno + INTERVAL duracion_minutos MINUTE) STORED AFTER duracion_minutos"
+    )
+    add_index(cursor, 'turnos', 'idx_fecha_fin', "INDEX idx_fecha_fin (fecha_turno, fecha_fin, estado)")
+
+
+def migracion_0008(cursor):
+    """Recursos (veterinarios y consultorios) y recurso de cada turno"""
+    if not table_exists(cursor, 'recursos'):
+        cursor.execute("""
+            CREATE TABLE recursos (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                nombre VARCHAR(80) NOT NULL UNIQUE,
+                tipo ENUM('veterinario', 'consultorio') NOT NULL,
+                activo BOOLEAN NOT NULL DEFAULT TRUE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+        print("   - Tabla recursos creada")
+    
+    # NULL = agenda general (los turnos existentes quedan ahí)
+    add_column(cursor, 'turnos', 'id_recurso', "INT NULL AFTER id_duenio")
+    
+    # La búsqueda de superposiciones pasa a ser por recurso; el prefijo
+    # id_recurso respalda además la foreign key
+    add_index(
+        cursor, 'turnos', 'idx_recurso_fecha_fin',
+        "INDEX idx_recurso_fecha_fin (id_recurso, fecha_turno, fecha_fin, estado)"
+    )
+    drop_index(cursor, 'turnos', 'idx_fecha_fin')
+    
+    if not constraint_exists(cursor, 'turnos', 'fk_turnos_recurso'):
+        cursor.execute("""
+            ALTER TABLE turnos ADD CONSTRAINT fk_turnos_recurso
+            FOREIGN KEY (id_recurso) REFERENCES recursos(id) ON DELETE RESTRICT ON UPDATE CASCADE
+        """)
+        print("   - Foreign key turnos.id_recurso creada")
+
+
+def migracion_0009(cursor):
+    """Lista de espera para reasignar los horarios de turnos cancelados"""
+    if not table_exists(cursor, 'lista_espera'):
+        cursor.execute("""
+            CREATE TABLE lista_espera (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                nombre_mascota VARCHAR(80) NOT NULL,
+                tratamiento TEXT NOT NULL,
+                id_duenio INT NOT NULL,
+                id_recurso INT NULL,
+                duracion_minutos SMALLINT UNSIGNED NOT NULL DEFAULT 30,
+                desde DATETIME NOT NULL,
+                hasta DATETIME NOT NULL,
+                estado ENUM('esperando', 'asignado', 'cancelado') NOT NULL DEFAULT 'esperando',
+                id_turno INT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                FOREIGN KEY (id_duenio) REFERENCES duenios(id) ON DELETE CASCADE ON UPDATE CASCADE,
+                FOREIGN KEY (id_recurso) REFERENCES recursos(id) ON DELETE CASCADE ON UPDATE CASCADE,
+                FOREIGN KEY (id_turno) REFERENCES turnos(id) ON DELETE SET NULL ON UPDATE CASCADE,
+                INDEX idx_estado_hasta (estado, hasta)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+        print("   - Tabla lista_espera creada")
+
+
+def migracion_0010(cursor):
+    """Índice FULLTEXT de dueños reconstruido sin stopwords"""
+    # Las bases que aplicaron 0004 antes tienen el índice armado con la lista
+    # de stopwords por defecto; no hay forma de consultarlo, se rearma siempre
+    drop_index(cursor, 'duenios', 'ft_nombre_email')
+    add_fulltext_ngram_index(cursor, 'duenios', 'ft_nombre_email', "nombre_apellido, email")
+
+
+MIGRATIONS = [
+    ('0001', migracion_0001),
+    ('0002', migracion_0002),
+    ('0003', migracion_0003),
+    ('0004', migracion_0004),
+    ('0005', migracion_0005),
+    ('0006', migracion_0006),
+    ('0007', migracion_0007),
+    ('0008', migracion_0008),
+    ('0009', migracion_0009),
+    ('0010', migracion_0010),
+]
+
+
+def get_applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def run_migrations():
+    try:
+        config = get_db_config()
+        connection = mysql.connector.connect(**config)
+        cursor = connection.cursor()
+
+        cursor.execute(create_schema_migrations_table)
+        applied = get_applied_versions(cursor)
+
+        pendientes = [(version, func) for version, func in MIGRATIONS if version not in applied]
+        if not pendientes:
+            print("✅ No hay migraciones pendientes")
+
+        for version, func in pendientes:
+            descripcion = func.__doc__.strip()
+            print(f"🔄 Aplicando migración {version}: {descripcion}")
+
+            func(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, descripcion) VALUES (%s, %s)",
+                (version, descripcion)
+            )
+            connection.commit()
+            print(f"✅ Migración {version} aplicada")
+
+        cursor.close()
+        connection.close()
+
+    except Error as e:
+        print(f"❌ Error aplicando migraciones: {e}")
+        return False
+
+    return True
+
+
+def main():
+    """Aplica las migraciones pendientes en orden"""
+    print("🚀 Aplicando migraciones de base de datos...")
+    print("=" * 50)
+
+    if not run_migrations():
+        sys.exit(1)
+
+    print("=" * 50)
+    print("🎉 Base de datos actualizada")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+# Agregar el directorio padre al path para importar módulos de la app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import execute_query, get_db_info
+from app.counters import rebuild_counters, STATS_TABLE, PREFIJO_DIA
+
+# Cargar variables de entorno
+load_dotenv()
+
+def show_counters():
+    """Muestra los contadores globales recalculados"""
+    rows = execute_query(f"""
+        SELECT metrica, valor
+        FROM {STATS_TABLE}
+        WHERE metrica NOT LIKE %s
+        ORDER BY metrica
+    """, (f"{PREFIJO_DIA}%",), fetch=True)
+    
+    print("\n📊 Contadores globales:")
+    for row in rows:
+        print(f"   - {row['metrica']}: {row['valor']}")
+
+def main():
+    """
+    Reconstruye la tabla de contadores turnos_stats desde turnos y duenios.
+    Ejecutar luego de crear la tabla o si se modificaron datos por fuera de la API.
+    """
+    print(f"🔄 Reconstruyendo contadores de '{STATS_TABLE}'...")
+    print("=" * 50)
+    
+    db_info = get_db_info()
+    if db_info.get('status') != 'connected':
+        print("❌ No hay conexión a la base de datos")
+        sys.exit(1)
+    
+    try:
+        result = rebuild_counters()
+        print(f"✅ Métricas eliminadas: {result['eliminadas']}, creadas: {result['creadas']}")
+        show_counters()
+    except Exception as e:
+        print(f"❌ Error reconstruyendo contadores: {e}")
+        sys.exit(1)
+    
+    print("=" * 50)
+    print("🎉 Contadores reconstruidos exitosamente!")
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from app.database import execute_query, execute_transaction, get_db_info
+from app.counters import rebuild_counters
+from app.validators import normalize_phone
 
 # Cargar variables de entorno
 load_dotenv()
@@ -99,9 +101,9 @@ def insert_duenios_data():
         duenios_inserted = []
         for duenio in duenios_data:
             duenio_id = execute_query("""
-                INSERT INTO duenios (nombre_apellido, telefono, email, direccion) 
-                VALUES (%(nombre_apellido)s, %(telefono)s, %(email)s, %(direccion)s)
-            """, duenio)
+                INSERT INTO duenios (nombre_apellido, telefono, telefono_digitos, email, direccion) 
+                VALUES (%(nombre_apellido)s, %(telefono)s, %(telefono_digitos)s, %(email)s, %(direccion)s)
+            """, {**duenio, 'telefono_digitos': normalize_phone(duenio['telefono'])})
             
             duenios_inserted.append({
                 'id': duenio_id,
@@ -419,7 +421,15 @@ def main():
         print("❌ Error en validación de integridad")
         sys.exit(1)
     
-    # Paso 5: Mostrar consultas de ejemplo
+    # Paso 5: Recalcular contadores de estadísticas (los seeds insertan por fuera de los modelos)
+    try:
+        rebuild_counters()
+        print("✅ Contadores de estadísticas recalculados")
+    except Exception as e:
+        print(f"❌ Error recalculando contadores: {e}")
+        sys.exit(1)
+    
+    # Paso 6: Mostrar consultas de ejemplo
     show_sample_queries()
     
     print("=" * 60)
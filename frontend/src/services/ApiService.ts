@@ -133,10 +133,21 @@ class ApiService {
     return this.get(`/duenios/search?q=${encodeURIComponent(query)}`);
   }
 
+  autocompleteDuenios(prefix: string, limit = 10) {
+    return this.get(
+      `/duenios/autocomplete?prefix=${encodeURIComponent(prefix)}&limit=${limit}`
+    );
+  }
+
   getTurnos() {
     return this.get("/turnos");
   }
 
+  // Las exportaciones se descargan con un link (sin el timeout de axios)
+  getExportUrl(entidad: "turnos" | "duenios", format: "ndjson" | "csv" = "csv") {
+    return `${this.api.defaults.baseURL}/${entidad}/export?format=${format}`;
+  }
+
   getTurno(id: number) {
     return this.get(`/turnos/${id}`);
   }
@@ -157,13 +168,64 @@ class ApiService {
     return this.get(`/turnos/duenio/${idDuenio}`);
   }
 
-  getTurnosByFecha(fecha: string) {
-    return this.get(`/turnos/fecha/${fecha}`);
+  getTurnosByFecha(fecha: string, recurso?: number) {
+    const params = recurso ? `?recurso=${recurso}` : "";
+    return this.get(`/turnos/fecha/${fecha}${params}`);
+  }
+
+  getTurnosByRango(desde: string, hasta: string) {
+    return this.get(
+      `/turnos/rango?desde=${encodeURIComponent(desde)}&hasta=${encodeURIComponent(hasta)}`
+    );
+  }
+
+  getOcupacion(mes: string) {
+    return this.get(`/turnos/ocupacion?mes=${encodeURIComponent(mes)}`);
+  }
+
+  getDisponibilidad(fecha: string, duracion?: number, recurso?: number) {
+    let params = duracion ? `&duracion=${duracion}` : "";
+    if (recurso) {
+      params += `&recurso=${recurso}`;
+    }
+    return this.get(
+      `/turnos/disponibilidad?fecha=${encodeURIComponent(fecha)}${params}`
+    );
   }
 
   updateTurnoEstado(id: number, estado: string) {
     return this.put(`/turnos/${id}/estado`, { estado });
   }
+
+  getRecursos(soloActivos = false) {
+    return this.get(`/recursos${soloActivos ? "?activos=true" : ""}`);
+  }
+
+  createRecurso(data: any) {
+    return this.post("/recursos", data);
+  }
+
+  updateRecurso(id: number, data: any) {
+    return this.put(`/recursos/${id}`, data);
+  }
+
+  deleteRecurso(id: number) {
+    return this.delete(`/recursos/${id}`);
+  }
+
+  getListaEspera(estado?: string) {
+    return this.get(
+      `/lista-espera${estado ? `?estado=${encodeURIComponent(estado)}` : ""}`
+    );
+  }
+
+  createSolicitudEspera(data: any) {
+    return this.post("/lista-espera", data);
+  }
+
+  cancelarSolicitudEspera(id: number) {
+    return this.delete(`/lista-espera/${id}`);
+  }
 }
 
 export default new ApiService();
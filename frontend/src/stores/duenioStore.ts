@@ -100,17 +100,23 @@ export const useDuenioStore = defineStore("duenio", () => {
       console.log(`✏️ Actualizando dueño ID: ${id}`);
       const response = await ApiService.updateDuenio(id, data);
 
-      const { duenio: updatedDuenio } = response.data || response;
+      // El backend devuelve solo los campos enviados: se combinan con los conocidos
+      const { duenio: cambios } = response.data || response;
 
-      // Actualizar en la lista
       const index = duenios.value.findIndex((d) => d.id === id);
+      const updatedDuenio = {
+        ...(index !== -1 ? duenios.value[index] : currentDuenio.value),
+        ...cambios,
+      };
+
+      // Actualizar en la lista
       if (index !== -1) {
         duenios.value[index] = updatedDuenio;
       }
 
       // Actualizar dueño actual si corresponde
       if (currentDuenio.value?.id === id) {
-        currentDuenio.value = updatedDuenio;
+        currentDuenio.value = { ...currentDuenio.value, ...cambios };
       }
 
       console.log("✅ Dueño actualizado:", updatedDuenio.nombre_apellido);
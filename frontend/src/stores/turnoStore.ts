@@ -161,17 +161,23 @@ export const useTurnoStore = defineStore("turno", () => {
 
       console.log("🔧 Respuesta del update:", response);
 
-      const updatedTurno = response.data?.turno || response.data || response;
+      // El backend devuelve solo los campos modificados: se combinan con los conocidos
+      const cambios = response.data?.turno || response.data || response;
 
-      // Actualizar en la lista
       const index = turnos.value.findIndex((t) => t.id === id);
+      const updatedTurno = {
+        ...(index !== -1 ? turnos.value[index] : currentTurno.value),
+        ...cambios,
+      };
+
+      // Actualizar en la lista
       if (index !== -1) {
         turnos.value[index] = updatedTurno;
       }
 
       // Actualizar turno actual si corresponde
       if (currentTurno.value?.id === id) {
-        currentTurno.value = updatedTurno;
+        currentTurno.value = { ...currentTurno.value, ...cambios };
       }
 
       console.log("✅ Turno actualizado:", updatedTurno.nombre_mascota);
@@ -275,17 +281,22 @@ export const useTurnoStore = defineStore("turno", () => {
       console.log(`🔄 Cambiando estado del turno ID ${id} a: ${estado}`);
       const response = await ApiService.updateTurnoEstado(id, estado);
 
-      const updatedTurno = response.data || response;
+      const cambios = response.data?.turno || response.data || response;
 
-      // Actualizar en la lista principal
       const index = turnos.value.findIndex((t) => t.id === id);
+      const updatedTurno = {
+        ...(index !== -1 ? turnos.value[index] : currentTurno.value),
+        ...cambios,
+      };
+
+      // Actualizar en la lista principal
       if (index !== -1) {
         turnos.value[index] = updatedTurno;
       }
 
       // Actualizar en turno actual si corresponde
       if (currentTurno.value?.id === id) {
-        currentTurno.value = updatedTurno;
+        currentTurno.value = { ...currentTurno.value, ...cambios };
       }
 
       console.log("✅ Estado actualizado exitosamente");
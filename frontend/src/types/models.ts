@@ -10,10 +10,24 @@ export interface Duenio {
   updated_at?: string
 }
 
+export type RecursoTipo = 'veterinario' | 'consultorio'
+
+export interface Recurso {
+  id?: number
+  nombre: string
+  tipo: RecursoTipo
+  activo?: boolean
+  created_at?: string
+  updated_at?: string
+}
+
 export interface Turno {
   id?: number
   nombre_mascota: string
   fecha_turno: string
+  duracion_minutos?: number
+  fecha_fin?: string
+  id_recurso?: number | null // null = agenda general
   tratamiento: string
   id_duenio: number
   estado: TurnoEstado
@@ -24,6 +38,26 @@ export interface Turno {
 
 export type TurnoEstado = 'pendiente' | 'confirmado' | 'completado' | 'cancelado'
 
+export type SolicitudEsperaEstado = 'esperando' | 'asignado' | 'cancelado'
+
+// Solicitud de la lista de espera: toma el horario de un turno cancelado
+// que entre en su ventana [desde, hasta)
+export interface SolicitudEspera {
+  id?: number
+  nombre_mascota: string
+  tratamiento: string
+  id_duenio: number
+  id_recurso?: number | null // null = cualquier recurso
+  duracion_minutos?: number
+  desde: string
+  hasta: string
+  estado?: SolicitudEsperaEstado
+  id_turno?: number | null // turno reservado al asignarse
+  nombre_apellido?: string
+  created_at?: string
+  updated_at?: string
+}
+
 // Payloads para requests
 export interface CreateDuenioPayload {
   nombre_apellido: string
@@ -40,6 +74,8 @@ export interface CreateTurnoPayload {
   tratamiento: string
   id_duenio: number
   estado?: TurnoEstado
+  duracion_minutos?: number
+  id_recurso?: number | null
 }
 
 export interface UpdateTurnoPayload extends Partial<CreateTurnoPayload> {}